@@ -0,0 +1,77 @@
+"""
+Compares AppFinder's trigram lookup index with the previous linear substring
+scan over the app map, on a synthetic catalog, and times find_app before and
+after the queries are in the launch history and prewarmed (when they resolve
+directly).
+
+    python benchmarks/bench_app_lookup.py --entries 100000
+"""
+import argparse
+import json
+import logging
+import time
+from unittest.mock import patch
+
+from fixtures import synthetic_app_names
+from app_catalog import AppCatalog
+from app_finder import AppFinder
+from app_search import AppSearchIndex
+from usage_history import UsageHistory
+
+QUERIES = ["adobe photo", "google cloud notes", "mozila player", "jetbrains tools photo 4242", "vs code"]
+
+
+def linear_scan(app_map, spoken_name):
+    """The lookup AppFinder.find_app used before the search index existed."""
+    if spoken_name in app_map:
+        return app_map[spoken_name]
+    for app_name, path in app_map.items():
+        if spoken_name in app_name:
+            return path
+    return None
+
+
+def _per_query(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in QUERIES:
+            func(query)
+    return (time.perf_counter() - start) / (repeat * len(QUERIES))
+
+
+def run(entries=100000, repeat=20):
+    names = synthetic_app_names(entries - 1) + ["visual studio code"]
+    app_map = {name.lower(): f"C:\\Start Menu\\{name}.lnk" for name in names}
+
+    start = time.perf_counter()
+    index = AppSearchIndex(app_map)
+    build_s = time.perf_counter() - start
+
+    finder = AppFinder(logger=logging.getLogger("bench"), history=UsageHistory())
+    finder._snapshot = (AppCatalog(app_map), index)
+
+    results = {
+        "entries": entries,
+        "index_build_s": build_s,
+        "linear_scan_ms": _per_query(lambda q: linear_scan(app_map, q), repeat) * 1000,
+        "indexed_lookup_ms": _per_query(lambda q: finder.find_app_candidates(q, 5), repeat) * 1000,
+        "find_app_ms": _per_query(finder.find_app, repeat) * 1000,
+        "top_matches": {query: finder.find_app_candidates(query, 1) for query in QUERIES},
+    }
+    for query in QUERIES:
+        path = finder.find_app(query)
+        if path:
+            finder.record_launch(query, path)
+    # The synthetic shortcuts don't exist on disk
+    with patch("app_finder.os.path.exists", return_value=True), patch("app_finder.resolve_shortcut"):
+        finder.prewarm()
+    results["find_app_used_before_ms"] = _per_query(finder.find_app, repeat) * 1000
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.entries, args.repeat), indent=2))
@@ -0,0 +1,125 @@
+"""
+Compares the memory held by the app map as a plain dict of full paths with
+the compact AppCatalog, for synthetic Start Menu catalogs of several sizes,
+along with the time to build each, to look a name up and to list the names
+starting with a prefix.
+
+    python benchmarks/bench_app_memory.py
+    python benchmarks/bench_app_memory.py --entries 10000 100000 1000000
+
+Memory is what each structure still holds once built (traced with
+tracemalloc), for the same per-directory listings as input.
+"""
+import argparse
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+from fixtures import VENDORS, synthetic_app_names
+from app_catalog import AppCatalog
+
+ROOTS = [
+    "C:\\Users\\someone\\AppData\\Roaming\\Microsoft\\Windows\\Start Menu\\Programs",
+    "C:\\ProgramData\\Microsoft\\Windows\\Start Menu\\Programs",
+]
+FILES_PER_DIR = 50
+QUERIES = ["microsoft studio office 4242", "adobe photo", "google", "nothing like it"]
+
+
+def make_listings(entries):
+    """Per-directory (directory, [file names]) listings, like the persistent index holds."""
+    names = synthetic_app_names(entries)
+    listings = []
+    for start in range(0, entries, FILES_PER_DIR):
+        n = start // FILES_PER_DIR
+        directory = os.path.join(ROOTS[n % len(ROOTS)], f"{VENDORS[n % len(VENDORS)]} {n}")
+        listings.append((directory, [name + ".lnk" for name in names[start:start + FILES_PER_DIR]]))
+    return listings
+
+
+def _entries(listings):
+    for directory, files in listings:
+        for file in files:
+            yield os.path.splitext(file)[0].lower(), directory, file
+
+
+def build_dict(listings):
+    """The app map as AppFinder built it before the catalog."""
+    app_map = {}
+    for name, directory, file in _entries(listings):
+        if name not in app_map:
+            app_map[name] = os.path.join(directory, file)
+    return app_map
+
+
+def build_catalog(listings):
+    return AppCatalog.from_entries(_entries(listings))
+
+
+def _measure(build, listings):
+    """Returns (structure, bytes it holds, seconds to build)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    structure = build(listings)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Timed again without tracing, which slows allocation down
+    start = time.perf_counter()
+    build(listings)
+    return structure, held, time.perf_counter() - start
+
+
+def _lookup_ns(app_map, repeat):
+    names = [name for name, _ in zip(app_map, range(1000))] + ["not an app"]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for name in names:
+            app_map.get(name)
+    return (time.perf_counter() - start) / (repeat * len(names)) * 1e9
+
+
+def _prefix_us(query, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for prefix in QUERIES:
+            query(prefix)
+    return (time.perf_counter() - start) / (repeat * len(QUERIES)) * 1e6
+
+
+def run(entries=(10000, 100000), repeat=20):
+    results = {}
+    for count in entries:
+        listings = make_listings(count)
+        app_map, dict_bytes, dict_s = _measure(build_dict, listings)
+        catalog, catalog_bytes, catalog_s = _measure(build_catalog, listings)
+        assert catalog == app_map
+        results[str(count)] = {
+            "directories": catalog.directory_count,
+            "dict_bytes": dict_bytes,
+            "catalog_bytes": catalog_bytes,
+            "dict_bytes_per_app": dict_bytes / count,
+            "catalog_bytes_per_app": catalog_bytes / count,
+            "memory_saved_fraction": 1.0 - catalog_bytes / dict_bytes,
+            "dict_build_s": dict_s,
+            "catalog_build_s": catalog_s,
+            "dict_lookup_ns": _lookup_ns(app_map, repeat),
+            "catalog_lookup_ns": _lookup_ns(catalog, repeat),
+            "dict_prefix_scan_us": _prefix_us(
+                lambda prefix: [name for name in app_map if name.startswith(prefix)], max(1, repeat // 10)),
+            "catalog_prefix_us": _prefix_us(catalog.prefixed, repeat),
+        }
+        del app_map, catalog, listings
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.entries, args.repeat), indent=2))
@@ -0,0 +1,140 @@
+"""
+Runs recorded WAV fixtures through recognizer backends and reports the
+real-time factor and end-to-end latency of each.
+
+    python benchmarks/bench_backends.py --fixtures path/to/wavs --backends vosk,google \
+        --options '{"vosk": {"model_path": "vosk-model-small-en-us"}}'
+
+A fixtures directory holds ``*.wav`` files and an optional ``transcripts.json``
+mapping file names to the expected text, used to report word accuracy.
+Without ``--fixtures``, synthetic audio is generated and the ``stub`` backend
+(a fixed-latency fake engine) is used, so the harness runs with no network.
+"""
+import argparse
+import glob
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import speech_recognition as sr
+
+from fixtures import noise, random_vowels, synth_speech
+from audio_features import write_wav
+from recognizer_backends import BACKENDS, RecognizerBackend
+
+
+class StubBackend(RecognizerBackend):
+    """Fake engine: returns the expected transcript after a simulated delay."""
+    name = "stub"
+    offline = True
+
+    def __init__(self, transcripts=None, latency_ms=150.0, recognizer=None):
+        self.transcripts = transcripts or {}
+        self.latency_ms = latency_ms
+        self.current = None
+
+    def recognize(self, audio):
+        time.sleep(self.latency_ms / 1000.0)
+        text = self.transcripts.get(self.current)
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+
+def make_fixtures(root, count=10, seed=0):
+    """Writes synthetic utterances and their stand-in transcripts."""
+    rng = np.random.default_rng(seed)
+    transcripts = {}
+    for i in range(count):
+        signal = np.concatenate([noise(0.3, rng=rng), synth_speech(random_vowels(8, rng), 16000, rng), noise(0.5, rng=rng)])
+        write_wav(os.path.join(root, f"{i}.wav"), signal, 16000)
+        transcripts[f"{i}.wav"] = f"open application {i}"
+    with open(os.path.join(root, "transcripts.json"), "w") as f:
+        json.dump(transcripts, f)
+
+
+def word_accuracy(expected, actual):
+    """One minus the word error rate of the actual transcript, floored at zero."""
+    expected, actual = expected.lower().split(), actual.lower().split()
+    # Levenshtein distance over words
+    previous = list(range(len(actual) + 1))
+    for i, word in enumerate(expected, 1):
+        current = [i]
+        for j, other in enumerate(actual, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != other)))
+        previous = current
+    return max(0.0, 1.0 - previous[-1] / max(1, len(expected)))
+
+
+def run_backend(backend, fixtures, transcripts):
+    latencies, audio_s, accuracies, failures = [], 0.0, [], 0
+    for path in sorted(glob.glob(os.path.join(fixtures, "*.wav"))):
+        name = os.path.basename(path)
+        with sr.AudioFile(path) as source:
+            audio = sr.Recognizer().record(source)
+        duration = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        if isinstance(backend, StubBackend):
+            backend.current = name
+        start = time.perf_counter()
+        try:
+            text = backend.recognize(audio)
+        except (sr.UnknownValueError, sr.RequestError):
+            text = None
+            failures += 1
+        latencies.append(time.perf_counter() - start)
+        audio_s += duration
+        if name in transcripts:
+            accuracies.append(word_accuracy(transcripts[name], text or ""))
+
+    return {
+        "utterances": len(latencies),
+        "failures": failures,
+        "audio_s": audio_s,
+        "latency_ms_mean": 1000.0 * float(np.mean(latencies)) if latencies else None,
+        "latency_ms_p95": 1000.0 * float(np.percentile(latencies, 95)) if latencies else None,
+        "real_time_factor": sum(latencies) / audio_s if audio_s else None,
+        "word_accuracy": float(np.mean(accuracies)) if accuracies else None,
+    }
+
+
+def run(fixtures, backends=("stub",), options=None):
+    options = options or {}
+    transcripts_path = os.path.join(fixtures, "transcripts.json")
+    transcripts = {}
+    if os.path.isfile(transcripts_path):
+        with open(transcripts_path) as f:
+            transcripts = json.load(f)
+
+    results = {}
+    for name in backends:
+        if name == "stub":
+            backend = StubBackend(transcripts, **options.get("stub", {}))
+        elif name not in BACKENDS:
+            results[name] = {"error": "unknown backend"}
+            continue
+        else:
+            try:
+                backend = BACKENDS[name](**options.get(name, {}))
+            except Exception as e:
+                results[name] = {"error": str(e)}
+                continue
+        results[name] = run_backend(backend, fixtures, transcripts)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixtures", help="directory of WAV fixtures; synthetic audio is generated if omitted")
+    parser.add_argument("--backends", default="stub", help="comma-separated backend names")
+    parser.add_argument("--options", default="{}", help="JSON object of per-backend keyword arguments")
+    args = parser.parse_args()
+    backends = args.backends.split(",")
+    options = json.loads(args.options)
+    if args.fixtures:
+        print(json.dumps(run(args.fixtures, backends, options), indent=2))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            make_fixtures(tmp)
+            print(json.dumps(run(tmp, backends, options), indent=2))
@@ -0,0 +1,79 @@
+"""
+Measures the cost of dispatching recognized commands: matching the text
+against the command patterns, and running execute_command end to end with
+the app lookup on a synthetic Start Menu tree. Launches are handed to the
+launcher's worker pool (with a stub platform that starts nothing) and the
+volume endpoint is stubbed, so only the app's own work is timed.
+
+    python benchmarks/bench_dispatch.py
+    python benchmarks/bench_dispatch.py --files 50000 --repeat 2000
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+import numpy as np
+
+from fixtures import make_start_menu_tree, synthetic_app_names
+from app_finder import AppFinder
+from command_handler import CommandHandler
+from launcher import FakePlatform
+from volume_control import FakeVolumeEndpoint, VolumeController
+
+
+def _commands(files):
+    names = synthetic_app_names(files)
+    return {
+        "open_exact": f"open {names[files // 2].lower()}",
+        "open_fuzzy": f"open {' '.join(names[files // 3].lower().split()[:3])}",
+        "open_two": f"open {names[1].lower()} and {names[2].lower()}",
+        "volume_step": "volume up by thirty percent",
+        "set_volume": "set volume to 40 percent",
+        "sequence": f"open {names[3].lower()} then {names[4].lower()} then volume down",
+        "no_match": "what time is it",
+    }
+
+
+def _per_call_us(func, text, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1e6
+    return {"mean_us": float(timings.mean()), "p95_us": float(np.percentile(timings, 95))}
+
+
+def run(files=5000, repeat=500):
+    logger = logging.getLogger("bench_dispatch")
+    logger.setLevel(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as tmp:
+        roots = make_start_menu_tree(tmp, files)
+        with patch("command_handler.default_index_path", return_value=os.path.join(tmp, "index.json")), \
+             patch("command_handler.AppFinder", lambda **kwargs: AppFinder(logger=logger, search_paths=roots)):
+            handler = CommandHandler(logger=logger)
+        handler.volume = VolumeController(FakeVolumeEndpoint(), logger=logger, max_step=1.0)
+        # Repeats of the same command would be deduplicated instead of launched
+        handler.launcher.platform = platform = FakePlatform()
+        handler.launcher.dedup_seconds = 0
+
+        results = {"files": files, "apps": len(handler.app_finder.app_map), "parse": {}, "execute": {}}
+        for name, text in _commands(files).items():
+            results["parse"][name] = _per_call_us(handler.parse, text, repeat)
+            results["execute"][name] = _per_call_us(handler.execute_command, text, repeat)
+        handler.volume.wait()
+        handler.launcher.wait()
+        results["launches"] = len(platform.opened)
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+    print(json.dumps(run(args.files, args.repeat), indent=2))
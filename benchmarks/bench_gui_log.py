@@ -0,0 +1,175 @@
+"""
+Measures how many log records per second the GUI log view sustains, and how
+long the Tk thread is kept busy per timer tick, for the queued, batched
+handler against the old handler that updated the widget on every record.
+
+    python benchmarks/bench_gui_log.py
+    python benchmarks/bench_gui_log.py --records 200000 --threads 8 --tk
+
+By default the text widget is a stand-in that costs ``--call-us`` per widget
+call and keeps the text as a list of lines; ``--tk`` uses a real Tk text
+widget (needs a display).
+"""
+import argparse
+import json
+import logging
+import threading
+import time
+
+import numpy as np
+
+import fixtures  # noqa: F401  (puts src on the path)
+from main_app import ScrolledTextHandler
+
+
+class FakeText:
+    """Text widget stand-in: counts calls, models their cost and keeps the lines."""
+
+    def __init__(self, call_us):
+        self.call_s = call_us / 1e6
+        self.calls = 0
+        self.lines = []
+
+    def _call(self):
+        self.calls += 1
+        if self.call_s:
+            time.sleep(self.call_s)
+
+    def config(self, **kwargs):
+        self._call()
+
+    def insert(self, index, text):
+        self._call()
+        self.lines.extend(text.splitlines())
+
+    def delete(self, start, end):
+        self._call()
+        del self.lines[:int(end.split(".")[0]) - 1]
+
+    def see(self, index):
+        self._call()
+
+    def line_count(self):
+        return len(self.lines)
+
+
+class CountingText:
+    """Wraps a real Tk text widget to count calls."""
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.calls = 0
+
+    def __getattr__(self, name):
+        method = getattr(self.widget, name)
+
+        def call(*args, **kwargs):
+            self.calls += 1
+            return method(*args, **kwargs)
+        return call
+
+    def line_count(self):
+        return int(self.widget.index("end-1c").split(".")[0]) - 1
+
+
+class DirectHandler(logging.Handler):
+    """The previous handler: one config/insert/config/see cycle per record, on the logging thread."""
+
+    def __init__(self, text_widget):
+        super().__init__()
+        self.text_widget = text_widget
+        self._lock_widget = threading.Lock()
+
+    def emit(self, record):
+        msg = self.format(record)
+        # Serialized here only so the stand-in widget stays consistent
+        with self._lock_widget:
+            self.text_widget.config(state='normal')
+            self.text_widget.insert("end", msg + '\n')
+            self.text_widget.config(state='disabled')
+            self.text_widget.see("end")
+
+
+def _produce(handler, records, threads):
+    logger = logging.getLogger(f"bench_gui_log_{id(handler)}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.handlers = [handler]
+    per_thread = records // threads
+
+    def work(index):
+        for n in range(per_thread):
+            logger.info("worker %d record %d: recognized command 'open notepad'", index, n)
+
+    workers = [threading.Thread(target=work, args=(i,)) for i in range(threads)]
+    return workers, per_thread * threads
+
+
+def run_direct(widget, records, threads):
+    handler = DirectHandler(widget)
+    workers, total = _produce(handler, records, threads)
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "records": total,
+        "records_per_second": total / elapsed,
+        "widget_calls_per_record": widget.calls / total,
+        "lines_in_view": widget.line_count(),
+    }
+
+
+def run_queued(widget, records, threads, poll_ms):
+    handler = ScrolledTextHandler(widget, poll_ms=poll_ms)
+    workers, total = _produce(handler, records, threads)
+    ticks, shown = [], 0
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    # This thread plays the Tk main loop, draining on the timer
+    while any(worker.is_alive() for worker in workers) or handler._pending:
+        tick = time.perf_counter()
+        shown += handler.drain()
+        ticks.append((time.perf_counter() - tick) * 1000.0)
+        time.sleep(poll_ms / 1000.0)
+    elapsed = time.perf_counter() - start
+    return {
+        "records": total,
+        "records_per_second": total / elapsed,
+        "widget_calls_per_record": widget.calls / total,
+        "lines_in_view": widget.line_count(),
+        # Records already beyond the bounded view by the time of a tick are never drawn
+        "records_drawn": shown,
+        "tick_ms_p95": float(np.percentile(ticks, 95)),
+        "tick_ms_max": float(max(ticks)),
+    }
+
+
+def run(records=50000, threads=4, call_us=50, poll_ms=100, use_tk=False):
+    if use_tk:
+        import tkinter as tk
+        root = tk.Tk()
+        make_widget = lambda: CountingText(tk.Text(root))
+    else:
+        make_widget = lambda: FakeText(call_us)
+    results = {
+        "direct": run_direct(make_widget(), records, threads),
+        "queued": run_queued(make_widget(), records, threads, poll_ms),
+    }
+    if use_tk:
+        root.destroy()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--call-us", type=float, default=50, help="modelled cost of one widget call")
+    parser.add_argument("--poll-ms", type=int, default=100)
+    parser.add_argument("--tk", action="store_true", help="use a real Tk text widget")
+    args = parser.parse_args()
+    print(json.dumps(run(args.records, args.threads, args.call_us, args.poll_ms, args.tk), indent=2))
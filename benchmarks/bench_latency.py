@@ -0,0 +1,91 @@
+"""
+Measures the cost of latency tracing per span, disabled and enabled, and
+prints the per-stage latency of a traced run of the voice core over a
+synthetic recording with a stub recognizer and a stand-in platform whose
+launches take --launch-ms.
+
+    python benchmarks/bench_latency.py
+    python benchmarks/bench_latency.py --spans 1000000 --recognize-ms 300 --launch-ms 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import speech_recognition as sr
+
+from fixtures import noise, random_vowels, synth_speech
+from audio_features import write_wav
+from latency import LatencyTracer
+from launcher import FakePlatform, Launcher
+from vad import Endpointer
+from voice_core import VoiceCore
+
+SAMPLE_RATE = 16000
+
+
+def _span_cost_ns(tracer, spans):
+    start = time.perf_counter()
+    for _ in range(spans):
+        with tracer.span("stage"):
+            pass
+    return (time.perf_counter() - start) / spans * 1e9
+
+
+def _baseline_ns(spans):
+    start = time.perf_counter()
+    for _ in range(spans):
+        pass
+    return (time.perf_counter() - start) / spans * 1e9
+
+
+def run_pipeline(recognize_ms, execute_ms, launch_ms=50.0, commands=5, seed=0):
+    """Runs the core over a recording of ``commands`` utterances; returns the tracer's stats."""
+    rng = np.random.default_rng(seed)
+    parts = [noise(1.0, rng=rng)]
+    for _ in range(commands):
+        parts += [synth_speech(random_vowels(6, rng), SAMPLE_RATE, rng), noise(1.0, rng=rng)]
+    tracer = LatencyTracer()
+    launcher = Launcher(platform=FakePlatform(open_ms=launch_ms), dedup_seconds=0, tracer=tracer)
+
+    def recognize(audio):
+        with tracer.span("recognize_stub"):
+            time.sleep(recognize_ms / 1000.0)
+        return "open notepad"
+
+    def execute(command):
+        with tracer.span("find_app"):
+            time.sleep(execute_ms / 1000.0)
+        launcher.launch("notepad", "C:/Windows/notepad.exe")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "speech.wav")
+        write_wav(path, np.concatenate(parts), SAMPLE_RATE)
+        core = VoiceCore(sr.AudioFile(path), Endpointer(SAMPLE_RATE), recognize, execute, tracer=tracer)
+        asyncio.run(core.run())
+    launcher.wait()
+    return tracer.stats()
+
+
+def run(spans=200000, recognize_ms=200.0, execute_ms=5.0, launch_ms=50.0):
+    baseline = _baseline_ns(spans)
+    return {
+        "span_overhead_ns": {
+            "disabled": _span_cost_ns(LatencyTracer(enabled=False), spans) - baseline,
+            "enabled": _span_cost_ns(LatencyTracer(), spans) - baseline,
+        },
+        "pipeline_stages": run_pipeline(recognize_ms, execute_ms, launch_ms),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--spans", type=int, default=200000)
+    parser.add_argument("--recognize-ms", type=float, default=200.0, help="latency of the stub recognizer")
+    parser.add_argument("--execute-ms", type=float, default=5.0, help="time the stub command takes")
+    parser.add_argument("--launch-ms", type=float, default=50.0, help="time the stand-in platform takes to start an app")
+    args = parser.parse_args()
+    print(json.dumps(run(args.spans, args.recognize_ms, args.execute_ms, args.launch_ms), indent=2))
@@ -0,0 +1,110 @@
+"""
+Measures recognition throughput: a WAV recording of spoken commands is fed
+through the voice core as fast as it can be read (endpointing, recognition
+through VoiceRecognizer, command execution), with a stub recognizer of fixed
+latency in place of the speech engine.
+
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --utterances 100 --recognize-ms 300 --concurrency 4
+    python benchmarks/bench_pipeline.py --fixture recording.wav
+
+Without ``--fixture``, a synthetic 16 kHz recording is generated.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from functools import partial
+from unittest.mock import patch
+
+import numpy as np
+import speech_recognition as sr
+
+from fixtures import noise, random_vowels, synth_speech
+from audio_features import write_wav
+from latency import LatencyTracer
+from recognizer_backends import RecognizerBackend
+from voice_core import VoiceCore
+from voice_recognition import VoiceRecognizer
+
+SAMPLE_RATE = 16000
+TRANSCRIPT = "hey windows open notepad"
+
+
+class StubBackend(RecognizerBackend):
+    """Fake engine: returns a fixed transcript after a simulated delay."""
+    name = "stub"
+    offline = True
+
+    def __init__(self, latency_ms):
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def recognize(self, audio):
+        self.calls += 1
+        time.sleep(self.latency_ms / 1000.0)
+        return TRANSCRIPT
+
+
+def make_fixture(path, utterances=30, gap_s=1.0, seed=0):
+    """Writes a recording of ``utterances`` synthetic commands separated by background noise."""
+    rng = np.random.default_rng(seed)
+    parts = [noise(gap_s, rng=rng)]
+    for _ in range(utterances):
+        parts += [synth_speech(random_vowels(int(rng.integers(5, 10)), rng), SAMPLE_RATE, rng), noise(gap_s, rng=rng)]
+    write_wav(path, np.concatenate(parts), SAMPLE_RATE)
+
+
+def run_fixture(path, recognize_ms=200.0, concurrency=2):
+    tracer = LatencyTracer()
+    with patch("speech_recognition.Microphone", lambda: sr.AudioFile(path)):
+        recognizer = VoiceRecognizer(tracer=tracer)
+    backend = recognizer.backend = StubBackend(recognize_ms)
+    executed = []
+    core = VoiceCore(recognizer.microphone, recognizer.create_segmenter(),
+                     partial(recognizer.recognize_utterance, wake_word="hey windows"), executed.append,
+                     max_recognitions=concurrency, tracer=tracer)
+    with sr.AudioFile(path) as source:
+        audio_s = source.FRAME_COUNT / source.SAMPLE_RATE
+    # The file is read much faster than real time: keep all of it rather than
+    # dropping the oldest audio like a live microphone would
+    core.capture.buffer_seconds = audio_s + 1.0
+
+    start = time.perf_counter()
+    asyncio.run(core.run())
+    wall_s = time.perf_counter() - start
+
+    total = tracer.stats().get("total", {})
+    return {
+        "audio_s": audio_s,
+        "wall_s": wall_s,
+        "utterances": backend.calls,
+        "commands": len(executed),
+        "utterances_per_second": backend.calls / wall_s,
+        "faster_than_real_time": audio_s / wall_s,
+        "command_latency_ms_p50": total.get("p50_ms"),
+        "command_latency_ms_p90": total.get("p90_ms"),
+    }
+
+
+def run(utterances=30, recognize_ms=200.0, concurrency=2, fixture=None):
+    if fixture:
+        return run_fixture(fixture, recognize_ms, concurrency)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "commands.wav")
+        make_fixture(path, utterances)
+        results = run_fixture(path, recognize_ms, concurrency)
+    results["expected_utterances"] = utterances
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--utterances", type=int, default=30)
+    parser.add_argument("--recognize-ms", type=float, default=200.0, help="latency of the stub recognizer")
+    parser.add_argument("--concurrency", type=int, default=2, help="recognitions allowed in flight")
+    parser.add_argument("--fixture", help="WAV recording to use instead of a synthetic one")
+    args = parser.parse_args()
+    print(json.dumps(run(args.utterances, args.recognize_ms, args.concurrency, args.fixture), indent=2))
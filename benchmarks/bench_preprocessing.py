@@ -0,0 +1,102 @@
+"""
+Measures what audio preprocessing saves on online recognition: utterances
+(as the endpointer cuts them, with pre-roll and trailing silence) are
+recognized through the Google backend against a local stub endpoint, with
+and without trimming and resampling, and the bytes uploaded and recognition
+latency are compared. The stub models a constrained uplink by taking
+--uplink-kbps to receive each request.
+
+    python benchmarks/bench_preprocessing.py
+    python benchmarks/bench_preprocessing.py --rate 48000 --uplink-kbps 256
+    python benchmarks/bench_preprocessing.py --fixture a.wav b.wav
+
+Without ``--fixture``, synthetic utterances are generated at ``--rate``. The
+FLAC encoding is SpeechRecognition's own, as for the real API.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from fixtures import FakeSpeechServer, noise, random_vowels, synth_speech
+from audio_features import float_to_pcm, read_wav
+from voice_recognition import VoiceRecognizer
+
+TRANSCRIPT = "hey windows open notepad"
+
+
+def make_utterances(count, rate, seed=0):
+    """Synthetic utterances with the endpointer's 300 ms pre-roll and 700 ms trailing silence."""
+    rng = np.random.default_rng(seed)
+    utterances = []
+    for _ in range(count):
+        speech = synth_speech(random_vowels(int(rng.integers(6, 11)), rng), rate, rng)
+        samples = np.concatenate([noise(0.3, rate, rng=rng), speech, noise(0.7, rate, rng=rng)])
+        utterances.append(float_to_pcm(samples))
+    return utterances
+
+
+class CapturedSource:
+    """Stands in for the microphone the utterances were captured with."""
+    SAMPLE_WIDTH = 2
+
+    def __init__(self, rate):
+        self.SAMPLE_RATE = rate
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def _recognize_all(utterances, rate, url, preprocessing):
+    recognizer = VoiceRecognizer(backend_options={"endpoint": url}, preprocessing=preprocessing,
+                                 source=CapturedSource(rate))
+    timings = []
+    for utterance in utterances:
+        start = time.perf_counter()
+        command = recognizer.recognize_utterance(utterance, wake_word="hey windows")
+        timings.append(time.perf_counter() - start)
+        assert command == "open notepad", command
+    return np.array(timings) * 1000
+
+
+def run(utterances=10, rate=44100, uplink_kbps=512.0, fixtures=None):
+    if fixtures:
+        loaded = [read_wav(path) for path in fixtures]
+        rate = loaded[0][1]
+        audio = [float_to_pcm(samples) for samples, _ in loaded]
+    else:
+        audio = make_utterances(utterances, rate)
+
+    server = FakeSpeechServer(TRANSCRIPT, uplink_kbps=uplink_kbps).start()
+
+    results = {"utterances": len(audio), "capture_rate": rate, "uplink_kbps": uplink_kbps,
+               "audio_s_per_utterance": sum(len(a) for a in audio) / (2 * rate * len(audio))}
+    try:
+        for name, preprocessing in (("raw", None), ("preprocessed", {})):
+            server.received.clear()
+            timings = _recognize_all(audio, rate, server.url, preprocessing)
+            results[name] = {
+                "bytes_per_utterance": sum(server.received) / len(audio),
+                "latency_ms_p50": float(np.percentile(timings, 50)),
+                "latency_ms_p90": float(np.percentile(timings, 90)),
+            }
+    finally:
+        server.close()
+    raw, prepared = results["raw"], results["preprocessed"]
+    results["bytes_saved_fraction"] = 1.0 - prepared["bytes_per_utterance"] / raw["bytes_per_utterance"]
+    results["latency_speedup"] = raw["latency_ms_p50"] / prepared["latency_ms_p50"]
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--utterances", type=int, default=10)
+    parser.add_argument("--rate", type=int, default=44100, help="capture sample rate of the synthetic utterances")
+    parser.add_argument("--uplink-kbps", type=float, default=512.0)
+    parser.add_argument("--fixture", nargs="+", help="WAV recordings of single utterances to use instead")
+    args = parser.parse_args()
+    print(json.dumps(run(args.utterances, args.rate, args.uplink_kbps, args.fixture), indent=2))
@@ -0,0 +1,86 @@
+"""
+Measures how often the recognition cache saves a call to the recognizer, and
+how often it answers wrongly, on a stream of spoken commands where a few
+commands are said far more often than the rest.
+
+    python benchmarks/bench_recognition_cache.py
+    python benchmarks/bench_recognition_cache.py --commands 40 --utterances 500 --backend-ms 600
+
+Each command is a synthetic vowel sequence; every utterance of it is a new
+take with its own pitch, speed, loudness and background noise. The stub
+recognizer returns the right transcript after ``--backend-ms``.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from fixtures import noise, random_vowels, synth_speech
+from recognition_cache import RecognitionCache
+
+SAMPLE_RATE = 16000
+
+
+def _take(vowels, f0, rng, variation):
+    speech = synth_speech(vowels, SAMPLE_RATE, rng, f0=f0 * rng.uniform(1 - variation, 1 + variation),
+                          stretch=rng.uniform(1 - variation, 1 + variation))
+    speech = speech * rng.uniform(0.5, 1.5)
+    signal = np.concatenate([noise(0.3, rng=rng), speech, noise(0.3, rng=rng)])
+    return signal + noise(len(signal) / SAMPLE_RATE + 0.01, rng=rng)[:len(signal)]
+
+
+def run(commands=30, utterances=300, backend_ms=500.0, variation=0.03, seed=0):
+    rng = np.random.default_rng(seed)
+    vocabulary = []
+    while len(vocabulary) < commands:
+        vowels = random_vowels(int(rng.integers(4, 8)), rng)
+        if vowels not in vocabulary:
+            vocabulary.append(vowels)
+    f0 = rng.uniform(100, 200)
+    # Zipf-like popularity: the first commands are said most often
+    weights = 1.0 / np.arange(1, commands + 1)
+    spoken = rng.choice(commands, size=utterances, p=weights / weights.sum())
+
+    cache = RecognitionCache(SAMPLE_RATE, min_confidence=None)
+    wrong, fingerprint_ms, lookup_ms, backend_calls = 0, [], [], 0
+    for index in spoken:
+        samples = _take(vocabulary[index], f0, rng, variation)
+        start = time.perf_counter()
+        fingerprint = cache.fingerprint(samples)
+        fingerprint_ms.append((time.perf_counter() - start) * 1000.0)
+        start = time.perf_counter()
+        text = cache.lookup(fingerprint)
+        lookup_ms.append((time.perf_counter() - start) * 1000.0)
+        if text is None:
+            backend_calls += 1
+            cache.store(fingerprint, f"command {index}")
+        elif text != f"command {index}":
+            wrong += 1
+
+    stats = cache.stats()
+    saved_s = stats["hits"] * backend_ms / 1000.0
+    overhead_s = (sum(fingerprint_ms) + sum(lookup_ms)) / 1000.0
+    return {
+        "utterances": utterances,
+        "distinct_commands": int(len(set(spoken.tolist()))),
+        "backend_calls": backend_calls,
+        "hit_rate": stats["hit_rate"],
+        "wrong_hits": wrong,
+        "cache_entries": stats["entries"],
+        "fingerprint_ms_mean": float(np.mean(fingerprint_ms)),
+        "lookup_ms_mean": float(np.mean(lookup_ms)),
+        "lookup_ms_p95": float(np.percentile(lookup_ms, 95)),
+        "recognition_time_saved_s": saved_s - overhead_s,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commands", type=int, default=30)
+    parser.add_argument("--utterances", type=int, default=300)
+    parser.add_argument("--backend-ms", type=float, default=500.0, help="latency of the stub recognizer")
+    parser.add_argument("--variation", type=float, default=0.03, help="pitch and speed variation between takes")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.commands, args.utterances, args.backend_ms, args.variation, args.seed), indent=2))
@@ -0,0 +1,111 @@
+"""
+Measures what the resilience layer does for online recognition under a
+degraded service: commands are recognized through the Google backend
+against a local fake endpoint that injects latency spikes and HTTP errors,
+called directly and through the ResilientBackend (deadline, jittered retries,
+hedging and the circuit breaker with a stub local engine as fallback), and
+the success rate and latency percentiles are compared per scenario.
+
+    python benchmarks/bench_resilience.py
+    python benchmarks/bench_resilience.py --requests 200 --latency-ms 80 --spike-ms 3000
+
+Scenarios: "healthy", "slow_tail" (a fraction of requests take --spike-ms
+longer), "errors" (a fraction fail with HTTP 500) and "outage" (all fail).
+"""
+import argparse
+import json
+import logging
+import time
+
+import numpy as np
+import speech_recognition as sr
+
+from fixtures import FakeSpeechServer
+from recognizer_backends import GoogleBackend, RecognizerBackend
+from resilience import ResilientBackend
+
+TRANSCRIPT = "hey windows open notepad"
+AUDIO = sr.AudioData(b"\x00\x10" * 16000, 16000, 2)
+
+
+class StubLocalBackend(RecognizerBackend):
+    """An offline engine answering after a fixed decoding time."""
+    name = "local"
+    offline = True
+
+    def __init__(self, latency_ms):
+        self.latency_ms = latency_ms
+
+    def recognize(self, audio):
+        time.sleep(self.latency_ms / 1000.0)
+        return TRANSCRIPT
+
+
+def _faults(scenario, count, spike_ms, fraction):
+    """Faults for the next count requests, fraction of them spread evenly."""
+    hit = [int((i + 1) * fraction) > int(i * fraction) for i in range(count)]
+    if scenario == "slow_tail":
+        return [spike_ms if h else 0 for h in hit]
+    if scenario == "errors":
+        return ["error" if h else 0 for h in hit]
+    if scenario == "outage":
+        return ["error"] * count
+    return []
+
+
+def _measure(backend, server, faults, requests):
+    # Enough faults for every request the layer may send, retries and hedges included
+    server.faults = list(faults)
+    server.received.clear()
+    timings, successes = [], 0
+    for _ in range(requests):
+        start = time.perf_counter()
+        try:
+            successes += backend.recognize(AUDIO) == TRANSCRIPT
+        except (sr.RequestError, sr.UnknownValueError):
+            pass
+        timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1000
+    return {
+        "success_rate": successes / requests,
+        "latency_ms_p50": float(np.percentile(timings, 50)),
+        "latency_ms_p90": float(np.percentile(timings, 90)),
+        "latency_ms_p99": float(np.percentile(timings, 99)),
+        "requests_sent": len(server.received),
+    }
+
+
+def run(requests=50, latency_ms=50.0, spike_ms=2000.0, fraction=0.1, deadline_s=1.5, hedge_after_ms=200,
+        local_latency_ms=150.0):
+    logger = logging.getLogger("bench_resilience")
+    logger.setLevel(logging.CRITICAL)
+    server = FakeSpeechServer(TRANSCRIPT, latency_ms=latency_ms).start()
+    results = {"requests": requests, "latency_ms": latency_ms, "spike_ms": spike_ms, "fraction": fraction}
+    try:
+        for scenario in ("healthy", "slow_tail", "errors", "outage"):
+            faults = _faults(scenario, requests * 3, spike_ms, fraction)
+            direct = GoogleBackend(endpoint=server.url)
+            resilient = ResilientBackend(GoogleBackend(endpoint=server.url),
+                                         fallback=StubLocalBackend(local_latency_ms), deadline_s=deadline_s,
+                                         hedge_after_ms=hedge_after_ms, backoff_s=0.05, logger=logger)
+            results[scenario] = {
+                "direct": _measure(direct, server, faults, requests),
+                "resilient": dict(_measure(resilient, server, faults, requests), **resilient.counts),
+            }
+    finally:
+        server.close()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="the service's normal response time")
+    parser.add_argument("--spike-ms", type=float, default=2000.0, help="extra latency of a slow request")
+    parser.add_argument("--fraction", type=float, default=0.1, help="fraction of slow or failing requests")
+    parser.add_argument("--deadline-s", type=float, default=1.5)
+    parser.add_argument("--hedge-after-ms", type=float, default=200)
+    parser.add_argument("--local-latency-ms", type=float, default=150.0, help="decoding time of the stub local engine")
+    args = parser.parse_args()
+    print(json.dumps(run(args.requests, args.latency_ms, args.spike_ms, args.fraction, args.deadline_s,
+                         args.hedge_after_ms, args.local_latency_ms), indent=2))
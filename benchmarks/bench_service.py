@@ -0,0 +1,83 @@
+"""
+Measures the throughput of the service API: concurrent loopback clients
+posting text commands to a ServiceServer, with the app lookup on a synthetic
+Start Menu tree and a stub platform that starts nothing. Reports requests
+per second and the latency each client saw, for each number of clients.
+
+    python benchmarks/bench_service.py
+    python benchmarks/bench_service.py --clients 1 4 16 --requests 500
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import numpy as np
+
+from fixtures import make_start_menu_tree, synthetic_app_names
+from app_finder import AppFinder
+from command_handler import CommandHandler
+from launcher import FakePlatform
+from service import ServiceServer, VoiceService
+
+
+def _post(url, text):
+    request = urllib.request.Request(url, data=json.dumps({"text": text}).encode(), method="POST",
+                                     headers={"Content-Type": "application/json", "Authorization": "Bearer bench"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=30) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+def run(files=5000, clients=(1, 4, 16), requests=300):
+    logger = logging.getLogger("bench_service")
+    logger.setLevel(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as tmp:
+        roots = make_start_menu_tree(tmp, files)
+        with patch("command_handler.default_index_path", return_value=os.path.join(tmp, "index.json")), \
+             patch("command_handler.AppFinder", lambda **kwargs: AppFinder(logger=logger, search_paths=roots)):
+            handler = CommandHandler(logger=logger)
+        # Repeats of the same command would be deduplicated instead of launched
+        handler.launcher.platform = FakePlatform()
+        handler.launcher.dedup_seconds = 0
+        names = synthetic_app_names(files)
+        texts = [f"open {names[i * 7 % files].lower()}" for i in range(requests)]
+
+        service = VoiceService(handler, create_recognizer=None, logger=logger)
+        server = ServiceServer(service, port=0, token="bench", workers=max(clients))
+        server.start()
+        url = server.url + "/command"
+        results = {"files": files, "requests": requests, "clients": {}}
+        try:
+            for count in clients:
+                with ThreadPoolExecutor(max_workers=count) as pool:
+                    start = time.perf_counter()
+                    timings = np.array(list(pool.map(lambda text: _post(url, text), texts))) * 1000
+                    elapsed = time.perf_counter() - start
+                results["clients"][str(count)] = {
+                    "requests_per_second": requests / elapsed,
+                    "p50_ms": float(np.percentile(timings, 50)),
+                    "p95_ms": float(np.percentile(timings, 95)),
+                }
+        finally:
+            server.shutdown()
+            server.server_close()
+            service.close()
+        handler.launcher.wait()
+        results["launches"] = len(handler.launcher.platform.opened)
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+    print(json.dumps(run(args.files, args.clients, args.requests), indent=2))
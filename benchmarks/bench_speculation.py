@@ -0,0 +1,166 @@
+"""
+Measures what speculative app lookups save on "open" commands: a WAV
+recording of spoken commands is streamed through the voice core at real
+time (or --speed times faster), once with the apps looked up from partial
+transcripts while each command is spoken and once without. A stub engine
+stands in for the speech backend: its partials reveal one more word of the
+command every 1 / --words-per-second of audio, and its final transcript
+takes --recognize-ms. App lookups run on a synthetic Start Menu tree, and
+launches go to a stub platform.
+
+    python benchmarks/bench_speculation.py
+    python benchmarks/bench_speculation.py --files 50000 --utterances 10 --speed 4
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from functools import partial
+from unittest.mock import patch
+
+import numpy as np
+import speech_recognition as sr
+
+from fixtures import make_start_menu_tree, noise, random_vowels, synth_speech, synthetic_app_names
+from audio_features import write_wav
+from app_finder import AppFinder
+from command_handler import CommandHandler
+from latency import LatencyTracer
+from launcher import FakePlatform
+from recognizer_backends import RecognizerBackend
+from voice_core import VoiceCore
+from voice_recognition import VoiceRecognizer
+
+SAMPLE_RATE = 16000
+WAKE_WORD = "hey windows"
+
+
+class StreamingStubBackend(RecognizerBackend):
+    """Fake engine reading scripted transcripts, one per utterance, as partials and then in full."""
+    name = "stub"
+    offline = True
+    supports_partials = True
+
+    def __init__(self, transcripts, recognize_ms, words_per_second):
+        self.transcripts = transcripts
+        self.recognize_ms = recognize_ms
+        self.words_per_second = words_per_second
+        self.streams = 0
+        self.calls = 0
+
+    def stream(self, sample_rate, sample_width):
+        words = self.transcripts[self.streams % len(self.transcripts)].split()
+        self.streams += 1
+        fed = [0.0]
+        rate = self.words_per_second
+
+        class Stream:
+            def feed(self, pcm):
+                fed[0] += len(pcm) / (sample_rate * sample_width)
+                return " ".join(words[:int(fed[0] * rate)])
+        return Stream()
+
+    def recognize(self, audio):
+        transcript = self.transcripts[self.calls % len(self.transcripts)]
+        self.calls += 1
+        time.sleep(self.recognize_ms / 1000.0)
+        return transcript
+
+
+class PacedAudioFile(sr.AudioFile):
+    """A file source that yields its audio no faster than speed times real time, like a microphone."""
+
+    def __init__(self, path, speed):
+        super().__init__(path)
+        self.speed = speed
+
+    def __enter__(self):
+        source = super().__enter__()
+        stream, bytes_per_second = source.stream, source.SAMPLE_RATE * source.SAMPLE_WIDTH * self.speed
+        start, read = time.perf_counter(), [0]
+
+        class Paced:
+            def read(self, size):
+                data = stream.read(size)
+                read[0] += len(data)
+                delay = start + read[0] / bytes_per_second - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                return data
+        source.stream = Paced()
+        return source
+
+
+def make_fixture(path, utterances, seed=0):
+    """Writes a recording of synthetic commands of 6 to 10 syllables, separated by background noise."""
+    rng = np.random.default_rng(seed)
+    parts = [noise(1.0, rng=rng)]
+    for _ in range(utterances):
+        parts += [synth_speech(random_vowels(int(rng.integers(6, 11)), rng), SAMPLE_RATE, rng), noise(1.2, rng=rng)]
+    write_wav(path, np.concatenate(parts), SAMPLE_RATE)
+
+
+def run_once(path, handler, transcripts, speculate, recognize_ms, words_per_second, speed):
+    tracer = LatencyTracer()
+    handler.tracer = tracer
+    handler.speculation.hits = handler.speculation.misses = 0
+    with patch("speech_recognition.Microphone", lambda: PacedAudioFile(path, speed)):
+        recognizer = VoiceRecognizer(tracer=tracer)
+    recognizer.backend = StreamingStubBackend(transcripts, recognize_ms, words_per_second)
+    on_partial = partial(handler.speculate, wake_word=WAKE_WORD) if speculate else None
+    core = VoiceCore(recognizer.microphone, recognizer.create_segmenter(on_partial=on_partial),
+                     partial(recognizer.recognize_utterance, wake_word=WAKE_WORD), handler.execute_command,
+                     max_recognitions=1, tracer=tracer)
+    asyncio.run(core.run())
+    handler.launcher.wait()
+
+    stats = tracer.stats()
+    return {
+        "commands": recognizer.backend.calls,
+        "speculation_hits": handler.speculation.hits,
+        "find_app_ms_p50": stats.get("find_app", {}).get("p50_ms"),
+        "execute_command_ms_p50": stats.get("execute_command", {}).get("p50_ms"),
+        "command_latency_ms_p50": stats.get("total", {}).get("p50_ms"),
+    }
+
+
+def run(files=20000, utterances=6, recognize_ms=150.0, words_per_second=4.0, speed=1.0):
+    logger = logging.getLogger("bench_speculation")
+    logger.setLevel(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as tmp:
+        roots = make_start_menu_tree(tmp, files)
+        with patch("command_handler.default_index_path", return_value=os.path.join(tmp, "index.json")), \
+             patch("command_handler.AppFinder", lambda **kwargs: AppFinder(logger=logger, search_paths=roots)):
+            handler = CommandHandler(logger=logger)
+        handler.launcher.platform = FakePlatform()
+        handler.launcher.dedup_seconds = 0
+        # Partial names, so each lookup is a fuzzy search rather than an exact hit
+        names = synthetic_app_names(files)
+        transcripts = [f"{WAKE_WORD} open {' '.join(names[i * files // utterances].lower().split()[:3])}"
+                       for i in range(utterances)]
+        path = os.path.join(tmp, "commands.wav")
+        make_fixture(path, utterances)
+
+        results = {"files": files, "utterances": utterances, "recognize_ms": recognize_ms, "speed": speed}
+        for name, speculate in (("without_speculation", False), ("with_speculation", True)):
+            results[name] = run_once(path, handler, transcripts, speculate, recognize_ms, words_per_second, speed)
+        results["launches"] = len(handler.launcher.platform.opened)
+    without, with_ = results["without_speculation"], results["with_speculation"]
+    if without["find_app_ms_p50"] and with_["find_app_ms_p50"]:
+        results["find_app_speedup"] = without["find_app_ms_p50"] / with_["find_app_ms_p50"]
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--utterances", type=int, default=6)
+    parser.add_argument("--recognize-ms", type=float, default=150.0, help="latency of the stub final transcript")
+    parser.add_argument("--words-per-second", type=float, default=4.0, help="pace of the stub partials")
+    parser.add_argument("--speed", type=float, default=1.0, help="how much faster than real time to stream")
+    args = parser.parse_args()
+    print(json.dumps(run(args.files, args.utterances, args.recognize_ms, args.words_per_second, args.speed),
+                     indent=2))
@@ -0,0 +1,109 @@
+"""
+Measures application startup, each step in a fresh interpreter: the import
+time of each of the app's modules (including what it imports), the time
+until the window can be built, and the init time of the components that load
+after it: the command handler (with a warm app index of a synthetic Start
+Menu tree) and the voice recognizer (with a WAV file in place of the
+microphone).
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --files 50000 --repeat 5
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from fixtures import SRC_DIR, make_start_menu_tree, noise
+
+# The app's modules, roughly in the order startup needs them
+MODULES = ["config", "latency", "main_app", "app_finder", "command_handler", "recognizer_backends",
+           "voice_recognition", "audio_pipeline", "voice_core", "wake_word", "recognition_cache"]
+
+
+def _child_import(module):
+    """Runs in the fresh interpreter; prints the module's import time."""
+    start = time.perf_counter()
+    __import__(module)
+    print(json.dumps({"import_s": time.perf_counter() - start}))
+
+
+def _child_init(tmp, roots):
+    """Runs in the fresh interpreter; prints the time of each startup stage as JSON."""
+    timings = {}
+    start = time.perf_counter()
+    import main_app
+    from config import load_config
+    import logging
+    logger = logging.getLogger("bench_startup")
+    logger.setLevel(logging.CRITICAL)
+    config = load_config(logger=logger)
+    # What VoiceControlApp does before the window appears, less Tk itself: the first latency table included
+    main_app.format_latency_table(main_app.latency.tracer.stats())
+    timings["time_to_window_s"] = time.perf_counter() - start
+    timings["numpy_before_window"] = "numpy" in sys.modules
+
+    from unittest.mock import patch
+    import speech_recognition as sr
+    start = time.perf_counter()
+    from app_finder import AppFinder
+    index_path = os.path.join(tmp, "index.json")
+    with patch("command_handler.AppFinder",
+               lambda **kwargs: AppFinder(logger=logger, index_path=index_path, search_paths=roots)), \
+         patch("speech_recognition.Microphone", lambda: sr.AudioFile(os.path.join(tmp, "microphone.wav"))):
+        stages = []
+        main_app.create_components(config, logger, status=lambda text: stages.append(time.perf_counter()))
+    end = time.perf_counter()
+    timings["command_handler_s"] = stages[1] - stages[0]
+    timings["voice_recognizer_s"] = end - stages[1]
+    timings["time_to_ready_s"] = timings["time_to_window_s"] + end - start
+    print(json.dumps(timings))
+
+
+def _child(*args):
+    command = [sys.executable, os.path.abspath(__file__), "--child"] + list(args)
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    output = subprocess.run(command, check=True, capture_output=True, text=True, env=env).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(files=5000, repeat=3):
+    # Imported here: the child interpreters must not have numpy loaded before they time the window
+    import numpy as np
+    from audio_features import write_wav
+    results = {"files": files, "import_s": {}}
+    for module in MODULES:
+        results["import_s"][module] = min(_child("import", module)["import_s"] for _ in range(repeat))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        roots = make_start_menu_tree(tmp, files)
+        write_wav(os.path.join(tmp, "microphone.wav"), noise(1.0, rng=np.random.default_rng(0)), 16000)
+        # The first start builds the app index; the timed ones reuse it
+        _child("init", tmp, *roots)
+        runs = [_child("init", tmp, *roots) for _ in range(repeat)]
+    results["init_s"] = {}
+    results["numpy_before_window"] = any(run.pop("numpy_before_window") for run in runs)
+    for key in runs[0]:
+        value = min(run[key] for run in runs)
+        if key.startswith("time_to_"):
+            results[key] = value
+        else:
+            results["init_s"][key[:-2]] = value
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        if sys.argv[2] == "import":
+            _child_import(sys.argv[3])
+        else:
+            _child_init(sys.argv[3], sys.argv[4:])
+        sys.exit(0)
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run(args.files, args.repeat), indent=2))
@@ -0,0 +1,162 @@
+"""
+Measures voice activity detection throughput and endpointing accuracy and
+latency, against SpeechRecognition's energy threshold (calibrated once with
+adjust_for_ambient_noise, as the app used to do).
+
+    python benchmarks/bench_vad.py
+    python benchmarks/bench_vad.py --fixtures path/to/fixtures
+
+A fixtures directory holds ``*.wav`` recordings and a ``labels.json`` mapping
+each file to its list of [start, end] speech times in seconds. Without
+``--fixtures``, a synthetic set is generated whose background noise rises by
+20 dB over each recording, like an office filling up.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import speech_recognition as sr
+
+from fixtures import noise, random_vowels, synth_speech
+from audio_features import float_to_pcm, read_wav, write_wav
+from vad import Endpointer, VoiceActivityDetector
+
+SAMPLE_RATE = 16000
+CHUNK = 480
+# An utterance counts as found when it is closed this soon after the speech ended
+MAX_LATENCY_S = 2.0
+
+
+def make_fixtures(root, files=10, utterances=6, seed=0):
+    """Writes a synthetic fixtures directory (see module docstring)."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(root, exist_ok=True)
+    labels = {}
+    for i in range(files):
+        pieces, spans, position = [], [], 0
+        for _ in range(utterances):
+            gap = int(SAMPLE_RATE * rng.uniform(1.5, 2.5))
+            speech = synth_speech(random_vowels(int(rng.integers(5, 11)), rng), SAMPLE_RATE, rng,
+                                  f0=rng.uniform(100, 200))
+            pieces += [np.zeros(gap, dtype=np.float32), speech]
+            spans.append([(position + gap) / SAMPLE_RATE, (position + gap + len(speech)) / SAMPLE_RATE])
+            position += gap + len(speech)
+        tail = int(SAMPLE_RATE * 2.0)
+        signal = np.concatenate(pieces + [np.zeros(tail, dtype=np.float32)])
+        # Background noise drifting from -54 dB to -34 dB
+        drift = np.geomspace(0.002, 0.02, len(signal)).astype(np.float32)
+        signal += drift * noise(len(signal) / SAMPLE_RATE, level=1.0, rng=rng)
+        write_wav(os.path.join(root, f"{i}.wav"), signal, SAMPLE_RATE)
+        labels[f"{i}.wav"] = spans
+    with open(os.path.join(root, "labels.json"), "w") as f:
+        json.dump(labels, f)
+
+
+def _score(closed, spans):
+    """Matches utterance close times to labelled speech ends. Returns (found, latencies, extra)."""
+    latencies, used = [], set()
+    for start, end in spans:
+        matches = [t for t in closed if t not in used and 0.0 <= t - end <= MAX_LATENCY_S]
+        if matches:
+            used.add(matches[0])
+            latencies.append((matches[0] - end) * 1000.0)
+    return len(latencies), latencies, len(closed) - len(used)
+
+
+def _run_endpointer(data):
+    endpointer = Endpointer(SAMPLE_RATE)
+    closed = []
+    for offset in range(0, len(data), 2 * CHUNK):
+        if endpointer.process(data[offset:offset + 2 * CHUNK]):
+            closed.append(min(offset + 2 * CHUNK, len(data)) / (2 * SAMPLE_RATE))
+    return closed
+
+
+class _CountingStream:
+    def __init__(self, stream):
+        self.stream = stream
+        self.position = 0
+
+    def read(self, size):
+        data = self.stream.read(size)
+        self.position += len(data)
+        return data
+
+
+def _run_energy_threshold(path):
+    recognizer = sr.Recognizer()
+    closed = []
+    with sr.AudioFile(path) as source:
+        source.CHUNK = CHUNK
+        source.stream = stream = _CountingStream(source.stream)
+        recognizer.adjust_for_ambient_noise(source, duration=0.5)
+        total = source.FRAME_COUNT * source.SAMPLE_WIDTH
+        while stream.position < total:
+            recognizer.listen(source)
+            # The last call returns whatever is left at the end of the file
+            if stream.position < total:
+                closed.append(stream.position / (source.SAMPLE_WIDTH * SAMPLE_RATE))
+    return closed
+
+
+def _summary(found, expected, latencies, extra):
+    return {
+        "found": found,
+        "expected": expected,
+        "recall": found / expected if expected else None,
+        "spurious": extra,
+        "latency_ms_mean": float(np.mean(latencies)) if latencies else None,
+        "latency_ms_p95": float(np.percentile(latencies, 95)) if latencies else None,
+    }
+
+
+def run(fixtures):
+    with open(os.path.join(fixtures, "labels.json")) as f:
+        labels = json.load(f)
+
+    results = {}
+    totals = {"vad": [0, 0, [], 0], "energy_threshold": [0, 0, [], 0]}
+    audio_s, cpu_s, frames = 0.0, 0.0, 0
+    for name, spans in sorted(labels.items()):
+        path = os.path.join(fixtures, name)
+        samples, rate = read_wav(path)
+        if rate != SAMPLE_RATE:
+            raise ValueError(f"{name}: expected {SAMPLE_RATE} Hz audio")
+        data = float_to_pcm(samples)
+        audio_s += len(samples) / SAMPLE_RATE
+
+        # Classification throughput, chunk by chunk as in the capture pipeline
+        vad = VoiceActivityDetector(SAMPLE_RATE)
+        start = time.perf_counter()
+        for offset in range(0, len(samples), CHUNK):
+            frames += len(vad.process(samples[offset:offset + CHUNK]))
+        cpu_s += time.perf_counter() - start
+
+        for method, closed in (("vad", _run_endpointer(data)), ("energy_threshold", _run_energy_threshold(path))):
+            found, latencies, extra = _score(closed, spans)
+            total = totals[method]
+            total[0] += found
+            total[1] += len(spans)
+            total[2] += latencies
+            total[3] += extra
+
+    for method, (found, expected, latencies, extra) in totals.items():
+        results[method] = _summary(found, expected, latencies, extra)
+    results["vad"]["frames_per_second"] = frames / cpu_s
+    results["vad"]["real_time_factor"] = cpu_s / audio_s
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixtures", help="fixtures directory; a synthetic set is generated if omitted")
+    args = parser.parse_args()
+    if args.fixtures:
+        print(json.dumps(run(args.fixtures), indent=2))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            make_fixtures(tmp)
+            print(json.dumps(run(tmp), indent=2))
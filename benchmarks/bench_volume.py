@@ -0,0 +1,72 @@
+"""
+Counts the endpoint calls issued for a burst of volume commands (e.g. "volume
+up" said or sent several times in quick succession), and the largest single
+jump in level a listener would hear, for the old read-modify-write per
+command against the volume controller.
+
+    python benchmarks/bench_volume.py
+    python benchmarks/bench_volume.py --commands 10 --interval-ms 50 --call-ms 2 --max-step 0.05
+
+The endpoint is a stand-in for the pycaw interface that costs ``--call-ms``
+per call.
+"""
+import argparse
+import json
+import time
+
+import fixtures  # noqa: F401  (puts src on the path)
+from volume_control import RAMP_MAX_STEP, FakeVolumeEndpoint, VolumeController
+
+STEP = 0.1
+
+
+def _summary(endpoint, start_level, elapsed):
+    levels = [start_level] + endpoint.history
+    return {
+        "endpoint_calls": endpoint.calls,
+        "final_level": round(endpoint.level, 3),
+        "largest_jump": round(max(abs(b - a) for a, b in zip(levels, levels[1:])), 3),
+        "settled_ms": elapsed * 1000.0,
+    }
+
+
+def run_read_modify_write(commands, interval_ms, call_ms, start_level):
+    endpoint = FakeVolumeEndpoint(start_level, call_ms=call_ms)
+    start = time.perf_counter()
+    for i in range(commands):
+        if i:
+            time.sleep(interval_ms / 1000.0)
+        level = endpoint.GetMasterVolumeLevelScalar()
+        endpoint.SetMasterVolumeLevelScalar(min(1.0, level + STEP), None)
+    return _summary(endpoint, start_level, time.perf_counter() - start)
+
+
+def run_controller(commands, interval_ms, call_ms, start_level, max_step):
+    endpoint = FakeVolumeEndpoint(start_level, call_ms=call_ms)
+    volume = VolumeController(endpoint, max_step=max_step)
+    start = time.perf_counter()
+    for i in range(commands):
+        if i:
+            time.sleep(interval_ms / 1000.0)
+        volume.step(STEP)
+    volume.wait()
+    return _summary(endpoint, start_level, time.perf_counter() - start)
+
+
+def run(commands=5, interval_ms=30.0, call_ms=1.0, start_level=0.2, max_step=RAMP_MAX_STEP):
+    return {
+        "commands": commands,
+        "read_modify_write": run_read_modify_write(commands, interval_ms, call_ms, start_level),
+        "controller": run_controller(commands, interval_ms, call_ms, start_level, max_step),
+        "controller_without_ramp": run_controller(commands, interval_ms, call_ms, start_level, 1.0),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commands", type=int, default=5)
+    parser.add_argument("--interval-ms", type=float, default=30.0, help="time between commands of the burst")
+    parser.add_argument("--call-ms", type=float, default=1.0, help="modelled cost of one endpoint call")
+    parser.add_argument("--max-step", type=float, default=RAMP_MAX_STEP, help="largest change of level per ramp step")
+    args = parser.parse_args()
+    print(json.dumps(run(args.commands, args.interval_ms, args.call_ms, max_step=args.max_step), indent=2))
@@ -0,0 +1,119 @@
+"""
+Evaluates the local wake-word gate on WAV fixtures and reports detection
+rate, false accepts and detection latency.
+
+    python benchmarks/bench_wake_word.py
+    python benchmarks/bench_wake_word.py --fixtures path/to/fixtures
+
+A fixtures directory holds ``templates/*.wav`` (enrollment recordings),
+``positive/*.wav`` with a ``positive/labels.json`` mapping each file to the
+time (seconds) the wake word ends, and ``negative/*.wav`` without the wake
+word. Without ``--fixtures``, a synthetic set is generated.
+"""
+import argparse
+import glob
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from fixtures import WAKE_WORD_VOWELS, noise, random_vowels, synth_speech
+from audio_features import read_wav, resample, write_wav
+from wake_word import WakeWordDetector
+
+SAMPLE_RATE = 16000
+CHUNK = 1024
+
+
+def make_fixtures(root, positives=20, negatives=20, seed=0):
+    """Writes a synthetic fixtures directory (see module docstring)."""
+    rng = np.random.default_rng(seed)
+    for name in ("templates", "positive", "negative"):
+        os.makedirs(os.path.join(root, name), exist_ok=True)
+    for i, (stretch, f0) in enumerate([(1.0, 130.0), (0.9, 140.0), (1.1, 120.0)]):
+        write_wav(os.path.join(root, "templates", f"{i}.wav"),
+                  synth_speech(WAKE_WORD_VOWELS, SAMPLE_RATE, rng, stretch=stretch, f0=f0), SAMPLE_RATE)
+
+    labels = {}
+    for i in range(positives):
+        lead = noise(rng.uniform(0.5, 1.5), rng=rng)
+        wake = synth_speech(WAKE_WORD_VOWELS, SAMPLE_RATE, rng, stretch=rng.uniform(0.85, 1.15), f0=rng.uniform(110, 160))
+        command = synth_speech(random_vowels(6, rng), SAMPLE_RATE, rng)
+        signal = np.concatenate([lead, wake, noise(0.2, rng=rng), command, noise(1.0, rng=rng)])
+        signal += noise(len(signal) / SAMPLE_RATE, rng=rng)
+        write_wav(os.path.join(root, "positive", f"{i}.wav"), signal, SAMPLE_RATE)
+        labels[f"{i}.wav"] = (len(lead) + len(wake)) / SAMPLE_RATE
+    with open(os.path.join(root, "positive", "labels.json"), "w") as f:
+        json.dump(labels, f)
+
+    for i in range(negatives):
+        pieces = []
+        for _ in range(4):
+            pieces.append(synth_speech(random_vowels(int(rng.integers(3, 9)), rng, WAKE_WORD_VOWELS),
+                                       SAMPLE_RATE, rng, f0=rng.uniform(110, 160)))
+            pieces.append(noise(rng.uniform(0.2, 0.8), rng=rng))
+        signal = np.concatenate(pieces)
+        write_wav(os.path.join(root, "negative", f"{i}.wav"), signal + noise(len(signal) / SAMPLE_RATE, rng=rng), SAMPLE_RATE)
+
+
+def _stream(detector, path):
+    """Feeds a WAV file chunk by chunk. Returns (detection times, audio seconds, cpu seconds)."""
+    samples, rate = read_wav(path)
+    samples = resample(samples, rate, SAMPLE_RATE)
+    detector.reset()
+    hits = []
+    start = time.perf_counter()
+    for offset in range(0, len(samples), CHUNK):
+        if detector.process(samples[offset:offset + CHUNK]):
+            hits.append(min(offset + CHUNK, len(samples)) / SAMPLE_RATE)
+    return hits, len(samples) / SAMPLE_RATE, time.perf_counter() - start
+
+
+def run(fixtures):
+    templates = sorted(glob.glob(os.path.join(fixtures, "templates", "*.wav")))
+    detector = WakeWordDetector.from_wav_files(templates, SAMPLE_RATE)
+    with open(os.path.join(fixtures, "positive", "labels.json")) as f:
+        labels = json.load(f)
+
+    detected, latencies, audio_s, cpu_s = 0, [], 0.0, 0.0
+    for name, end in sorted(labels.items()):
+        hits, seconds, cpu = _stream(detector, os.path.join(fixtures, "positive", name))
+        audio_s, cpu_s = audio_s + seconds, cpu_s + cpu
+        # A detection counts if it fires within a second of the wake word ending
+        matches = [hit - end for hit in hits if -0.5 <= hit - end <= 1.0]
+        if matches:
+            detected += 1
+            latencies.append(matches[0] * 1000.0)
+
+    false_accepts, negative_s = 0, 0.0
+    for path in sorted(glob.glob(os.path.join(fixtures, "negative", "*.wav"))):
+        hits, seconds, cpu = _stream(detector, path)
+        false_accepts += len(hits)
+        negative_s += seconds
+        audio_s, cpu_s = audio_s + seconds, cpu_s + cpu
+
+    return {
+        "threshold": detector.threshold,
+        "positives": len(labels),
+        "detection_rate": detected / len(labels) if labels else None,
+        "latency_ms_mean": float(np.mean(latencies)) if latencies else None,
+        "latency_ms_p95": float(np.percentile(latencies, 95)) if latencies else None,
+        "negative_audio_s": negative_s,
+        "false_accepts": false_accepts,
+        "false_accepts_per_hour": false_accepts * 3600.0 / negative_s if negative_s else None,
+        "real_time_factor": cpu_s / audio_s,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fixtures", help="fixtures directory; a synthetic set is generated if omitted")
+    args = parser.parse_args()
+    if args.fixtures:
+        print(json.dumps(run(args.fixtures), indent=2))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            make_fixtures(tmp)
+            print(json.dumps(run(tmp), indent=2))
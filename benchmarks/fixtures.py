@@ -0,0 +1,162 @@
+"""Synthetic fixtures shared by the benchmark scripts."""
+import os
+import sys
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+VENDORS = ["Microsoft", "Adobe", "Google", "Mozilla", "JetBrains", "Autodesk", "Oracle", "VideoLAN"]
+WORDS = [
+    "studio", "office", "player", "editor", "manager", "viewer", "tools", "center",
+    "design", "cloud", "music", "photo", "video", "notes", "mail", "chat",
+]
+
+
+def synthetic_app_names(count):
+    """Returns ``count`` distinct, realistic-looking application names."""
+    names = []
+    for i in range(count):
+        vendor = VENDORS[i % len(VENDORS)]
+        first = WORDS[(i // len(VENDORS)) % len(WORDS)]
+        second = WORDS[(i // (len(VENDORS) * len(WORDS))) % len(WORDS)]
+        names.append(f"{vendor} {first} {second} {i}")
+    return names
+
+
+def make_start_menu_tree(root, file_count, files_per_dir=50, dirs_per_level=8):
+    """
+    Builds a synthetic Start Menu tree under ``root`` with ``file_count`` shortcuts
+    spread over nested vendor folders. Returns the list of search roots created.
+    """
+    roots = [os.path.join(root, "Desktop"), os.path.join(root, "Start Menu", "Programs")]
+    for path in roots:
+        os.makedirs(path, exist_ok=True)
+
+    names = synthetic_app_names(file_count)
+    for start in range(0, file_count, files_per_dir):
+        dir_index = start // files_per_dir
+        parts = [roots[dir_index % len(roots)]]
+        n = dir_index
+        while n:
+            parts.append(f"{VENDORS[n % len(VENDORS)]} {n % dirs_per_level}")
+            n //= dirs_per_level
+        directory = os.path.join(*parts)
+        os.makedirs(directory, exist_ok=True)
+        for name in names[start:start + files_per_dir]:
+            open(os.path.join(directory, name + ".lnk"), "w").close()
+    return roots
+
+
+# Formant pairs (F1, F2 in Hz) of a few vowels, used to synthesize speech-like audio
+VOWELS = {
+    "a": (730, 1090), "e": (530, 1840), "i": (270, 2290), "o": (570, 840),
+    "u": (300, 870), "ae": (660, 1720), "er": (490, 1350),
+}
+# The synthetic stand-in for "hey windows": a fixed vowel sequence
+WAKE_WORD_VOWELS = ["e", "i", "i", "o", "o"]
+
+
+def synth_speech(vowels, sample_rate=16000, rng=None, syllable_ms=110, f0=130.0, stretch=1.0):
+    """
+    Synthesizes a speech-like signal: a glottal harmonic source shaped by the
+    formants of each vowel, with smooth syllable envelopes.
+    """
+    import numpy as np
+    rng = rng or np.random.default_rng(0)
+    pieces = []
+    for vowel in vowels:
+        f1, f2 = VOWELS[vowel]
+        length = int(sample_rate * syllable_ms * stretch / 1000)
+        t = np.arange(length) / sample_rate
+        jitter = f0 * (1.0 + 0.03 * rng.standard_normal())
+        signal = np.zeros(length)
+        for harmonic in range(1, int(4000 / jitter)):
+            freq = harmonic * jitter
+            gain = np.exp(-((freq - f1) / 120.0) ** 2) + 0.6 * np.exp(-((freq - f2) / 180.0) ** 2) + 0.02
+            signal += gain * np.sin(2 * np.pi * freq * t + rng.uniform(0, 2 * np.pi))
+        signal *= np.hanning(length)
+        pieces.append(signal)
+    speech = np.concatenate(pieces)
+    return (0.3 * speech / (np.abs(speech).max() + 1e-9)).astype(np.float32)
+
+
+def noise(duration_s, sample_rate=16000, level=0.003, rng=None):
+    import numpy as np
+    rng = rng or np.random.default_rng(0)
+    return (level * rng.standard_normal(int(duration_s * sample_rate))).astype(np.float32)
+
+
+def random_vowels(count, rng, exclude=None):
+    """Random vowel sequence for babble, never equal to ``exclude``."""
+    names = sorted(VOWELS)
+    while True:
+        sequence = [names[i] for i in rng.integers(0, len(names), count)]
+        if sequence != exclude:
+            return sequence
+
+
+class _FakeSpeechHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        with server.lock:
+            server.received.append(len(body))
+            fault = server.faults.pop(0) if server.faults else None
+        delay_ms = server.latency_ms + (fault if isinstance(fault, (int, float)) else 0)
+        if server.uplink_kbps:
+            delay_ms += len(body) * 8 / server.uplink_kbps
+        time.sleep(delay_ms / 1000.0)
+        if fault == "error":
+            self.send_error(500, "Injected failure")
+            return
+        result = {"result": [{"alternative": [{"transcript": server.transcript, "confidence": 0.95}],
+                              "final": True}], "result_index": 0}
+        data = ('{"result":[]}\n' + json.dumps(result) + "\n").encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except ConnectionError:
+            # The client gave up on the request, e.g. a hedged one that lost
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeSpeechServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the Google Web Speech API, for the benchmarks (point
+    GoogleBackend's endpoint at ``url``). Every request is answered
+    with ``transcript`` after ``latency_ms``, plus the upload time at
+    ``uplink_kbps`` when set. Entries of ``faults`` apply to the next
+    requests in turn: "error" answers HTTP 500, a number adds that many ms.
+    """
+
+    def __init__(self, transcript="hey windows open notepad", latency_ms=0.0, faults=(), uplink_kbps=None):
+        super().__init__(("127.0.0.1", 0), _FakeSpeechHandler)
+        self.transcript = transcript
+        self.latency_ms = latency_ms
+        self.faults = list(faults)
+        self.uplink_kbps = uplink_kbps
+        self.received = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/speech-api/v2/recognize"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,231 @@
+"""
+Runs the benchmark suite offline and saves the results as JSON, so runs from
+different versions can be compared.
+
+    python benchmarks/run.py
+    python benchmarks/run.py --profile full --only startup dispatch
+    python benchmarks/run.py --compare benchmarks/results/baseline.json
+
+Results go to ``benchmarks/results/<timestamp>-<commit>.json`` unless
+``--output`` is given. With ``--compare``, every metric that got worse than
+the baseline by more than ``--tolerance`` is listed and the exit status is 1.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import bench_app_discovery
+import bench_app_lookup
+import bench_app_memory
+import bench_backends
+import bench_dispatch
+import bench_gui_log
+import bench_latency
+import bench_pipeline
+import bench_preprocessing
+import bench_recognition_cache
+import bench_resilience
+import bench_service
+import bench_speculation
+import bench_startup
+import bench_vad
+import bench_volume
+import bench_wake_word
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+DEFAULT_TOLERANCE = 0.10
+# Metric names ending in these are better when lower; the second list, when higher.
+# Anything else (counts, settings) is reported but not judged.
+LOWER_IS_BETTER = ("_s", "_ms", "_us", "_ns", "_bytes", "calls", "false_accepts_per_hour",
+                   "wrong_hits", "real_time_factor")
+HIGHER_IS_BETTER = ("per_second", "speedup", "rate", "recall", "accuracy", "faster_than_real_time")
+
+
+def _with_fixtures(module, **options):
+    """Wraps a benchmark that reads a fixtures directory, generating a synthetic one."""
+    def run():
+        with tempfile.TemporaryDirectory() as tmp:
+            module.make_fixtures(tmp, **options)
+            return module.run(tmp)
+    return run
+
+
+# name -> {profile: callable}
+BENCHMARKS = {
+    "startup": {
+        "quick": lambda: bench_startup.run(files=5000, repeat=3),
+        "full": lambda: bench_startup.run(files=50000, repeat=5),
+    },
+    "discovery": {
+        "quick": lambda: bench_app_discovery.run(files=10000, repeat=2),
+        "full": lambda: bench_app_discovery.run(files=50000, repeat=3),
+    },
+    "lookup": {
+        "quick": lambda: bench_app_lookup.run(entries=20000, repeat=10),
+        "full": lambda: bench_app_lookup.run(entries=100000, repeat=20),
+    },
+    "app_memory": {
+        "quick": lambda: bench_app_memory.run(entries=(10000,), repeat=10),
+        "full": lambda: bench_app_memory.run(entries=(10000, 100000, 1000000), repeat=20),
+    },
+    "backends": {
+        "quick": _with_fixtures(bench_backends, count=4),
+        "full": _with_fixtures(bench_backends),
+    },
+    "dispatch": {
+        "quick": lambda: bench_dispatch.run(files=5000, repeat=200),
+        "full": lambda: bench_dispatch.run(files=50000, repeat=1000),
+    },
+    "gui_log": {
+        "quick": lambda: bench_gui_log.run(records=10000),
+        "full": lambda: bench_gui_log.run(records=50000),
+    },
+    "latency": {
+        "quick": lambda: bench_latency.run(spans=50000),
+        "full": lambda: bench_latency.run(spans=200000),
+    },
+    "pipeline": {
+        "quick": lambda: bench_pipeline.run(utterances=15),
+        "full": lambda: bench_pipeline.run(utterances=60),
+    },
+    "preprocessing": {
+        "quick": lambda: bench_preprocessing.run(utterances=4),
+        "full": lambda: bench_preprocessing.run(utterances=20),
+    },
+    "recognition_cache": {
+        "quick": lambda: bench_recognition_cache.run(utterances=150),
+        "full": lambda: bench_recognition_cache.run(utterances=600),
+    },
+    "resilience": {
+        "quick": lambda: bench_resilience.run(requests=20),
+        "full": lambda: bench_resilience.run(requests=100),
+    },
+    "service": {
+        "quick": lambda: bench_service.run(files=5000, clients=(1, 8), requests=200),
+        "full": lambda: bench_service.run(files=50000, clients=(1, 4, 16), requests=1000),
+    },
+    "speculation": {
+        "quick": lambda: bench_speculation.run(files=10000, utterances=4, speed=4.0),
+        "full": lambda: bench_speculation.run(files=50000, utterances=10, speed=1.0),
+    },
+    "vad": {
+        "quick": _with_fixtures(bench_vad, files=4),
+        "full": _with_fixtures(bench_vad),
+    },
+    "volume": {
+        "quick": lambda: bench_volume.run(commands=5),
+        "full": lambda: bench_volume.run(commands=10),
+    },
+    "wake_word": {
+        "quick": _with_fixtures(bench_wake_word, positives=8, negatives=8),
+        "full": _with_fixtures(bench_wake_word),
+    },
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names=None, profile="quick"):
+    """Runs the named benchmarks (default: all) and returns the results document."""
+    document = {
+        "metadata": {
+            "commit": _git_commit(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "profile": profile,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": {},
+    }
+    for name in names or BENCHMARKS:
+        print(f"Running {name}...", file=sys.stderr)
+        start = time.perf_counter()
+        document["results"][name] = BENCHMARKS[name][profile]()
+        print(f"  done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return document
+
+
+def flatten(results, prefix=""):
+    """Turns nested results into {"dispatch.execute.open_exact.mean_us": value} for the numbers."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def _direction(metric):
+    """1 when higher is better, -1 when lower is better, 0 when the metric isn't judged."""
+    leaf = metric.rsplit(".", 1)[-1]
+    if leaf.endswith(HIGHER_IS_BETTER):
+        return 1
+    if leaf.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare(baseline, current, tolerance=DEFAULT_TOLERANCE):
+    """Returns [(metric, baseline value, current value, relative change)] for the regressions."""
+    before = flatten(baseline["results"])
+    after = flatten(current["results"])
+    regressions = []
+    for metric, old in sorted(before.items()):
+        new = after.get(metric)
+        direction = _direction(metric)
+        if new is None or not direction:
+            continue
+        # From a baseline of zero (e.g. no wrong hits) any move the wrong way counts
+        change = (new - old) / abs(old) if old else float(new - old)
+        if change * direction < -tolerance:
+            regressions.append((metric, old, new, change))
+    return regressions
+
+
+def _default_output(document):
+    stamp = document["metadata"]["timestamp"].replace(":", "")
+    commit = document["metadata"]["commit"] or "unknown"
+    return os.path.join(RESULTS_DIR, f"{stamp}-{commit}.json")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profile", choices=("quick", "full"), default="quick")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--output", help="where to write the results")
+    parser.add_argument("--compare", help="results file to check for regressions against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="relative change allowed before a metric counts as a regression")
+    args = parser.parse_args()
+
+    document = run(args.only, args.profile)
+    output = args.output or _default_output(document)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, document, args.tolerance)
+        for metric, old, new, change in regressions:
+            print(f"REGRESSION {metric}: {old:.6g} -> {new:.6g} ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
@@ -0,0 +1,186 @@
+import os
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, ItemsView, ValuesView
+
+# Sorts after any character, to bound a prefix range
+_MAX_CHAR = "\U0010ffff"
+
+
+def _split(path):
+    """Splits a path after its last separator: the directory prefix and the file name."""
+    cut = max(path.rfind("/"), path.rfind("\\")) + 1
+    return path[:cut], path[cut:]
+
+
+class AppEntry:
+    """One application of an AppCatalog: its spoken name and where it is."""
+    __slots__ = ("name", "directory", "file_name")
+
+    def __init__(self, name, directory, file_name):
+        self.name = name
+        self.directory = directory
+        self.file_name = file_name
+
+    @property
+    def path(self):
+        return self.directory + self.file_name
+
+    def __repr__(self):
+        return f"AppEntry({self.name!r}, {self.path!r})"
+
+
+class _CatalogItems(ItemsView):
+    def __iter__(self):
+        catalog = self._mapping
+        for position in catalog._order:
+            yield catalog._names[position], catalog._path(position)
+
+
+class _CatalogValues(ValuesView):
+    def __iter__(self):
+        catalog = self._mapping
+        for position in catalog._order:
+            yield catalog._path(position)
+
+
+class AppCatalog(Mapping):
+    """
+    Read-only mapping of spoken app names to paths, compact enough for very
+    large catalogs. Names are kept in one sorted list (looked up by bisection,
+    which also answers prefix queries); each path is stored as a file name and
+    the index of its directory in a table holding every directory once.
+    Iteration follows the original (discovery) order, which is also the
+    tie-break order of the search index.
+    """
+
+    def __init__(self, apps=()):
+        """apps is a mapping or (name, path) pairs; for a repeated name, the first path is kept."""
+        pairs = apps.items() if isinstance(apps, Mapping) else apps
+        self._build((name,) + _split(path) for name, path in pairs)
+
+    @classmethod
+    def from_entries(cls, entries):
+        """
+        Builds a catalog from (name, directory, file_name) triples, with each
+        path os.path.join(directory, file_name). The first entry of a name wins.
+        """
+        catalog = cls.__new__(cls)
+        prefixes = {}
+
+        def split(entries):
+            for name, directory, file_name in entries:
+                prefix = prefixes.get(directory)
+                if prefix is None:
+                    prefix = prefixes[directory] = os.path.join(directory, "")
+                yield name, prefix, file_name
+        catalog._build(split(entries))
+        return catalog
+
+    def _build(self, entries):
+        names, directories, files = [], [], []
+        seen = set()
+        directory_ids = {}
+        for name, directory, file_name in entries:
+            if name in seen:
+                continue
+            seen.add(name)
+            names.append(name)
+            directories.append(directory_ids.setdefault(directory, len(directory_ids)))
+            files.append(file_name)
+        by_name = sorted(range(len(names)), key=names.__getitem__)
+        self._names = [names[i] for i in by_name]
+        self._files = [files[i] for i in by_name]
+        self._dir_ids = array("I", (directories[i] for i in by_name))
+        self._directories = list(directory_ids)
+        # Sorted position of each entry, in the original order
+        self._order = array("I", [0]) * len(names)
+        for position, i in enumerate(by_name):
+            self._order[i] = position
+
+    def _position(self, name):
+        position = bisect_left(self._names, name)
+        if position < len(self._names) and self._names[position] == name:
+            return position
+        return -1
+
+    def _path(self, position):
+        return self._directories[self._dir_ids[position]] + self._files[position]
+
+    def __getitem__(self, name):
+        position = self._position(name)
+        if position < 0:
+            raise KeyError(name)
+        return self._path(position)
+
+    def get(self, name, default=None):
+        # The lookup on every command, so inlined
+        names = self._names
+        position = bisect_left(names, name)
+        if position < len(names) and names[position] == name:
+            return self._directories[self._dir_ids[position]] + self._files[position]
+        return default
+
+    def __contains__(self, name):
+        return self._position(name) >= 0
+
+    def __len__(self):
+        return len(self._names)
+
+    def __iter__(self):
+        names = self._names
+        return (names[position] for position in self._order)
+
+    def items(self):
+        return _CatalogItems(self)
+
+    def values(self):
+        return _CatalogValues(self)
+
+    def __eq__(self, other):
+        if isinstance(other, AppCatalog):
+            if self._names != other._names or self._files != other._files:
+                return False
+            if self._dir_ids == other._dir_ids and self._directories == other._directories:
+                return True
+            return all(self._path(i) == other._path(i) for i in range(len(self._names)))
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"<AppCatalog: {len(self)} apps in {len(self._directories)} directories>"
+
+    @property
+    def directory_count(self):
+        return len(self._directories)
+
+    def entry(self, name):
+        """Returns the AppEntry of name, or None."""
+        position = self._position(name)
+        if position < 0:
+            return None
+        return AppEntry(name, self._directories[self._dir_ids[position]], self._files[position])
+
+    def prefixed(self, prefix):
+        """Returns the AppEntries whose names start with prefix, in name order."""
+        start = bisect_left(self._names, prefix)
+        end = bisect_left(self._names, prefix + _MAX_CHAR, start)
+        return [AppEntry(self._names[i], self._directories[self._dir_ids[i]], self._files[i])
+                for i in range(start, end)]
+
+    def has_path(self, path):
+        """Whether path belongs to an app of the catalog."""
+        directory, file_name = _split(path)
+        # A discovered app is named after its file, so try that name first
+        position = self._position(os.path.splitext(file_name)[0].lower())
+        if position >= 0 and self._path(position) == path:
+            return True
+        position = -1
+        while True:
+            try:
+                position = self._files.index(file_name, position + 1)
+            except ValueError:
+                return False
+            if self._directories[self._dir_ids[position]] == directory:
+                return True
@@ -1,14 +1,137 @@
 import os
 import sys
+import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app_catalog import AppCatalog
+from app_search import AppSearchIndex
+from shortcuts import resolve_shortcut
+
+APP_EXTENSIONS = (".exe", ".lnk")
+INDEX_VERSION = 1
+# Minimum score for a fuzzy match to be returned by find_app
+MATCH_THRESHOLD = 0.5
+# Directory scans are I/O bound, so use more threads than cores
+DEFAULT_MAX_WORKERS = 8
+# How long a lookup waits for background discovery before using a partial index
+DEFAULT_WAIT_TIMEOUT = 3.0
+# Fuzzy matches considered when ranking by usage, and how much usage can add
+# to a match score (a frequently launched app gains up to this much)
+RANK_POOL = 5
+USAGE_WEIGHT = 0.2
+# Most used applications whose spoken names are resolved ahead of time
+PREWARM_COUNT = 20
+
+
+def default_history_path():
+    """Returns the location of the launch history, next to the app index."""
+    return os.path.join(os.path.dirname(default_index_path()), "usage_history.json")
+
+
+def default_index_path():
+    """Returns the location of the persistent app index in the user's cache directory."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "VoiceControl", "app_index.json")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "voice-control", "app_index.json")
+
 
 class AppFinder:
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, index_path=None, search_paths=None, max_workers=DEFAULT_MAX_WORKERS,
+                 background=False, rescan_interval=None, wait_timeout=DEFAULT_WAIT_TIMEOUT, history=None):
         self.logger = logger or logging.getLogger(__name__)
-        self.app_map = self._discover_apps()
+        # UsageHistory of launches; ranks fuzzy matches and picks what to prewarm
+        self.history = history
+        # Spoken name -> path for the most used apps, checked before any search
+        self._hot = {}
+        self.index_path = index_path
+        self.search_paths = search_paths
+        self.max_workers = max_workers
+        self.rescan_interval = rescan_interval
+        self.wait_timeout = wait_timeout
+        self.ready = threading.Event()
+        self._stop_event = threading.Event()
+        self._refresh_lock = threading.Lock()
+        self._listeners = []
+
+        if background:
+            self.app_map = {}
+            self._discovery_thread = threading.Thread(target=self._run_discovery, daemon=True)
+            self._discovery_thread.start()
+        else:
+            self.app_map = self._discover_apps()
+            self.prewarm()
+            self.ready.set()
+
+    @property
+    def app_map(self):
+        return self._snapshot[0]
+
+    @app_map.setter
+    def app_map(self, app_map):
+        # The map and its fuzzy lookup index are swapped in together, so
+        # concurrent lookups always see a consistent pair
+        if not isinstance(app_map, AppCatalog):
+            app_map = AppCatalog(app_map)
+        self._snapshot = (app_map, AppSearchIndex(app_map))
+
+    def add_listener(self, callback):
+        """Registers callback(app_map), called whenever a new app map is swapped in."""
+        self._listeners.append(callback)
+
+    def _publish(self, app_map):
+        """Swaps in a new app map and notifies the listeners."""
+        self.app_map = app_map
+        self.prewarm()
+        for callback in list(self._listeners):
+            try:
+                callback(app_map)
+            except Exception as e:
+                self.logger.error(f"App index listener failed: {e}")
+
+    def _run_discovery(self):
+        """Background discovery: serve the cached index first, then the full scan, then rescans."""
+        cached_map = self._build_app_map(self._get_search_paths(), self._load_index())
+        if cached_map and not self.ready.is_set():
+            self._publish(cached_map)
+            self.logger.info(f"Loaded {len(cached_map)} applications from the app index.")
+
+        try:
+            self.refresh()
+        finally:
+            self.ready.set()
+
+        while self.rescan_interval and not self._stop_event.wait(self.rescan_interval):
+            self.refresh()
+
+    def refresh(self):
+        """
+        Rescans the search paths (only changed directories are listed again) and
+        swaps in the new app map if anything changed. Returns True if it did.
+        """
+        with self._refresh_lock:
+            try:
+                app_map = self._discover_apps()
+            except Exception as e:
+                self.logger.error(f"Application discovery failed: {e}")
+                return False
+            if app_map == self.app_map:
+                return False
+            self._publish(app_map)
+            self.logger.info(f"Application index updated: {len(app_map)} applications.")
+            return True
+
+    def stop(self):
+        """Stops periodic rescanning."""
+        self._stop_event.set()
 
     def _get_search_paths(self):
         """Returns a list of common application directories for Windows."""
+        if self.search_paths is not None:
+            return [path for path in self.search_paths if os.path.isdir(path)]
+
         if sys.platform != "win32":
             return []
 
@@ -28,29 +151,158 @@ class AppFinder:
         return [path for path in paths if path and os.path.isdir(path)]
 
     def _discover_apps(self):
-        """Scans the search paths for .exe and .lnk files and builds the app map."""
+        """
+        Scans the search paths for .exe and .lnk files and builds the app map.
+        Directories are scanned concurrently on a thread pool; directories whose
+        modification time matches the persistent index are not listed again.
+        """
         self.logger.info("Discovering installed applications...")
-        app_map = {}
         search_paths = self._get_search_paths()
 
         if not search_paths:
             self.logger.warning("Could not find standard application directories. (Not on Windows?)")
-            return app_map
+            return AppCatalog()
+
+        cached_dirs = self._load_index()
+        dirs = {}
+        rescanned = 0
+
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as pool:
+            futures = {}
+            lock = threading.Lock()
 
+            def submit(path):
+                with lock:
+                    future = futures.get(path)
+                    if future is not None:
+                        return future
+                    future = futures[path] = pool.submit(self._scan_directory, path, cached_dirs.get(path))
+                # May run the callback right away, so it must not hold the lock
+                future.add_done_callback(lambda f: submit_children(path, f))
+                return future
+
+            def submit_children(path, future):
+                # Fan out as soon as a directory is listed, ahead of the loop below
+                entry, _ = future.result()
+                if entry is not None:
+                    for name in entry[1]:
+                        submit(os.path.join(path, name))
+
+            for path in search_paths:
+                submit(path)
+
+            # Wait for every directory reachable from the search paths
+            for path in search_paths:
+                stack = [path]
+                while stack:
+                    root = stack.pop()
+                    if root in dirs:
+                        continue
+                    entry, changed = submit(root).result()
+                    if entry is None:
+                        continue
+                    dirs[root] = entry
+                    rescanned += changed
+                    stack.extend(os.path.join(root, name) for name in entry[1])
+
+        app_map = self._build_app_map(search_paths, dirs)
+
+        if rescanned or dirs.keys() != cached_dirs.keys():
+            self._save_index(dirs)
+
+        self.logger.info(
+            f"Discovered {len(app_map)} applications "
+            f"({rescanned} of {len(dirs)} directories rescanned)."
+        )
+        return app_map
+
+    def _build_app_map(self, search_paths, dirs):
+        """
+        Builds the app map from per-directory entries, merging depth-first and
+        top-down in the same order as os.walk so the first found app keeps
+        taking precedence.
+        """
+        return AppCatalog.from_entries(self._walk_entries(search_paths, dirs))
+
+    def _walk_entries(self, search_paths, dirs):
+        """Yields (app name, directory, file name) for every app file, in os.walk order."""
+        visited = set()
         for path in search_paths:
-            for root, _, files in os.walk(path):
+            stack = [path]
+            while stack:
+                root = stack.pop()
+                entry = dirs.get(root)
+                if entry is None or root in visited:
+                    continue
+                visited.add(root)
+                _, subdirs, files = entry
+
                 for file in files:
-                    if file.lower().endswith((".exe", ".lnk")):
-                        # Normalize the name for voice commands
-                        app_name = os.path.splitext(file)[0].lower()
-                        full_path = os.path.join(root, file)
-                        
-                        # Add to map if not already present (first found takes precedence)
-                        if app_name not in app_map:
-                            app_map[app_name] = full_path
-        
-        self.logger.info(f"Discovered {len(app_map)} applications.")
-        return app_map
+                    # Normalize the name for voice commands; the catalog keeps
+                    # the first file found with each name
+                    yield os.path.splitext(file)[0].lower(), root, file
+
+                stack.extend(os.path.join(root, name) for name in reversed(subdirs))
+
+    def _scan_directory(self, path, cached_entry):
+        """
+        Returns a (mtime, subdirs, files) entry for a directory and whether it had
+        to be listed. The cached entry is reused when the directory is unchanged.
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None, False
+
+        if cached_entry and cached_entry[0] == mtime:
+            return cached_entry, False
+
+        subdirs, files = [], []
+        try:
+            with os.scandir(path) as entries:
+                for item in entries:
+                    try:
+                        is_dir = item.is_dir()
+                    except OSError:
+                        continue
+                    if is_dir:
+                        # Like os.walk, do not descend into symlinked directories
+                        if not item.is_symlink():
+                            subdirs.append(item.name)
+                    elif item.name.lower().endswith(APP_EXTENSIONS):
+                        files.append(item.name)
+        except OSError as e:
+            self.logger.debug(f"Skipping unreadable directory '{path}': {e}")
+            return None, False
+
+        return [mtime, subdirs, files], True
+
+    def _load_index(self):
+        """Loads the per-directory entries from the persistent index, if any."""
+        if not self.index_path or not os.path.isfile(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable app index '{self.index_path}': {e}")
+            return {}
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            return {}
+        return data.get("dirs", {})
+
+    def _save_index(self, dirs):
+        """Writes the per-directory entries to the persistent index atomically."""
+        if not self.index_path:
+            return
+        tmp_path = self.index_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "dirs": dirs}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            self.logger.warning(f"Could not save app index '{self.index_path}': {e}")
 
     def find_app(self, spoken_name):
         """
@@ -58,21 +310,84 @@ class AppFinder:
         Returns the full path or None if not found.
         """
         spoken_name = spoken_name.lower()
-        
-        # First, check for an exact match
-        if spoken_name in self.app_map:
-            return self.app_map[spoken_name]
-            
-        # If no exact match, check if any discovered app name contains the spoken name
-        for app_name, path in self.app_map.items():
-            if spoken_name in app_name:
-                return path
-        
-        return None
+
+        # First, check for an exact match, then the names of the most used apps
+        app_path = self.app_map.get(spoken_name)
+        if app_path is not None:
+            return app_path
+        if spoken_name in self._hot:
+            return self._hot[spoken_name]
+
+        # While discovery is still running, briefly wait for the full index
+        # rather than fuzzy matching against a partial one
+        if not self.ready.is_set() and self.ready.wait(self.wait_timeout):
+            app_path = self.app_map.get(spoken_name)
+            if app_path is not None:
+                return app_path
+
+        return self._rank(spoken_name)
+
+    def _rank(self, spoken_name):
+        """
+        The best ranked fuzzy match, if it is good enough; among close
+        matches, the ones launched often and recently win.
+        """
+        if self.history is None or not len(self.history):
+            candidates = self.find_app_candidates(spoken_name, k=1)
+        else:
+            candidates = self.find_app_candidates(spoken_name, k=RANK_POOL)
+        candidates = [candidate for candidate in candidates if candidate[2] >= MATCH_THRESHOLD]
+        if not candidates:
+            return None
+        if len(candidates) > 1:
+            now = self.history.clock()
+            candidates.sort(key=lambda c: c[2] + USAGE_WEIGHT * self.history.affinity(c[1], now), reverse=True)
+        return candidates[0][1]
+
+    def record_launch(self, spoken_name, path):
+        """Adds a launch to the usage history, which ranks matches and picks the apps to prewarm."""
+        if self.history is None:
+            return
+        self.history.record(path, spoken_name.lower())
+
+    def prewarm(self):
+        """
+        Maps the spoken names of the most used apps to their paths, after
+        checking the paths (and a shortcut's target) still exist, so lookups
+        for them are a single dictionary hit. A name is only mapped to the
+        app the ranking picks for it, so one launch of a wrong match doesn't
+        pin it. Runs on discovery.
+        """
+        if self.history is None:
+            return
+        app_map = self.app_map
+        hot = {}
+        for path, aliases in self.history.top(PREWARM_COUNT):
+            if not app_map.has_path(path) or not os.path.exists(path):
+                continue
+            if path.lower().endswith(".lnk"):
+                target = resolve_shortcut(path)
+                if target and not os.path.exists(target):
+                    self.logger.info(f"Shortcut '{path}' points to a missing target '{target}'.")
+                    continue
+            for alias in aliases:
+                if alias not in hot and alias not in app_map and self._rank(alias) == path:
+                    hot[alias] = path
+        self._hot = hot
+
+    def find_app_candidates(self, spoken_name, k=5):
+        """
+        Returns up to k (app_name, path, score) tuples for a spoken name, best first.
+        """
+        app_map, search_index = self._snapshot
+        return [
+            (app_name, app_map[app_name], score)
+            for app_name, score in search_index.search(spoken_name, k)
+        ]
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
-    finder = AppFinder()
+    finder = AppFinder(index_path=default_index_path())
     print("Discovered Applications:")
     for name, path in finder.app_map.items():
         print(f"  - {name}: {path}")
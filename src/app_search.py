@@ -0,0 +1,243 @@
+import re
+import heapq
+from collections import Counter
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_SOUNDEX_CODES = str.maketrans("bfpvcgjkqsxzdtlmnr", "111122222222334556")
+
+# Vocabulary trigrams shared by more tokens than this are only counted when
+# no rarer trigram of the spoken token produced a candidate.
+MAX_POSTING_SIZE = 2000
+# Number of vocabulary tokens (by shared trigram count) scored per spoken token.
+TOKEN_POOL = 32
+# Number of candidate names (shortest first) per tier that get the final scoring.
+NAME_POOL = 32
+# Longest run of leading initials indexed as an acronym.
+MAX_ACRONYM_LENGTH = 4
+
+
+def normalize(text):
+    """Lowercases text and collapses punctuation and whitespace to single spaces."""
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def soundex(token):
+    """Returns the Soundex code of a token, e.g. 'robert' -> 'r163'."""
+    if not token:
+        return ""
+    codes = token.translate(_SOUNDEX_CODES)
+    key = token[0]
+    previous = codes[0]
+    for char, code in zip(token[1:], codes[1:]):
+        if code.isdigit() and code != previous:
+            key += code
+        if char not in "hw":
+            previous = code
+    return (key + "000")[:4]
+
+
+def trigrams(token):
+    """Returns the set of boundary-padded trigrams of a token."""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance between a and b, or limit + 1 once it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def token_similarity(spoken, token):
+    """Scores how well a vocabulary token matches a spoken token, in [0, 1]."""
+    if token == spoken:
+        return 1.0
+    if token.startswith(spoken):
+        return 0.9
+    if spoken in token:
+        return 0.8
+    if len(spoken) > 3:
+        limit = len(spoken) // 4
+        distance = edit_distance(spoken, token, limit)
+        if distance <= limit:
+            return 1.0 - distance / max(len(spoken), len(token))
+    return 0.0
+
+
+def _acronyms(tokens):
+    """Returns the initials of the leading runs of tokens, e.g. 'vs' and 'vsc'."""
+    acronyms = []
+    initials = tokens[0][0] if tokens else ""
+    for token in tokens[1:MAX_ACRONYM_LENGTH]:
+        initials += token[0]
+        acronyms.append(initials)
+    return acronyms
+
+
+def _union(sets):
+    """Unions posting sets, avoiding a copy when there is only one."""
+    if len(sets) == 1:
+        return sets[0]
+    return set().union(*sets)
+
+
+def _greedy_intersection(sets):
+    """
+    Intersects sets smallest first, skipping any set that would empty the
+    result, so names covering most spoken tokens survive a partial match.
+    """
+    result = None
+    for candidates in sorted((s for s in sets if s), key=len):
+        if result is None:
+            result = candidates
+        else:
+            narrowed = result & candidates
+            if narrowed:
+                result = narrowed
+    return result
+
+
+class AppSearchIndex:
+    """
+    Two-level inverted index over application names with ranked fuzzy scoring.
+
+    Spoken tokens are first matched against the (much smaller) token vocabulary
+    through a trigram index, by edit distance and by Soundex key; the posting
+    sets of the matched tokens then give the candidate names, which are scored
+    by token coverage, compactness and substring containment.
+    """
+
+    def __init__(self, names):
+        # Internal ids are ordered by (name length, discovery order), so the
+        # smallest ids of any candidate set are also its best tie-breakers.
+        names = list(names)
+        order = sorted(range(len(names)), key=lambda i: (len(names[i]), i))
+        self.names = [names[i] for i in order]
+        self._normalized = []
+        self._tokens = []
+        self._postings = {}
+        self._acronyms = {}
+        for index, name in enumerate(self.names):
+            tokens = normalize(name).split()
+            self._normalized.append(" ".join(tokens))
+            self._tokens.append(tokens)
+            for token in tokens:
+                self._postings.setdefault(token, set()).add(index)
+            for acronym in _acronyms(tokens):
+                self._acronyms.setdefault(acronym, set()).add(index)
+
+        self._vocab_grams = {}
+        self._phonetic = {}
+        for token in self._postings:
+            for gram in trigrams(token):
+                self._vocab_grams.setdefault(gram, []).append(token)
+            self._phonetic.setdefault(soundex(token), []).append(token)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _match_token(self, spoken):
+        """Returns {vocabulary token: similarity} for a spoken token."""
+        counts = Counter()
+        postings = sorted(
+            (self._vocab_grams[gram] for gram in trigrams(spoken) if gram in self._vocab_grams),
+            key=len,
+        )
+        for posting in postings:
+            if len(posting) > MAX_POSTING_SIZE and counts:
+                break
+            counts.update(posting)
+
+        matches = {}
+        if spoken in self._postings:
+            matches[spoken] = 1.0
+        for token, _ in counts.most_common(TOKEN_POOL):
+            score = token_similarity(spoken, token)
+            if score > 0:
+                matches[token] = max(score, matches.get(token, 0.0))
+        for token in self._phonetic.get(soundex(spoken), ()):
+            if matches.get(token, 0.0) < 0.7:
+                matches[token] = 0.7
+        return matches
+
+    def search(self, query, k=5, min_score=0.0):
+        """
+        Returns up to k (name, score) pairs for the query, best first. Scores are
+        in [0, 1]; an exact (normalized) match scores 1.0. Every spoken token
+        must match a token of the name, so "microsoft teams" doesn't return
+        "microsoft word".
+        """
+        query = normalize(query)
+        spoken_tokens = query.split()
+        if not spoken_tokens:
+            return []
+
+        token_matches = []
+        best_sets = []
+        all_sets = []
+        widened = False
+        for spoken in spoken_tokens:
+            matches = self._match_token(spoken)
+            acronym_ids = self._acronyms.get(spoken, set())
+            top = max(matches.values(), default=0.0)
+            if acronym_ids and top < 0.9:
+                top = 0.9
+            best = [self._postings[token] for token, score in matches.items() if score == top]
+            if top == 0.9 and acronym_ids:
+                best.append(acronym_ids)
+            rest = [self._postings[token] for token, score in matches.items() if score != top]
+            if top != 0.9 and acronym_ids:
+                rest.append(acronym_ids)
+            token_matches.append(matches)
+            best_sets.append(_union(best))
+            all_sets.append(_union(best + rest) if rest else best_sets[-1])
+            widened = widened or bool(rest)
+
+        # Score the shortest names covering the spoken tokens with their best
+        # match, plus the shortest names covering them with any match.
+        pool = set()
+        for sets in ((best_sets, all_sets) if widened else (best_sets,)):
+            candidates = _greedy_intersection(sets)
+            if candidates:
+                pool.update(heapq.nsmallest(NAME_POOL, candidates))
+        if not pool:
+            return []
+
+        results = []
+        for index in pool:
+            name = self._normalized[index]
+            if name == query:
+                score = 1.0
+            else:
+                tokens = self._tokens[index]
+                bests = []
+                for spoken, matches in zip(spoken_tokens, token_matches):
+                    best = max((matches.get(token, 0.0) for token in tokens), default=0.0)
+                    if best < 0.9 and index in self._acronyms.get(spoken, ()):
+                        best = max(best, 0.9)
+                    bests.append(best)
+                if not min(bests):
+                    # A spoken word the name doesn't contain: it names another app
+                    continue
+                coverage = sum(bests) / len(spoken_tokens)
+                compactness = min(1.0, len(query) / len(name))
+                containment = 1.0 if query in name else 0.0
+                score = min(0.99, 0.6 * coverage + 0.25 * compactness + 0.15 * containment)
+            if score >= min_score:
+                # Ties prefer shorter names, then the earlier (first discovered) entry
+                results.append((-score, index))
+
+        return [(self.names[index], -neg_score) for neg_score, index in heapq.nsmallest(k, results)]
@@ -0,0 +1,152 @@
+import wave
+import numpy as np
+
+FRAME_MS = 25
+HOP_MS = 10
+N_MELS = 26
+N_MFCC = 13
+# Half length (in taps) of the low-pass filter applied before downsampling
+RESAMPLE_HALF_TAPS = 32
+# Low-pass cutoff as a fraction of the new Nyquist frequency
+RESAMPLE_CUTOFF = 0.9
+
+_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+
+def pcm_to_float(data, sample_width=2, channels=1):
+    """Converts raw little-endian PCM bytes to mono float32 samples in [-1, 1]."""
+    samples = np.frombuffer(data, dtype=_DTYPES[sample_width]).astype(np.float32)
+    if sample_width == 1:
+        samples -= 128.0
+    samples /= float(2 ** (8 * sample_width - 1))
+    if channels > 1:
+        samples = samples[: len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def float_to_pcm(samples, sample_width=2):
+    """Converts float samples in [-1, 1] back to raw little-endian PCM bytes."""
+    scale = float(2 ** (8 * sample_width - 1))
+    clipped = np.clip(samples, -1.0, 1.0 - 1.0 / scale) * scale
+    if sample_width == 1:
+        clipped += 128.0
+    return clipped.astype(_DTYPES[sample_width]).tobytes()
+
+
+def read_wav(path):
+    """Reads a PCM WAV file. Returns (mono float samples, sample_rate)."""
+    with wave.open(path, "rb") as wav:
+        data = wav.readframes(wav.getnframes())
+        return pcm_to_float(data, wav.getsampwidth(), wav.getnchannels()), wav.getframerate()
+
+
+def write_wav(path, samples, sample_rate, sample_width=2):
+    """Writes mono float samples to a PCM WAV file."""
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(sample_rate)
+        wav.writeframes(float_to_pcm(samples, sample_width))
+
+
+def frame_signal(samples, frame_length, hop_length):
+    """Returns a (frames, frame_length) strided view of the signal; trailing samples are dropped."""
+    if len(samples) < frame_length:
+        return np.empty((0, frame_length), dtype=samples.dtype)
+    count = 1 + (len(samples) - frame_length) // hop_length
+    return np.lib.stride_tricks.as_strided(
+        samples,
+        shape=(count, frame_length),
+        strides=(samples.strides[0] * hop_length, samples.strides[0]),
+        writeable=False,
+    )
+
+
+def _hz_to_mel(hz):
+    return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+
+def _mel_to_hz(mel):
+    return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+
+def mel_filterbank(sample_rate, n_fft, n_mels=N_MELS, max_hz=8000.0):
+    """Returns an (n_mels, n_fft // 2 + 1) triangular mel filterbank matrix."""
+    max_hz = min(max_hz, sample_rate / 2.0)
+    mel_points = np.linspace(_hz_to_mel(0.0), _hz_to_mel(max_hz), n_mels + 2)
+    bins = np.floor((n_fft + 1) * _mel_to_hz(mel_points) / sample_rate).astype(int)
+    filters = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            filters[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            filters[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return filters
+
+
+def _dct_matrix(n_mels, n_mfcc):
+    n = np.arange(n_mels)
+    k = np.arange(n_mfcc)[:, None]
+    return (np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)) * np.sqrt(2.0 / n_mels)).astype(np.float32)
+
+
+class MfccExtractor:
+    """
+    Computes MFCC frames for a fixed sample rate. Use ``extract`` for whole
+    signals, or ``push`` to feed audio incrementally and get the feature
+    frames completed by each chunk.
+    """
+
+    def __init__(self, sample_rate, frame_ms=FRAME_MS, hop_ms=HOP_MS, n_mels=N_MELS, n_mfcc=N_MFCC):
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.hop_length = int(sample_rate * hop_ms / 1000)
+        self.n_fft = 1 << (self.frame_length - 1).bit_length()
+        self._window = np.hamming(self.frame_length).astype(np.float32)
+        self._filters = mel_filterbank(sample_rate, self.n_fft, n_mels)
+        self._dct = _dct_matrix(n_mels, n_mfcc)
+        self._pending = np.empty(0, dtype=np.float32)
+
+    def frame_energy(self, frames):
+        """Log energy (dB) of each frame."""
+        return 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+
+    def features(self, frames):
+        """MFCCs (frames, n_mfcc) and log energies (frames,) for already framed samples."""
+        spectrum = np.abs(np.fft.rfft(frames * self._window, n=self.n_fft)) ** 2
+        mel = np.log(spectrum @ self._filters.T + 1e-10)
+        return mel @ self._dct.T, self.frame_energy(frames)
+
+    def extract(self, samples):
+        """MFCCs and log energies for a whole signal."""
+        return self.features(frame_signal(np.asarray(samples, dtype=np.float32), self.frame_length, self.hop_length))
+
+    def push(self, samples):
+        """Appends samples and returns the MFCCs and log energies of the newly completed frames."""
+        self._pending = np.concatenate((self._pending, samples))
+        frames = frame_signal(self._pending, self.frame_length, self.hop_length)
+        if len(frames):
+            self._pending = self._pending[len(frames) * self.hop_length:]
+        return self.features(frames)
+
+    def reset(self):
+        self._pending = np.empty(0, dtype=np.float32)
+
+
+def resample(samples, from_rate, to_rate, anti_alias=True):
+    """
+    Linearly resamples a mono signal to another sample rate. When
+    downsampling with anti_alias, it is low-pass filtered first so that
+    frequencies above the new Nyquist frequency don't fold back into it.
+    """
+    if from_rate == to_rate or len(samples) == 0:
+        return np.asarray(samples, dtype=np.float32)
+    if anti_alias and to_rate < from_rate and len(samples) > 2 * RESAMPLE_HALF_TAPS:
+        cutoff = RESAMPLE_CUTOFF * 0.5 * to_rate / from_rate
+        taps = np.arange(-RESAMPLE_HALF_TAPS, RESAMPLE_HALF_TAPS + 1)
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * taps) * np.hamming(len(taps))
+        samples = np.convolve(samples, kernel / kernel.sum(), mode="same")
+    count = int(round(len(samples) * to_rate / from_rate))
+    positions = np.arange(count, dtype=np.float64) * (from_rate / to_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
@@ -0,0 +1,140 @@
+import logging
+import threading
+import numpy as np
+import latency
+
+# Seconds of raw audio kept in the ring buffer for the consumers to catch up on
+DEFAULT_BUFFER_SECONDS = 30
+# Audio is segmented in hops of this length, independently of the capture chunk size
+SEGMENT_HOP_MS = 30
+
+
+class RingBuffer:
+    """
+    Fixed-size byte ring for raw PCM audio. The storage is allocated once and
+    the writer never waits: when readers fall behind, the oldest audio is
+    overwritten. Positions are absolute byte offsets into the stream, so an
+    overrun reader can tell how much it missed.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.write_position = 0
+        self.closed = False
+        self._data = np.zeros(capacity, dtype=np.uint8)
+        self._condition = threading.Condition()
+
+    def write(self, data):
+        """Appends raw bytes, overwriting the oldest audio once the ring is full."""
+        chunk = np.frombuffer(data, dtype=np.uint8)
+        with self._condition:
+            position = self.write_position + max(0, len(chunk) - self.capacity)
+            chunk = chunk[-self.capacity:]
+            start = position % self.capacity
+            first = min(len(chunk), self.capacity - start)
+            self._data[start:start + first] = chunk[:first]
+            self._data[:len(chunk) - first] = chunk[first:]
+            self.write_position += len(data)
+            self._condition.notify_all()
+
+    def read(self, position, size, timeout=None):
+        """
+        Returns (data, start) with up to size bytes from position on, waiting for
+        new audio if needed. start is later than position when that audio was
+        already overwritten. data is empty once the ring is closed and drained,
+        or on timeout.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.write_position > position or self.closed, timeout)
+            position = max(position, self.write_position - self.capacity)
+            end = min(self.write_position, position + size)
+            if end <= position:
+                return b"", position
+            start, stop = position % self.capacity, end % self.capacity
+            if start < stop or stop == 0:
+                data = self._data[start:stop or self.capacity].tobytes()
+            else:
+                data = self._data[start:].tobytes() + self._data[:stop].tobytes()
+            return data, position
+
+    def close(self):
+        """Marks the end of the stream and wakes up waiting readers."""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
+
+
+class AudioCapture:
+    """
+    Continuous capture front end: the microphone is read without pause into a
+    ring buffer, while a worker thread cuts utterances out of it and hands
+    them to ``on_utterance``. That callback may block to apply backpressure;
+    the ring buffer keeps the audio in the meantime, so nothing is lost unless
+    the consumer falls more than the buffer length behind.
+
+    ``segmenter.process(chunk)`` returns utterance audio when one ends. Its
+    processing time is traced under the segmenter's ``latency_stage``.
+    """
+
+    def __init__(self, source, segmenter, on_utterance, logger=None, buffer_seconds=DEFAULT_BUFFER_SECONDS,
+                 tracer=None):
+        self.source = source
+        self.segmenter = segmenter
+        self.on_utterance = on_utterance
+        self.logger = logger or logging.getLogger(__name__)
+        self.tracer = tracer or latency.tracer
+        self.buffer_seconds = buffer_seconds
+        self.ring = None
+        self.dropped_bytes = 0
+        self._stop_event = threading.Event()
+        self._segment_thread = None
+
+    def stop(self):
+        """Stops capturing and segmenting."""
+        self._stop_event.set()
+        if self.ring:
+            self.ring.close()
+
+    def run(self):
+        """
+        Captures audio on the calling thread until stopped or until the source
+        ends, then waits for the rest of the captured audio to be segmented.
+        """
+        with self.source as source:
+            frame_bytes = source.SAMPLE_WIDTH
+            capacity = int(self.buffer_seconds * source.SAMPLE_RATE) * frame_bytes
+            self.ring = RingBuffer(capacity)
+            self._hop_bytes = int(source.SAMPLE_RATE * SEGMENT_HOP_MS / 1000) * frame_bytes
+            self._segment_thread = threading.Thread(target=self._segment, daemon=True)
+            self._segment_thread.start()
+            try:
+                while not self._stop_event.is_set():
+                    chunk = source.stream.read(source.CHUNK)
+                    if not chunk:
+                        # End of a file-backed source
+                        break
+                    self.ring.write(chunk)
+            except Exception as e:
+                self.logger.error(f"Audio capture failed: {e}")
+            finally:
+                self.ring.close()
+        self._segment_thread.join()
+
+    def _segment(self):
+        position = 0
+        stage = getattr(self.segmenter, "latency_stage", "segment")
+        try:
+            while not self._stop_event.is_set():
+                data, start = self.ring.read(position, self._hop_bytes)
+                if not data:
+                    break
+                if start > position:
+                    self.dropped_bytes += start - position
+                    self.logger.warning(f"Audio processing fell behind; skipped {start - position} bytes of audio.")
+                position = start + len(data)
+                with self.tracer.span(stage):
+                    utterance = self.segmenter.process(data)
+                if utterance:
+                    self.on_utterance(utterance)
+        except Exception as e:
+            self.logger.error(f"Audio segmentation failed: {e}")
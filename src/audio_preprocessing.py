@@ -0,0 +1,51 @@
+import numpy as np
+import speech_recognition as sr
+from audio_features import frame_signal, pcm_to_float, float_to_pcm, resample
+
+# Frames for finding where the speech starts and ends
+TRIM_FRAME_MS = 10
+# Frames this far below the loudest frame of the utterance are silence at its ends
+TRIM_THRESHOLD_DB = 40.0
+# Audio kept on each side of the speech, so soft onsets and endings survive
+TRIM_PADDING_MS = 200
+
+
+def trim_silence(samples, sample_rate, threshold_db=TRIM_THRESHOLD_DB, padding_ms=TRIM_PADDING_MS):
+    """Cuts the silence before and after the speech, keeping padding_ms of it on each side."""
+    frame_length = int(sample_rate * TRIM_FRAME_MS / 1000)
+    frames = frame_signal(samples, frame_length, frame_length)
+    if not len(frames):
+        return samples
+    energy = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    loud = np.flatnonzero(energy > energy.max() - threshold_db)
+    padding = int(sample_rate * padding_ms / 1000)
+    start = max(0, loud[0] * frame_length - padding)
+    end = min(len(samples), (loud[-1] + 1) * frame_length + padding)
+    return samples[start:end]
+
+
+class AudioPreprocessor:
+    """
+    Prepares an utterance for the recognizer backend: the silence the
+    endpointer keeps around the speech is trimmed, the audio is downmixed to
+    mono and resampled to the backend's native rate, as 16-bit samples. Less
+    audio means a smaller upload for online backends and less to decode for
+    offline ones.
+    """
+
+    def __init__(self, trim=True, threshold_db=TRIM_THRESHOLD_DB, padding_ms=TRIM_PADDING_MS):
+        self.trim = trim
+        self.threshold_db = threshold_db
+        self.padding_ms = padding_ms
+
+    def process(self, audio_bytes, sample_rate, sample_width=2, target_rate=None, channels=1):
+        """
+        Returns the prepared sr.AudioData of raw interleaved PCM audio, at
+        target_rate (by default, the rate it has).
+        """
+        samples = pcm_to_float(audio_bytes, sample_width, channels)
+        if self.trim:
+            samples = trim_silence(samples, sample_rate, self.threshold_db, self.padding_ms)
+        rate = target_rate or sample_rate
+        samples = resample(samples, sample_rate, rate)
+        return sr.AudioData(float_to_pcm(samples, 2), rate, 2)
@@ -0,0 +1,83 @@
+import json
+import re
+from app_search import edit_distance
+
+# A spoken word snaps to a command word within this many edits per
+# WORD_LENGTH_PER_EDIT characters, so words of up to three letters must match
+WORD_LENGTH_PER_EDIT = 4
+# Commands a transcript is never snapped to: a misheard word must not power off the computer
+UNSNAPPED_COMMANDS = {"shutdown", "restart", "sleep"}
+
+_NON_WORD = re.compile(r"[^a-z0-9' ]+")
+
+
+def _clean(text):
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def _word_distance(spoken, word):
+    """Edits from a spoken word to a command word, or None when they are too far apart."""
+    limit = len(word) // WORD_LENGTH_PER_EDIT
+    distance = edit_distance(spoken, word, limit)
+    return distance if distance <= limit else None
+
+
+class CommandGrammar:
+    """
+    The set of phrases that can actually do something, derived from the
+    command handler's vocabulary. Grammar-capable backends restrict decoding
+    to it; for the others, ``snap`` maps a free-form transcript onto the
+    closest valid command.
+    """
+
+    def __init__(self, phrases, wake_word=None, accepts=None):
+        # Optional predicate for commands that are valid without being listed (e.g. "volume up by 35")
+        self.accepts = accepts
+        self.commands = sorted({_clean(phrase) for phrase in phrases if _clean(phrase)})
+        self.wake_word = _clean(wake_word) if wake_word else None
+        # Phrases the decoder should listen for, including the wake word when it is part of the utterance
+        prefix = f"{self.wake_word} " if self.wake_word else ""
+        self.phrases = [prefix + command for command in self.commands]
+        self._verbs = sorted({command.split()[0] for command in self.commands})
+        self._fixed = [command.split() for command in self.commands
+                       if not command.startswith("open ") and command not in UNSNAPPED_COMMANDS]
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def words(self):
+        """The decoder vocabulary."""
+        return sorted({word for phrase in self.phrases for word in phrase.split()})
+
+    def to_vosk(self):
+        """Grammar in the JSON phrase-list form Vosk's KaldiRecognizer accepts."""
+        return json.dumps(self.phrases + ["[unk]"])
+
+    def to_jsgf(self):
+        """Grammar in JSGF form, as PocketSphinx accepts it."""
+        alternatives = " | ".join(self.phrases) or "<VOID>"
+        return f"#JSGF V1.0;\ngrammar commands;\npublic <command> = {alternatives};\n"
+
+    def snap(self, command):
+        """
+        Maps a transcript (without the wake word) to the closest valid command,
+        or returns it unchanged when nothing is close enough. Words are matched
+        one by one, and never to the power commands.
+        """
+        text = _clean(command)
+        if not text or text in self.commands or (self.accepts and self.accepts(text)):
+            return text or command
+        words = text.split()
+        # "open <name>" keeps the spoken name; AppFinder resolves it fuzzily
+        if len(words) > 1 and "open" in self._verbs and _word_distance(words[0], "open") is not None:
+            return "open " + " ".join(words[1:])
+        best, best_distance = None, None
+        for phrase in self._fixed:
+            if len(phrase) != len(words):
+                continue
+            distances = [_word_distance(spoken, word) for spoken, word in zip(words, phrase)]
+            if None in distances:
+                continue
+            if best_distance is None or sum(distances) < best_distance:
+                best, best_distance = " ".join(phrase), sum(distances)
+        return best or command
@@ -1,23 +1,70 @@
-import os
-import subprocess
 import sys
 import logging
-from app_finder import AppFinder
+import threading
+from functools import partial
+import latency
+from app_finder import AppFinder, default_history_path, default_index_path
+from command_registry import CommandRegistry, command
+from macros import MacroEngine
+from speculation import Speculator
+from launcher import Launcher
+from usage_history import UsageHistory
+from volume_control import VolumeController
+
+# Seconds between background rescans for newly installed applications
+APP_RESCAN_INTERVAL = 300
+# Actions that may run alongside each other in a sequence or macro
+CONCURRENT_ACTIONS = ("open_applications",)
+# Match score from which "x and y" in an open command is taken as one app's name
+ONE_APP_SCORE = 0.9
 
 class CommandHandler:
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, tracer=None):
         self.logger = logger or logging.getLogger(__name__)
-        self.app_finder = AppFinder(logger=self.logger)
-        self.commands = {
-            "open": "open_application",
-            "volume up": "volume_up",
-            "volume down": "volume_down",
-            "mute": "mute_volume",
-            "shutdown": "shutdown",
-            "restart": "restart",
-            "sleep": "sleep",
-        }
-        self._volume_interface = self._get_volume_interface()
+        self.tracer = tracer or latency.tracer
+        # Discovery runs in the background; lookups are served from the cached
+        # index until the full scan completes and is swapped in
+        self.app_finder = AppFinder(
+            logger=self.logger,
+            index_path=default_index_path(),
+            background=True,
+            rescan_interval=APP_RESCAN_INTERVAL,
+            history=UsageHistory(default_history_path(), logger=self.logger),
+        )
+        # Command patterns are declared with @command on the methods below;
+        # more can be added with register()
+        self.registry = CommandRegistry.from_object(self, is_item=self._is_app_name)
+        # Action name -> method name, or a callable that replaces the method
+        # (e.g. shutdown with a confirmation step)
+        self.commands = {action: action for action in self.registry.actions()}
+        # Applications and power commands start on the launcher's worker pool
+        self.launcher = Launcher(logger=self.logger, tracer=self.tracer)
+        # Sequences ("open outlook then teams then mute") and configured macros
+        self.macros = MacroEngine(self.parse, self.run_action, concurrent_actions=CONCURRENT_ACTIONS,
+                                  logger=self.logger)
+        # Apps named in partial transcripts are looked up before the final one
+        self.speculation = Speculator(self.parse, lambda name: self.app_finder.find_app(name), logger=self.logger)
+        # The audio endpoint (pycaw COM bindings) is opened by the first volume
+        # command rather than at startup
+        self._volume = None
+        self._volume_loaded = False
+        self._volume_lock = threading.Lock()
+
+    @property
+    def volume(self):
+        """The VolumeController, or None where volume control isn't supported."""
+        if not self._volume_loaded:
+            with self._volume_lock:
+                if not self._volume_loaded:
+                    interface = self._get_volume_interface()
+                    self._volume = VolumeController(interface, logger=self.logger) if interface else None
+                    self._volume_loaded = True
+        return self._volume
+
+    @volume.setter
+    def volume(self, controller):
+        self._volume = controller
+        self._volume_loaded = True
 
     def _get_volume_interface(self):
         if sys.platform == "win32":
@@ -30,77 +77,149 @@ class CommandHandler:
                 return None
         return None
 
-    def execute_command(self, command_text):
+    def register(self, pattern, action):
+        """
+        Adds a command. action is a callable taking the pattern's slots as
+        keyword arguments, e.g. register("say {text}", lambda text: ...).
+        """
+        name = f"{getattr(action, '__name__', 'command')}_{len(self.commands)}"
+        self.commands[name] = action
+        self.registry.add(pattern, name)
+
+    def vocabulary(self):
+        """
+        Returns every phrase that can trigger a command, with "open <name>"
+        for each discovered application.
+        """
+        return self.registry.phrases({"apps": list(self.app_finder.app_map)})
+
+    def _is_app_name(self, text):
+        """Whether text names one application, so the "and" in it doesn't separate two."""
+        if text in self.app_finder.app_map:
+            return True
+        for _, _, score in self.app_finder.find_app_candidates(text, k=1):
+            return score >= ONE_APP_SCORE
+        return False
+
+    def parse(self, command_text):
+        """Returns (action, arguments) for a command, or None if nothing matches."""
         if not command_text:
-            return
+            return None
+        return self.registry.match(command_text)
+
+    def load_macros(self, macros):
+        """
+        Adds the macros of a {name: [command, ...]} mapping as commands: saying
+        the name runs its commands. They are parsed here, once.
+        """
+        for name, steps in self.macros.load(macros).items():
+            action = f"macro_{name}"
+            try:
+                self.registry.add(name, action)
+            except ValueError as e:
+                self.logger.warning(f"Skipping macro '{name}': {e}")
+                continue
+            self.commands[action] = partial(self.macros.run, steps)
+            self.logger.info(f"Macro '{name}' loaded: {len(steps)} steps.")
 
-        command_text = command_text.lower()
-        for keyword, action in self.commands.items():
-            if command_text.startswith(keyword):
-                if isinstance(action, str):
-                    method = getattr(self, action)
-                else:
-                    method = action
-
-                if keyword == "open":
-                    app_name = command_text[len(keyword):].strip()
-                    method(app_name)
-                else:
-                    method()
+    def speculate(self, transcript, wake_word=None):
+        """
+        Takes a partial transcript of the command being spoken and starts
+        looking up the application it opens, if any.
+        """
+        text = transcript.lower().strip()
+        if wake_word:
+            if not text.startswith(wake_word):
                 return
+            text = text[len(wake_word):].strip()
+        self.speculation.speculate(text)
+
+    def execute_command(self, command_text):
+        steps = self.macros.plan(command_text)
+        if steps is None:
+            if command_text:
+                self.logger.info(f"No command matches '{command_text}'.")
+            self.speculation.discard()
+            return
+        try:
+            self.macros.run(steps)
+        finally:
+            self.speculation.discard()
+
+    def run_action(self, action, arguments):
+        """Runs a parsed command."""
+        method = self.commands.get(action, action)
+        if isinstance(method, str):
+            method = getattr(self, method)
+        method(**arguments)
+
+    @command("open {apps:list}")
+    def open_applications(self, apps):
+        for app_name in apps:
+            self.open_application(app_name)
 
     def open_application(self, app_name):
-        app_path = self.app_finder.find_app(app_name)
+        with self.tracer.span("find_app"):
+            app_path = self.speculation.take(app_name) or self.app_finder.find_app(app_name)
         if app_path:
-            try:
-                os.startfile(app_path)
+            # Only a launch that started counts towards the ranking
+            if self.launcher.launch(app_name, app_path,
+                                    on_started=partial(self.app_finder.record_launch, app_name, app_path)):
                 self.logger.info(f"Opening {app_name} from {app_path}")
-            except Exception as e:
-                self.logger.error(f"Could not open '{app_name}': {e}")
         else:
             self.logger.warning(f"Application '{app_name}' not found.")
 
-    def volume_up(self):
-        if not self._volume_interface:
+    @command("volume up [[by] {amount:int} [percent]]")
+    def volume_up(self, amount=10):
+        self._change_volume(amount / 100)
+
+    @command("volume down [[by] {amount:int} [percent]]")
+    def volume_down(self, amount=10):
+        self._change_volume(-amount / 100)
+
+    @command("set volume to {level:int} [percent]")
+    def set_volume(self, level):
+        if not self.volume:
             self.logger.warning("Volume control is not supported on this OS.")
             return
-        current_volume = self._volume_interface.GetMasterVolumeLevelScalar()
-        new_volume = min(1.0, current_volume + 0.1)
-        self._volume_interface.SetMasterVolumeLevelScalar(new_volume, None)
+        new_volume = self.volume.set(level / 100)
         self.logger.info(f"Volume set to {new_volume * 100:.0f}%")
 
-    def volume_down(self):
-        if not self._volume_interface:
+    def _change_volume(self, delta):
+        if not self.volume:
             self.logger.warning("Volume control is not supported on this OS.")
             return
-        current_volume = self._volume_interface.GetMasterVolumeLevelScalar()
-        new_volume = max(0.0, current_volume - 0.1)
-        self._volume_interface.SetMasterVolumeLevelScalar(new_volume, None)
+        # Ramps in the background; repeated commands move the same target
+        new_volume = self.volume.step(delta)
         self.logger.info(f"Volume set to {new_volume * 100:.0f}%")
 
+    @command("mute")
     def mute_volume(self):
-        if not self._volume_interface:
+        if not self.volume:
             self.logger.warning("Volume control is not supported on this OS.")
             return
-        self._volume_interface.SetMute(not self._volume_interface.GetMute(), None)
+        self.volume.toggle_mute()
         self.logger.info("Mute toggled")
 
+    @command("shutdown")
     def shutdown(self, confirmation_callback=None):
         if confirmation_callback and not confirmation_callback():
             self.logger.info("Shutdown cancelled.")
             return
 
         self.logger.info("Shutting down...")
-        os.system("shutdown /s /t 1")
+        self.launcher.power("shutdown")
 
+    @command("restart")
     def restart(self, confirmation_callback=None):
         if confirmation_callback and not confirmation_callback():
             self.logger.info("Restart cancelled.")
             return
 
         self.logger.info("Restarting...")
-        os.system("shutdown /r /t 1")
+        self.launcher.power("restart")
 
+    @command("sleep")
     def sleep(self):
         self.logger.info("Putting the computer to sleep...")
-        os.system("rundll32.exe powrprof.dll,SetSuspendState 0,1,0")
+        self.launcher.power("sleep")
@@ -0,0 +1,240 @@
+import re
+import itertools
+
+_UNITS = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+          "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen", "seventeen", "eighteen", "nineteen"]
+_TENS = ["", "", "twenty", "thirty", "forty", "fifty", "sixty", "seventy", "eighty", "ninety"]
+_NUMBER_WORDS = {word: value for value, word in enumerate(_UNITS)}
+_NUMBER_WORDS.update({word: 10 * value for value, word in enumerate(_TENS) if word})
+_NUMBER_WORDS["hundred"] = 100
+
+_NUMBER_WORD = "(?:" + "|".join(sorted(_NUMBER_WORDS, key=len, reverse=True)) + ")"
+_INT_PATTERN = rf"(?:\d+|{_NUMBER_WORD}(?:[\s-]+{_NUMBER_WORD})*)(?:\s*%)?"
+_LIST_SEPARATOR = re.compile(r"(\s*(?:,|\band\b)\s*)")
+_SLOT = re.compile(r"\{(\w+)(?::(\w+))?\}")
+_PATTERN_TOKEN = re.compile(r"\[|\]|\{[^}]*\}|[^\s\[\]{}]+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s.!?]+$")
+
+# Values used for int slots when expanding patterns into phrases
+INT_SLOT_VALUES = range(10, 101, 10)
+
+
+def parse_number(text):
+    """Parses '40', '40%' or 'forty five' into an int."""
+    text = text.replace("%", "").strip()
+    if text.isdigit():
+        return int(text)
+    total, current = 0, 0
+    for word in re.split(r"[\s-]+", text):
+        value = _NUMBER_WORDS[word]
+        if value == 100:
+            current = max(current, 1) * 100
+        else:
+            current += value
+    return total + current
+
+
+def number_words(value):
+    """Spells out an int from 0 to 100, e.g. 45 -> 'forty five'."""
+    if value < 20:
+        return _UNITS[value]
+    if value == 100:
+        return "hundred"
+    tens, units = divmod(value, 10)
+    return _TENS[tens] + (f" {_UNITS[units]}" if units else "")
+
+
+def split_list(text, is_item=None):
+    """
+    Splits 'chrome, word and spotify' into its items. With is_item(text),
+    pieces joined by "and" that together name one item (e.g. 'windows fax
+    and scan') are kept whole, the longest such run first.
+    """
+    parts = _LIST_SEPARATOR.split(text.strip())
+    pieces, separators = parts[0::2], parts[1::2]
+    items = []
+    start = 0
+    while start < len(pieces):
+        end, item = start, pieces[start]
+        if is_item is not None:
+            for last in range(len(pieces) - 1, start, -1):
+                if any("," in separator for separator in separators[start:last]):
+                    continue
+                joined = pieces[start] + "".join(separators[i] + pieces[i + 1] for i in range(start, last))
+                if is_item(joined):
+                    end, item = last, joined
+                    break
+        if item:
+            items.append(item)
+        start = end + 1
+    return items
+
+
+# Slot type -> (regex, converter)
+SLOT_TYPES = {
+    "int": (_INT_PATTERN, parse_number),
+    "word": (r"\S+", str),
+    "text": (r".+", str.strip),
+    "list": (r".+", split_list),
+}
+
+
+def command(pattern):
+    """
+    Marks a method as the action of a command pattern. Patterns are words,
+    typed slots such as ``{amount:int}`` (types: int, word, text, list) and
+    optional parts in brackets, e.g. ``"volume up [by {amount:int} [percent]]"``.
+    Slot values are passed to the method as keyword arguments.
+    """
+    def decorator(func):
+        func.command_patterns = getattr(func, "command_patterns", []) + [pattern]
+        return func
+    return decorator
+
+
+def _parse_pattern(pattern):
+    """Parses a pattern into nested elements: ('word', w), ('slot', name, type), ('optional', elements)."""
+    stack = [[]]
+    for token in _PATTERN_TOKEN.findall(pattern.lower()):
+        if token == "[":
+            stack.append([])
+        elif token == "]":
+            if len(stack) == 1:
+                raise ValueError(f"Unbalanced ']' in command pattern '{pattern}'")
+            group = stack.pop()
+            stack[-1].append(("optional", group))
+        elif token.startswith("{"):
+            slot = _SLOT.fullmatch(token)
+            if not slot or (slot.group(2) or "text") not in SLOT_TYPES:
+                raise ValueError(f"Invalid slot '{token}' in command pattern '{pattern}'")
+            stack[-1].append(("slot", slot.group(1), slot.group(2) or "text"))
+        else:
+            stack[-1].append(("word", token))
+    if len(stack) != 1:
+        raise ValueError(f"Unbalanced '[' in command pattern '{pattern}'")
+    if not stack[0] or stack[0][0][0] == "optional":
+        raise ValueError(f"Command pattern '{pattern}' must start with a word or slot")
+    return stack[0]
+
+
+def _to_regex(elements, prefix, first=True):
+    parts = []
+    for element in elements:
+        separator = "" if first else r"\s+"
+        if element[0] == "word":
+            parts.append(separator + re.escape(element[1]))
+            first = False
+        elif element[0] == "slot":
+            parts.append(f"{separator}(?P<{prefix}{element[1]}>{SLOT_TYPES[element[2]][0]})")
+            first = False
+        else:
+            parts.append(f"(?:{_to_regex(element[1], prefix, first)})?")
+    return "".join(parts)
+
+
+def _expand(elements, values):
+    """Yields every phrase of the elements, filling slots from values (slot name -> strings)."""
+    choices = []
+    for element in elements:
+        if element[0] == "word":
+            choices.append([element[1]])
+        elif element[0] == "slot":
+            name, slot_type = element[1], element[2]
+            if name in values:
+                choices.append(list(values[name]))
+            elif slot_type == "int":
+                choices.append([number_words(value) for value in INT_SLOT_VALUES])
+            else:
+                # Free text can not be listed
+                return
+        else:
+            choices.append([""] + list(_expand(element[1], values)))
+    for combination in itertools.product(*choices):
+        yield " ".join(part for part in combination if part)
+
+
+def _specificity(elements):
+    """Number of literal words, counting optional ones, so longer commands are tried first."""
+    return sum(1 if element[0] == "word" else _specificity(element[1]) if element[0] == "optional" else 0
+               for element in elements)
+
+
+class CommandRegistry:
+    """
+    Maps command patterns to action names and matches text against all of
+    them with a single compiled regular expression. Patterns with more words
+    are tried first, so the longest matching command wins; text after a
+    complete command is ignored. ``is_item(text)``, when given, tells list
+    slots which texts containing "and" name a single item.
+    """
+
+    def __init__(self, is_item=None):
+        self.is_item = is_item
+        self._patterns = []
+        self._regex = None
+
+    @classmethod
+    def from_object(cls, obj, is_item=None):
+        """Builds a registry from the methods of obj marked with @command."""
+        registry = cls(is_item)
+        for name in sorted(dir(type(obj))):
+            for pattern in getattr(getattr(type(obj), name), "command_patterns", ()):
+                registry.add(pattern, name)
+        return registry
+
+    def add(self, pattern, action):
+        """Registers a pattern for an action name."""
+        elements = _parse_pattern(pattern)
+        self._patterns.append((pattern, action, elements))
+        self._regex = None
+
+    def actions(self):
+        return sorted({action for _, action, _ in self._patterns})
+
+    def _compile(self):
+        order = sorted(range(len(self._patterns)), key=lambda i: -_specificity(self._patterns[i][2]))
+        alternatives = [f"(?P<c{i}>{_to_regex(self._patterns[i][2], f'c{i}_')})" for i in order]
+        self._regex = re.compile(r"(?:" + "|".join(alternatives) + r")(?=\s|$)")
+
+    def match(self, text):
+        """
+        Returns (action, arguments) for the command at the start of text, or
+        None. Arguments are converted according to their slot types.
+        """
+        if self._regex is None:
+            self._compile()
+        text = _TRAILING_PUNCTUATION.sub("", " ".join(text.lower().split()))
+        match = self._regex.match(text)
+        if match is None:
+            return None
+        index = int(match.lastgroup[1:])
+        _, action, elements = self._patterns[index]
+        prefix = f"c{index}_"
+        slots = dict(self._slots(elements))
+        arguments = {}
+        for group, value in match.groupdict().items():
+            if value is not None and group.startswith(prefix):
+                name = group[len(prefix):]
+                if slots[name] == "list":
+                    arguments[name] = split_list(value, self.is_item)
+                else:
+                    arguments[name] = SLOT_TYPES[slots[name]][1](value)
+        return action, arguments
+
+    def _slots(self, elements):
+        for element in elements:
+            if element[0] == "slot":
+                yield element[1], element[2]
+            elif element[0] == "optional":
+                yield from self._slots(element[1])
+
+    def phrases(self, values=None):
+        """
+        Lists the concrete phrases of every pattern, for recognition grammars.
+        Slots are filled from values (slot name -> strings); int slots default
+        to round numbers, and patterns with other unfilled slots are skipped.
+        """
+        phrases = []
+        for _, _, elements in self._patterns:
+            phrases.extend(_expand(elements, values or {}))
+        return list(dict.fromkeys(phrases))
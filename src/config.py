@@ -0,0 +1,74 @@
+import os
+import sys
+import json
+import copy
+import logging
+
+DEFAULT_CONFIG = {
+    # Speech recognition engine: "google" (online), "vosk" or "sphinx" (offline)
+    "recognizer_backend": "google",
+    # Keyword arguments for each backend, e.g. {"vosk": {"model_path": "C:\\vosk-model"}}
+    "backend_options": {},
+    "wake_word": "hey windows",
+    # Enrollment recordings of the wake word; enables the local wake word gate
+    "wake_word_templates": [],
+    # Utterance endpointing, e.g. {"trailing_silence_ms": 700, "max_utterance_ms": 10000}
+    "endpointing": {},
+    # Repeated commands are answered from a local cache of recent transcripts,
+    # e.g. {"capacity": 64, "min_confidence": 0.9}; null turns it off
+    "recognition_cache": {},
+    # Before recognition, silence around the command is trimmed and the audio
+    # resampled to the backend's rate, e.g. {"padding_ms": 300, "trim": false};
+    # null sends the audio as captured
+    "audio_preprocessing": {},
+    # Online recognition is bounded by a deadline, retried, hedged when slow and,
+    # while the service keeps failing, handed to a local engine, e.g.
+    # {"deadline_s": 5, "retries": 1, "hedge_after_ms": 2000, "fallback": "vosk"};
+    # null calls the backend directly
+    "resilience": {},
+    # Commands run by saying a name, e.g. {"start my day": ["open outlook", "open teams", "set volume to 30"]}
+    "macros": {},
+    # The service mode (--service): the local HTTP API, its bearer token (null:
+    # a random one, logged at startup), and one listening session per input source, e.g.
+    # {"id": "room-a", "wake_word": "hey room", "source": {"device_index": 1}}
+    "service": {
+        "host": "127.0.0.1",
+        "port": 8765,
+        "token": None,
+        "sessions": [{"id": "default", "source": "microphone"}],
+    },
+    # Time each stage from the end of a command to it taking effect (shown in the window)
+    "latency_tracing": True,
+}
+
+
+def default_config_path():
+    """Returns the location of the user's configuration file."""
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "VoiceControl", "config.json")
+    base = os.environ.get("XDG_CONFIG_HOME") or os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, "voice-control", "config.json")
+
+
+def load_config(path=None, logger=None):
+    """
+    Loads the JSON configuration file over the defaults. A missing file gives
+    the defaults; an unreadable one is reported and ignored.
+    """
+    logger = logger or logging.getLogger(__name__)
+    path = path or default_config_path()
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    if not os.path.isfile(path):
+        return config
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            user_config = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable configuration '{path}': {e}")
+        return config
+    if not isinstance(user_config, dict):
+        logger.warning(f"Ignoring configuration '{path}': expected a JSON object.")
+        return config
+    config.update(user_config)
+    return config
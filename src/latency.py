@@ -0,0 +1,222 @@
+import csv
+import json
+import time
+import threading
+from collections import deque
+
+# Durations kept per stage for the percentiles
+STAGE_WINDOW = 1000
+# Completed command traces kept for export
+TRACE_WINDOW = 200
+PERCENTILES = (50, 90, 99)
+
+
+class _NullSpan:
+    """What span() returns while tracing is disabled: does nothing, allocates nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "stage", "trace", "start")
+
+    def __init__(self, tracer, stage, trace):
+        self.tracer = tracer
+        self.stage = stage
+        self.trace = trace
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer._record(self.stage, self.start, time.perf_counter(), self.trace)
+        return False
+
+
+class Trace:
+    """The spans of one command, timed from the end of its utterance."""
+    __slots__ = ("id", "wall_time", "start", "spans", "total_ms", "holds", "finishing")
+
+    def __init__(self, trace_id):
+        self.id = trace_id
+        self.wall_time = time.time()
+        self.start = time.perf_counter()
+        self.spans = []
+        self.total_ms = None
+        # Background work (e.g. a launch) the trace waits for before it completes
+        self.holds = 0
+        self.finishing = False
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "time": self.wall_time,
+            "total_ms": self.total_ms,
+            "spans": [{"stage": stage, "offset_ms": offset, "duration_ms": duration}
+                      for stage, offset, duration in self.spans],
+        }
+
+
+class LatencyTracer:
+    """
+    Times the stages between the end of an utterance and its command taking
+    effect. Code marks a stage with ``with tracer.span("find_app"):``; each
+    span is added to that stage's recent durations (for percentiles) and, when
+    a trace is active on the thread, to the trace of the command being
+    handled. Work the command hands to another thread holds the trace open
+    until it is released there. While disabled, span() returns a shared no-op
+    object.
+    """
+
+    def __init__(self, enabled=True, stage_window=STAGE_WINDOW, trace_window=TRACE_WINDOW):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stage_window = stage_window
+        self._stages = {}
+        self._traces = deque(maxlen=trace_window)
+        self._next_id = 0
+
+    def span(self, stage):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage, getattr(self._local, "trace", None))
+
+    def start_trace(self):
+        """Starts the trace of a new command, or returns None while disabled."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._next_id += 1
+            return Trace(self._next_id)
+
+    def activate(self, trace):
+        """Makes trace the current one on this thread for the duration of a with block."""
+        return _Activation(self, trace) if trace is not None else _NULL_SPAN
+
+    def current(self):
+        """The trace active on this thread, or None."""
+        return getattr(self._local, "trace", None)
+
+    def hold(self, trace):
+        """Keeps trace from completing until release(trace), e.g. while a launch runs on a worker."""
+        if trace is not None:
+            with self._lock:
+                trace.holds += 1
+
+    def release(self, trace):
+        """Ends a hold(); the trace completes now if finish() was called while it was held."""
+        if trace is None:
+            return
+        with self._lock:
+            trace.holds -= 1
+            if trace.holds or not trace.finishing:
+                return
+        self._complete(trace)
+
+    def mark(self, trace, stage, since=None):
+        """Records a span from since (a perf_counter time, default the trace start) until now."""
+        if trace is not None:
+            self._record(stage, trace.start if since is None else since, time.perf_counter(), trace)
+
+    def finish(self, trace):
+        """
+        Completes a trace: its total is the time from the utterance end until
+        now, or until the last hold on it is released.
+        """
+        if trace is None:
+            return
+        with self._lock:
+            trace.finishing = True
+            if trace.holds:
+                return
+        self._complete(trace)
+
+    def _complete(self, trace):
+        end = time.perf_counter()
+        trace.total_ms = (end - trace.start) * 1000.0
+        self._record("total", trace.start, end, None)
+        with self._lock:
+            self._traces.append(trace)
+
+    def _record(self, stage, start, end, trace):
+        duration = (end - start) * 1000.0
+        with self._lock:
+            durations = self._stages.get(stage)
+            if durations is None:
+                durations = self._stages[stage] = deque(maxlen=self._stage_window)
+            durations.append(duration)
+            if trace is not None:
+                trace.spans.append((stage, (start - trace.start) * 1000.0, duration))
+
+    def stats(self):
+        """Returns {stage: {"count", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"}} over recent spans."""
+        with self._lock:
+            stages = {stage: list(durations) for stage, durations in self._stages.items() if durations}
+        if not stages:
+            return {}
+        # Imported here (and only with spans to summarize) so startup doesn't wait for numpy
+        import numpy as np
+        stats = {}
+        for stage, durations in stages.items():
+            durations = np.array(durations)
+            values = np.percentile(durations, PERCENTILES)
+            stats[stage] = {"count": len(durations), "mean_ms": float(durations.mean())}
+            stats[stage].update({f"p{p}_ms": float(v) for p, v in zip(PERCENTILES, values)})
+            stats[stage]["max_ms"] = float(durations.max())
+        return stats
+
+    def traces(self):
+        with self._lock:
+            return [trace.to_dict() for trace in self._traces]
+
+    def clear(self):
+        with self._lock:
+            self._stages.clear()
+            self._traces.clear()
+
+    def export(self, path):
+        """
+        Writes the stage percentiles to path: as JSON (with the recent command
+        traces) when it ends in .json, otherwise as CSV, one row per stage.
+        """
+        stats = self.stats()
+        if path.lower().endswith(".json"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"stages": stats, "traces": self.traces()}, f, indent=2)
+            return
+        columns = ["count", "mean_ms"] + [f"p{p}_ms" for p in PERCENTILES] + ["max_ms"]
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["stage"] + columns)
+            for stage, values in stats.items():
+                writer.writerow([stage] + [values[column] for column in columns])
+
+
+class _Activation:
+    __slots__ = ("tracer", "trace", "previous")
+
+    def __init__(self, tracer, trace):
+        self.tracer = tracer
+        self.trace = trace
+
+    def __enter__(self):
+        self.previous = getattr(self.tracer._local, "trace", None)
+        self.tracer._local.trace = self.trace
+        return self.trace
+
+    def __exit__(self, *exc):
+        self.tracer._local.trace = self.previous
+        return False
+
+
+# The application-wide tracer, like the root logger
+tracer = LatencyTracer()
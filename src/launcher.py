@@ -0,0 +1,250 @@
+import os
+import sys
+import time
+import logging
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import latency
+
+# Threads that start applications, so a slow shortcut target doesn't hold up the next command
+LAUNCH_WORKERS = 4
+# A second "open" of the same application this soon after the first is ignored
+# while the first is still starting or running
+DEDUP_SECONDS = 10.0
+
+# Power actions, run without a shell
+WINDOWS_POWER_COMMANDS = {
+    "shutdown": ["shutdown", "/s", "/t", "1"],
+    "restart": ["shutdown", "/r", "/t", "1"],
+    "sleep": ["rundll32.exe", "powrprof.dll,SetSuspendState", "0,1,0"],
+}
+
+
+class WindowsPlatform:
+    """Starts programs directly, and shortcuts and documents through the shell's file associations."""
+
+    def open(self, path):
+        """Starts path. Returns its process, or None when the shell started it (no PID is known)."""
+        if path.lower().endswith(".exe"):
+            flags = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+            return subprocess.Popen([path], creationflags=flags, close_fds=True, stdin=subprocess.DEVNULL,
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # CreateProcess can't start a .lnk; ShellExecute resolves it without spawning a shell
+        os.startfile(path)
+        return None
+
+    def is_running(self, process):
+        return process.poll() is None
+
+    def power_command(self, action):
+        return WINDOWS_POWER_COMMANDS[action]
+
+    def run(self, args):
+        return subprocess.run(args, check=True, stdin=subprocess.DEVNULL, capture_output=True)
+
+
+class PosixPlatform:
+    """Starts executables directly and anything else with xdg-open. Power actions aren't supported."""
+
+    def open(self, path):
+        args = [path] if os.access(path, os.X_OK) and not os.path.isdir(path) else ["xdg-open", path]
+        return subprocess.Popen(args, start_new_session=True, close_fds=True, stdin=subprocess.DEVNULL,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def is_running(self, process):
+        return process.poll() is None
+
+    def power_command(self, action):
+        return None
+
+    def run(self, args):
+        return subprocess.run(args, check=True, stdin=subprocess.DEVNULL, capture_output=True)
+
+
+def default_platform():
+    return WindowsPlatform() if sys.platform == "win32" else PosixPlatform()
+
+
+class FakeProcess:
+    __slots__ = ("pid", "running")
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.running = True
+
+
+class FakePlatform:
+    """
+    Stand-in platform for tests and benchmarks on any OS. Records what would
+    have been started or run instead of doing it; ``open_ms`` models a slow
+    shortcut target, and paths in ``failing`` raise OSError.
+    """
+
+    def __init__(self, open_ms=0.0, failing=()):
+        self.open_s = open_ms / 1000.0
+        self.failing = set(failing)
+        self.opened = []
+        self.commands = []
+        self.processes = {}
+        self._next_pid = 1000
+        self._lock = threading.Lock()
+
+    def open(self, path):
+        if self.open_s:
+            time.sleep(self.open_s)
+        if path in self.failing:
+            raise OSError(f"[WinError 2] The system cannot find the file specified: '{path}'")
+        with self._lock:
+            self._next_pid += 1
+            process = self.processes[path] = FakeProcess(self._next_pid)
+            self.opened.append(path)
+        return process
+
+    def exit(self, path):
+        """Marks the process started from path as exited."""
+        self.processes[path].running = False
+
+    def is_running(self, process):
+        return process.running
+
+    def power_command(self, action):
+        return WINDOWS_POWER_COMMANDS[action]
+
+    def run(self, args):
+        with self._lock:
+            self.commands.append(args)
+
+
+class _Launch:
+    __slots__ = ("name", "path", "started", "process", "future")
+
+    def __init__(self, name, path, started):
+        self.name = name
+        self.path = path
+        self.started = started
+        self.process = None
+        self.future = None
+
+
+class Launcher:
+    """
+    Starts applications and runs system commands on a worker pool, so the
+    caller never waits for them. Outcomes are reported to the log as they
+    come in. Launched processes are tracked by PID where the platform
+    provides one, and an application opened again within dedup_seconds is
+    not started twice while its first launch is pending or still running.
+    """
+
+    def __init__(self, platform=None, max_workers=LAUNCH_WORKERS, dedup_seconds=DEDUP_SECONDS,
+                 logger=None, tracer=None, clock=time.monotonic):
+        self.platform = platform or default_platform()
+        self.max_workers = max_workers
+        self.dedup_seconds = dedup_seconds
+        self.logger = logger or logging.getLogger(__name__)
+        self.tracer = tracer or latency.tracer
+        self.clock = clock
+        # Reentrant: a future that completes at once runs its done callback inside _submit
+        self._lock = threading.RLock()
+        self._launches = {}
+        self._pending = set()
+        self._executor = None
+
+    def launch(self, name, path, on_started=None):
+        """
+        Starts the application at path in the background. Returns a Future,
+        or None when deduplicated; on_started(), when given, is called on the
+        worker once the application has started. The caller's trace is held
+        open until then, so it times the command up to the start of the launch.
+        """
+        key = os.path.normcase(path)
+        with self._lock:
+            previous = self._launches.get(key)
+            if previous is not None and self._is_recent(previous):
+                self.logger.info(f"'{name}' was opened {self.clock() - previous.started:.0f}s ago; "
+                                 f"not opening it again.")
+                return None
+            launch = self._launches[key] = _Launch(name, path, self.clock())
+            trace = self.tracer.current()
+            self.tracer.hold(trace)
+            launch.future = self._submit(self._open, key, launch, on_started, trace)
+            return launch.future
+
+    def _is_recent(self, launch):
+        if self.clock() - launch.started > self.dedup_seconds:
+            return False
+        if not launch.future.done():
+            return True
+        # Without a process handle, the window is all there is to go on
+        return launch.process is None or self.platform.is_running(launch.process)
+
+    def _open(self, key, launch, on_started=None, trace=None):
+        try:
+            with self.tracer.activate(trace), self.tracer.span("launch"):
+                launch.process = self.platform.open(launch.path)
+        except Exception as e:
+            self.logger.error(f"Could not open '{launch.name}': {e}")
+            with self._lock:
+                # A failed launch doesn't block a retry
+                if self._launches.get(key) is launch:
+                    del self._launches[key]
+            return None
+        finally:
+            # The action has started (or failed): the command's trace can complete
+            self.tracer.release(trace)
+        pid = getattr(launch.process, "pid", None)
+        self.logger.info(f"Started {launch.name}" + (f" (pid {pid})" if pid else ""))
+        if on_started is not None:
+            try:
+                on_started()
+            except Exception as e:
+                self.logger.error(f"Start callback for '{launch.name}' failed: {e}")
+        return pid
+
+    def power(self, action):
+        """Runs a power action ("shutdown", "restart" or "sleep") in the background."""
+        args = self.platform.power_command(action)
+        if args is None:
+            self.logger.warning(f"The {action} command is not supported on this OS.")
+            return None
+        with self._lock:
+            return self._submit(self._run, args)
+
+    def _run(self, args):
+        try:
+            self.platform.run(args)
+        except (OSError, subprocess.CalledProcessError) as e:
+            self.logger.error(f"Command '{' '.join(args)}' failed: {e}")
+
+    def _submit(self, func, *args):
+        """Queues func on the pool. Must hold the lock."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="launcher")
+        future = self._executor.submit(func, *args)
+        self._pending.add(future)
+        future.add_done_callback(self._forget)
+        return future
+
+    def _forget(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def running(self):
+        """Returns [(name, pid)] of the launched applications that are still running."""
+        with self._lock:
+            launches = [launch for launch in self._launches.values()
+                        if launch.process is not None and launch.future.done()]
+        return [(launch.name, launch.process.pid) for launch in launches if self.platform.is_running(launch.process)]
+
+    def wait(self, timeout=None):
+        """Waits for the queued launches and commands. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                future.result(remaining)
+            except TimeoutError:
+                return False
+        return True
@@ -0,0 +1,140 @@
+import re
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Words that separate the commands of a sequence, e.g. "open outlook then teams then mute"
+_SEQUENCE_SEPARATOR = re.compile(r"\s*,?\s*\b(?:and then|then|after that)\b\s*")
+# Threads for the concurrent steps of a sequence (application launches)
+MACRO_WORKERS = 4
+
+
+def split_sequence(text):
+    """Splits 'open outlook then teams then mute' into its commands."""
+    return [part for part in _SEQUENCE_SEPARATOR.split(text.strip()) if part]
+
+
+class Step:
+    """One action of a sequence, with its arguments already parsed."""
+    __slots__ = ("action", "arguments", "text")
+
+    def __init__(self, action, arguments, text):
+        self.action = action
+        self.arguments = arguments
+        self.text = text
+
+    def __repr__(self):
+        return f"Step({self.action!r}, {self.arguments!r})"
+
+
+class MacroEngine:
+    """
+    Turns recognized text into steps and runs them. A sequence of commands
+    ("open outlook then teams then mute") runs from one recognition; a step
+    without a verb of its own ("teams") borrows the first word of the step
+    before it. Macros from the configuration are parsed once, when loaded.
+
+    Steps whose action is in concurrent_actions (launches) run together on
+    a worker pool; any other step waits for the steps before it, so e.g. a
+    volume change still happens in order. A concurrent action given a list
+    ("open chrome and spotify") is split into one step per item.
+    """
+
+    def __init__(self, parse, run_action, concurrent_actions=(), max_workers=MACRO_WORKERS, logger=None):
+        self.parse = parse
+        self.run_action = run_action
+        self.concurrent_actions = frozenset(concurrent_actions)
+        self.max_workers = max_workers
+        self.logger = logger or logging.getLogger(__name__)
+        self.macros = {}
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def plan(self, text):
+        """
+        Returns the steps of text: those of a single command, or of a sequence
+        when every part of it is a command. None when nothing matches.
+        """
+        parts = split_sequence(text) if text else []
+        if len(parts) > 1:
+            steps = self._plan_sequence(parts)
+            if steps is not None:
+                return steps
+        match = self.parse(text) if text else None
+        if match is None:
+            return None
+        return self._split(Step(match[0], match[1], text))
+
+    def _plan_sequence(self, parts):
+        steps = []
+        previous = None
+        for part in parts:
+            match = self.parse(part)
+            if match is None and previous is not None:
+                part = f"{previous.split()[0]} {part}"
+                match = self.parse(part)
+            if match is None:
+                return None
+            steps.extend(self._split(Step(match[0], match[1], part)))
+            previous = part
+        return steps
+
+    def _split(self, step):
+        if step.action in self.concurrent_actions:
+            lists = [name for name, value in step.arguments.items() if isinstance(value, list)]
+            if len(lists) == 1 and len(step.arguments[lists[0]]) > 1:
+                name = lists[0]
+                return [Step(step.action, {**step.arguments, name: [item]}, step.text)
+                        for item in step.arguments[name]]
+        return [step]
+
+    def compile(self, name, commands):
+        """Parses a macro's commands into steps. Raises ValueError for a command that doesn't match."""
+        steps = []
+        for text in commands:
+            planned = self.plan(text)
+            if planned is None:
+                raise ValueError(f"Macro '{name}': no command matches '{text}'")
+            steps.extend(planned)
+        self.macros[name.lower()] = steps
+        return steps
+
+    def load(self, macros):
+        """Compiles the macros of a {name: [command, ...]} mapping, skipping invalid ones."""
+        loaded = {}
+        for name, commands in macros.items():
+            if isinstance(commands, str):
+                commands = [commands]
+            try:
+                loaded[name] = self.compile(name, commands)
+            except ValueError as e:
+                self.logger.warning(f"Skipping macro: {e}")
+        return loaded
+
+    def run(self, steps):
+        """Runs the steps, launches concurrently, everything else in order. Returns when all are done."""
+        if len(steps) == 1:
+            # A single command runs on the calling thread and its errors propagate
+            self.run_action(steps[0].action, steps[0].arguments)
+            return
+        pending = []
+        for step in steps:
+            if step.action in self.concurrent_actions:
+                pending.append(self._pool().submit(self._run_step, step))
+                continue
+            wait(pending)
+            pending = []
+            self._run_step(step)
+        wait(pending)
+
+    def _run_step(self, step):
+        try:
+            self.run_action(step.action, step.arguments)
+        except Exception as e:
+            self.logger.error(f"Command '{step.text}' failed: {e}")
+
+    def _pool(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="macro")
+            return self._executor
@@ -1,33 +1,219 @@
+import sys
+import queue
 import tkinter as tk
-from tkinter import scrolledtext, messagebox
+from tkinter import scrolledtext, messagebox, filedialog
 import threading
+import concurrent.futures
+from collections import deque
 from functools import partial
 import logging
-from voice_recognition import VoiceRecognizer
-from command_handler import CommandHandler
+import latency
+from config import load_config
+
+# The speech, audio and volume modules (speech_recognition, numpy, pycaw) are
+# imported where they are first used, after the window is up, so a frozen
+# build shows the window before they load
+
+# Lines kept in the GUI log view; older lines are trimmed
+LOG_MAX_LINES = 1000
+# How often (ms) the Tk main loop moves queued log records into the view, and at most how many
+LOG_POLL_MS = 100
+LOG_BATCH_SIZE = 500
+# How often (ms) the latency table is refreshed
+LATENCY_REFRESH_MS = 1000
+# Order of the stages in the latency table; recognize_<backend> follows preprocess
+LATENCY_STAGES = ["vad", "wake_word", "capture", "recognize", "recognition_cache", "preprocess",
+                  "execute_command", "find_app", "launch", "total"]
+
+
+def format_latency_table(stats):
+    """Formats tracer stats as a fixed-width table, stages in pipeline order."""
+    if not stats:
+        return "No commands timed yet."
+
+    def order(stage):
+        if stage in LATENCY_STAGES:
+            return LATENCY_STAGES.index(stage), stage
+        if stage.startswith("recognize_"):
+            return LATENCY_STAGES.index("preprocess") + 0.5, stage
+        return len(LATENCY_STAGES), stage
+
+    lines = [f"{'stage':<18}{'count':>6}{'p50':>9}{'p90':>9}{'p99':>9}  ms"]
+    for stage in sorted(stats, key=order):
+        s = stats[stage]
+        lines.append(f"{stage:<18}{s['count']:>6}{s['p50_ms']:>9.1f}{s['p90_ms']:>9.1f}{s['p99_ms']:>9.1f}")
+    return "\n".join(lines)
 
 class ScrolledTextHandler(logging.Handler):
-    def __init__(self, text_widget):
+    """
+    Logging handler for the GUI log view. Records may come from any thread:
+    emit() only queues the formatted line, and the Tk main loop moves queued
+    lines into the widget in batches on a timer. The view keeps the most
+    recent max_lines lines.
+    """
+    def __init__(self, text_widget, max_lines=LOG_MAX_LINES, poll_ms=LOG_POLL_MS, batch_size=LOG_BATCH_SIZE):
         super().__init__()
         self.text_widget = text_widget
+        self.max_lines = max_lines
+        self.poll_ms = poll_ms
+        self.batch_size = batch_size
+        # Lines older than max_lines would be trimmed right away, so the queue drops them
+        self._pending = deque(maxlen=max_lines)
+        self._line_count = 0
 
     def emit(self, record):
-        msg = self.format(record)
+        try:
+            msg = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        self._pending.append(msg)
+
+    def start(self):
+        """Starts moving queued lines into the view on the Tk timer."""
+        self.text_widget.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self.drain()
+        self.text_widget.after(self.poll_ms, self._poll)
+
+    def drain(self):
+        """Moves up to batch_size queued lines into the view. Must run on the Tk thread."""
+        lines = []
+        try:
+            while len(lines) < self.batch_size:
+                lines.append(self._pending.popleft())
+        except IndexError:
+            pass
+        if not lines:
+            return 0
+
+        text = "\n".join(lines) + "\n"
         self.text_widget.config(state='normal')
-        self.text_widget.insert(tk.END, msg + '\n')
+        self.text_widget.insert(tk.END, text)
+        self._line_count += text.count("\n")
+        excess = self._line_count - self.max_lines
+        if excess > 0:
+            self.text_widget.delete("1.0", f"{excess + 1}.0")
+            self._line_count -= excess
         self.text_widget.config(state='disabled')
         self.text_widget.see(tk.END)
+        return len(lines)
+
+class TkBridge:
+    """
+    Runs calls from worker threads on the Tk main thread. Tk is not thread
+    safe, so calls are queued and the main loop picks them up on a timer.
+    """
+
+    def __init__(self, root, poll_ms=50):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._calls = queue.Queue()
+        self._main_thread = threading.current_thread()
+        self.root.after(self.poll_ms, self._poll)
+
+    def call(self, func, *args):
+        """Runs func(*args) on the Tk thread and returns its result."""
+        return self._submit(func, args).result()
+
+    def post(self, func, *args):
+        """Runs func(*args) on the Tk thread without waiting for it."""
+        self._submit(func, args)
+
+    def _submit(self, func, args):
+        future = concurrent.futures.Future()
+        if threading.current_thread() is self._main_thread:
+            try:
+                future.set_result(func(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        self._calls.put((future, func, args))
+        return future
+
+    def _poll(self):
+        while True:
+            try:
+                future, func, args = self._calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                future.set_result(func(*args))
+            except Exception as e:
+                future.set_exception(e)
+        self.root.after(self.poll_ms, self._poll)
+
+
+def create_components(config, logger, status=None):
+    """
+    Creates the command handler and voice recognizer, importing their modules
+    on first use. status(text), when given, is called as each stage starts.
+    """
+    status = status or (lambda text: None)
+    status("Loading commands...")
+    from command_handler import CommandHandler
+    command_handler = CommandHandler(logger=logger)
+    command_handler.load_macros(config["macros"])
+    status("Opening the microphone...")
+    return command_handler, create_recognizer(config, logger)
+
+
+def track_vocabulary(command_handler, voice_recognizer, wake_word):
+    """Decodes against the command vocabulary, regenerated whenever the app index changes."""
+    def update_grammar(*args):
+        voice_recognizer.set_grammar(command_handler.vocabulary(), wake_word, accepts=command_handler.parse)
+    command_handler.app_finder.add_listener(update_grammar)
+    update_grammar()
+
+
+def create_recognizer(config, logger, source=None):
+    """Creates a voice recognizer as configured, on source (default: the microphone)."""
+    from voice_recognition import VoiceRecognizer
+    backend = config["recognizer_backend"]
+    resilience = config["resilience"]
+    if resilience is not None and resilience.get("fallback"):
+        resilience = dict(resilience, fallback_options=config["backend_options"].get(resilience["fallback"]))
+    return VoiceRecognizer(
+        logger=logger,
+        wake_word_templates=config["wake_word_templates"],
+        backend=backend,
+        backend_options=config["backend_options"].get(backend),
+        endpointing=config["endpointing"],
+        recognition_cache=config["recognition_cache"],
+        preprocessing=config["audio_preprocessing"],
+        resilience=resilience,
+        source=source,
+    )
+
+
+def create_core(voice_recognizer, command_handler, config, logger=None):
+    """Wires the microphone, recognizer and command handler into the asyncio core."""
+    from voice_core import VoiceCore
+    wake_word = config["wake_word"].lower()
+    return VoiceCore(
+        voice_recognizer.microphone,
+        voice_recognizer.create_segmenter(on_partial=partial(command_handler.speculate, wake_word=wake_word)),
+        partial(voice_recognizer.recognize_utterance, wake_word=wake_word),
+        command_handler.execute_command,
+        logger=logger,
+    )
+
 
 class VoiceControlApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Voice Control System")
-        self.root.geometry("600x400")
+        self.root.geometry("640x560")
 
         # Main frame
         main_frame = tk.Frame(root)
         main_frame.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
 
+        # Startup progress, then readiness
+        self.status_label = tk.Label(main_frame, text="Starting...", anchor=tk.W)
+        self.status_label.pack(fill=tk.X)
+
         # Log display
         log_label = tk.Label(main_frame, text="Real-time Log")
         log_label.pack(anchor=tk.W)
@@ -35,12 +221,15 @@ class VoiceControlApp:
         self.log_display = scrolledtext.ScrolledText(main_frame, state='disabled', wrap=tk.WORD, height=15)
         self.log_display.pack(fill=tk.BOTH, expand=True)
 
-        # Placeholder for application management
+        # Where the time goes between saying a command and it taking effect
         app_management_frame = tk.LabelFrame(main_frame, text="Application Management")
         app_management_frame.pack(fill=tk.X, pady=10)
 
-        placeholder_label = tk.Label(app_management_frame, text="Application configuration will be here.")
-        placeholder_label.pack(padx=10, pady=10)
+        self.latency_label = tk.Label(app_management_frame, text=format_latency_table({}), font=("Courier", 9),
+                                      justify=tk.LEFT, anchor=tk.W)
+        self.latency_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10, pady=10)
+        export_button = tk.Button(app_management_frame, text="Export...", command=self.export_latency)
+        export_button.pack(side=tk.RIGHT, padx=10, pady=10)
 
         # Set up logging
         self.logger = logging.getLogger()
@@ -51,11 +240,35 @@ class VoiceControlApp:
         gui_handler = ScrolledTextHandler(self.log_display)
         gui_handler.setFormatter(formatter)
         self.logger.addHandler(gui_handler)
+        gui_handler.start()
+
+        self.bridge = TkBridge(self.root)
 
         self.logger.info("Application started. Initializing...")
+        self.config = load_config(logger=self.logger)
+        latency.tracer.enabled = self.config["latency_tracing"]
+        self.refresh_latency()
+
+        # The window is up; everything slow loads on the listener thread
+        self.command_handler = None
+        self.voice_recognizer = None
+        self.core = None
+        self._closing = False
+        self.listener_thread = threading.Thread(target=self.start_listening, daemon=True)
+        self.listener_thread.start()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def set_status(self, text):
+        """Shows text in the status line. Safe to call from any thread."""
+        self.bridge.post(partial(self.status_label.config, text=text))
 
-        self.command_handler = CommandHandler(logger=self.logger)
-        self.voice_recognizer = VoiceRecognizer(logger=self.logger)
+    def load_components(self):
+        """Creates the command handler, recognizer and core. Runs on the listener thread."""
+        self.command_handler, self.voice_recognizer = create_components(
+            self.config, self.logger, status=self.set_status
+        )
+
+        track_vocabulary(self.command_handler, self.voice_recognizer, self.config["wake_word"])
 
         # Set up the shutdown command with the GUI confirmation
         self.command_handler.commands['shutdown'] = partial(
@@ -73,19 +286,112 @@ class VoiceControlApp:
             )
         )
 
-        self.listener_thread = threading.Thread(target=self.start_listening, daemon=True)
-        self.listener_thread.start()
+        self.core = create_core(self.voice_recognizer, self.command_handler, self.config, logger=self.logger)
+        self.set_status(f"Ready. Say '{self.config['wake_word']}' followed by a command.")
+
+    def refresh_latency(self):
+        """Redraws the latency table, then again every LATENCY_REFRESH_MS on the Tk timer."""
+        if latency.tracer.enabled:
+            text = format_latency_table(latency.tracer.stats())
+        else:
+            text = "Latency tracing is off (latency_tracing in the configuration)."
+        self.latency_label.config(text=text)
+        self.root.after(LATENCY_REFRESH_MS, self.refresh_latency)
+
+    def export_latency(self):
+        path = filedialog.asksaveasfilename(
+            title="Export latency statistics",
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("CSV", "*.csv")],
+        )
+        if not path:
+            return
+        try:
+            latency.tracer.export(path)
+            self.logger.info(f"Latency statistics exported to {path}")
+        except OSError as e:
+            self.logger.error(f"Could not export latency statistics: {e}")
 
     def start_listening(self):
-        while True:
-            command = self.voice_recognizer.listen_for_command()
-            if command:
-                self.command_handler.execute_command(command)
+        """
+        Loads the components if that hasn't happened yet, then runs the
+        asyncio core on the listener thread until the window is closed.
+        """
+        if self.core is None:
+            try:
+                self.load_components()
+            except Exception as e:
+                self.logger.error(f"Startup failed: {e}")
+                self.set_status(f"Startup failed: {e}")
+                return
+        if self._closing:
+            return
+        import asyncio
+        asyncio.run(self.core.run())
+
+    def on_close(self):
+        self._closing = True
+        if self.core:
+            self.core.stop()
+        self.root.destroy()
 
     def show_confirmation_popup(self, title, message):
-        return messagebox.askyesno(title, message)
+        # Commands run on worker threads; dialogs must open on the Tk thread
+        return self.bridge.call(messagebox.askyesno, title, message)
+
+def run_headless():
+    """Runs the voice loop without the GUI, logging to the console."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger()
+    config = load_config(logger=logger)
+    latency.tracer.enabled = config["latency_tracing"]
+    command_handler, voice_recognizer = create_components(config, logger, status=logger.info)
+    track_vocabulary(command_handler, voice_recognizer, config["wake_word"])
+    core = create_core(voice_recognizer, command_handler, config, logger=logger)
+    import asyncio
+    try:
+        asyncio.run(core.run())
+    except KeyboardInterrupt:
+        core.stop()
+
+def run_service():
+    """
+    Runs the voice service: a session per configured input source, and the
+    local HTTP API for text commands, recorded audio and more sessions.
+    """
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger()
+    config = load_config(logger=logger)
+    latency.tracer.enabled = config["latency_tracing"]
+    options = config["service"]
+    from command_handler import CommandHandler
+    from service import SERVICE_HOST, SERVICE_PORT, ServiceServer, VoiceService, open_source
+    command_handler = CommandHandler(logger=logger)
+    command_handler.load_macros(config["macros"])
+    service = VoiceService(command_handler, partial(create_recognizer, config, logger), logger=logger)
+    for session in options.get("sessions", []):
+        try:
+            service.start_session(session["id"], open_source(session.get("source")),
+                                  session.get("wake_word", config["wake_word"]))
+        except Exception as e:
+            logger.error(f"Could not start session '{session.get('id')}': {e}")
+    server = ServiceServer(service, options.get("host", SERVICE_HOST), options.get("port", SERVICE_PORT),
+                           token=options.get("token"), wake_word=config["wake_word"])
+    logger.info(f"Voice service listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
 
 if __name__ == '__main__':
-    root = tk.Tk()
-    app = VoiceControlApp(root)
-    root.mainloop()
+    if "--service" in sys.argv:
+        run_service()
+    elif "--headless" in sys.argv:
+        run_headless()
+    else:
+        root = tk.Tk()
+        app = VoiceControlApp(root)
+        root.mainloop()
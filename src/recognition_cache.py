@@ -0,0 +1,188 @@
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+from audio_features import MfccExtractor
+
+# Most recent distinct utterances kept
+CACHE_CAPACITY = 128
+# Fingerprints are the voiced MFCC frames pooled to this many steps...
+FINGERPRINT_FRAMES = 32
+# ...and quantized to int8 in steps of this size
+QUANTIZATION_STEP = 0.25
+# A cached utterance matches when, after aligning the two fingerprints with
+# DTW, the average frame distance and the largest one stay under these. The
+# largest distance keeps commands that differ in a single word apart.
+MAX_MEAN_DISTANCE = 3.0
+MAX_FRAME_DISTANCE = 6.0
+# How far (in fingerprint steps) DTW may shift one utterance against the other
+ALIGNMENT_BAND = 4
+# Utterances whose lengths differ by more than this ratio are never compared
+MAX_DURATION_RATIO = 1.3
+# Only transcripts the backend is at least this sure of are cached
+MIN_CONFIDENCE = 0.8
+# Frames quieter than this (dB), or this far below the loudest frame, are not voiced
+MIN_ENERGY_DB = -55.0
+VOICED_RANGE_DB = 35.0
+# Utterances with fewer voiced feature frames (10 ms each) are not fingerprinted
+MIN_VOICED_FRAMES = 20
+
+
+class Fingerprint:
+    """Compact acoustic summary of an utterance: pooled, quantized MFCCs and the voiced duration."""
+    __slots__ = ("codes", "duration")
+
+    def __init__(self, codes, duration):
+        self.codes = codes
+        self.duration = duration
+
+    def features(self):
+        return self.codes.astype(np.float32) * QUANTIZATION_STEP
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "text", "confidence", "hits")
+
+    def __init__(self, fingerprint, text, confidence):
+        self.fingerprint = fingerprint
+        self.text = text
+        self.confidence = confidence
+        self.hits = 0
+
+
+def _dtw(features, candidates, band=ALIGNMENT_BAND):
+    """
+    Aligns one fingerprint with each of the candidates (an array of shape
+    (n, frames, coefficients)) at once. Returns the mean and the largest frame
+    distance along each candidate's best path.
+    """
+    distances = np.linalg.norm(features[None, :, None, :] - candidates[:, None, :, :], axis=3)
+    count, frames = distances.shape[0], distances.shape[1]
+    cost = np.full((count, frames + 1, frames + 1), np.inf)
+    length = np.zeros_like(cost)
+    worst = np.zeros_like(cost)
+    cost[:, 0, 0] = 0.0
+    rows = np.arange(count)
+    for i in range(1, frames + 1):
+        for j in range(max(1, i - band), min(frames, i + band) + 1):
+            # Predecessors: diagonal, vertical, horizontal
+            options = np.stack((cost[:, i - 1, j - 1], cost[:, i - 1, j], cost[:, i, j - 1]))
+            best = np.argmin(options, axis=0)
+            previous_i = i - (best != 2)
+            previous_j = j - (best != 1)
+            step = distances[:, i - 1, j - 1]
+            cost[:, i, j] = options[best, rows] + step
+            length[:, i, j] = length[rows, previous_i, previous_j] + 1.0
+            worst[:, i, j] = np.maximum(worst[rows, previous_i, previous_j], step)
+    return cost[:, frames, frames] / length[:, frames, frames], worst[:, frames, frames]
+
+
+class RecognitionCache:
+    """
+    Remembers recent transcripts by what the utterance sounded like, so saying
+    the same command again is answered without calling the recognizer. Each
+    utterance is reduced to a small fingerprint of its MFCCs; a new utterance
+    is compared against all cached fingerprints in one vectorized pass, and
+    the least recently used entry is evicted when the cache is full.
+
+    Only confident transcripts are stored (see ``store``), so one
+    misrecognition is not repeated every time the command is said.
+    """
+
+    def __init__(self, sample_rate, capacity=CACHE_CAPACITY, max_mean_distance=MAX_MEAN_DISTANCE,
+                 max_frame_distance=MAX_FRAME_DISTANCE, min_confidence=MIN_CONFIDENCE, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.sample_rate = sample_rate
+        self.capacity = capacity
+        self.max_mean_distance = max_mean_distance
+        self.max_frame_distance = max_frame_distance
+        self.min_confidence = min_confidence
+        self._extractor = MfccExtractor(sample_rate)
+        self._entries = OrderedDict()
+        self._next_key = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.rejected = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def fingerprint(self, samples):
+        """Returns the Fingerprint of float samples, or None when too little of it is voiced."""
+        mfcc, energy = self._extractor.extract(samples)
+        if not len(mfcc):
+            return None
+        voiced = (energy > energy.max() - VOICED_RANGE_DB) & (energy > MIN_ENERGY_DB)
+        if np.count_nonzero(voiced) < MIN_VOICED_FRAMES:
+            return None
+        first, last = np.argmax(voiced), len(voiced) - np.argmax(voiced[::-1])
+        # Cepstral mean normalization removes the microphone and room; the energy coefficient is dropped
+        features = (mfcc - mfcc[voiced].mean(axis=0))[first:last, 1:]
+        pooled = np.array([part.mean(axis=0) for part in np.array_split(features, FINGERPRINT_FRAMES)])
+        codes = np.clip(np.round(pooled / QUANTIZATION_STEP), -127, 127).astype(np.int8)
+        return Fingerprint(codes, (last - first) * self._extractor.hop_length / self.sample_rate)
+
+    def lookup(self, fingerprint):
+        """Returns the cached transcript of an utterance that sounds the same, or None."""
+        if fingerprint is None:
+            return None
+        with self._lock:
+            keys = [key for key, entry in self._entries.items()
+                    if max(entry.fingerprint.duration, fingerprint.duration)
+                    <= MAX_DURATION_RATIO * min(entry.fingerprint.duration, fingerprint.duration)]
+            if not keys:
+                self.misses += 1
+                return None
+            candidates = np.stack([self._entries[key].fingerprint.features() for key in keys])
+            mean, worst = _dtw(fingerprint.features(), candidates)
+            matching = (mean <= self.max_mean_distance) & (worst <= self.max_frame_distance)
+            if not matching.any():
+                self.misses += 1
+                return None
+            index = int(np.argmin(np.where(matching, mean, np.inf)))
+            entry = self._entries[keys[index]]
+            self._entries.move_to_end(keys[index])
+            entry.hits += 1
+            self.hits += 1
+            self.logger.debug(f"Recognition cache hit: '{entry.text}' (distance {mean[index]:.2f}).")
+            return entry.text
+
+    def store(self, fingerprint, text, confidence=None):
+        """
+        Caches the transcript of a fingerprinted utterance if the backend's
+        confidence reaches ``min_confidence``. Transcripts without a confidence
+        are only cached when ``min_confidence`` is None. Returns whether it
+        was stored.
+        """
+        if fingerprint is None or not text:
+            return False
+        if self.min_confidence is not None and (confidence is None or confidence < self.min_confidence):
+            self.rejected += 1
+            return False
+        with self._lock:
+            self._entries[self._next_key] = _Entry(fingerprint, text, confidence)
+            self._next_key += 1
+            self.stores += 1
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "rejected_low_confidence": self.rejected,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,195 @@
+import os
+import json
+import logging
+import tempfile
+import speech_recognition as sr
+
+# Sample rate the offline engines are fed with
+OFFLINE_SAMPLE_RATE = 16000
+
+
+class RecognizerBackend:
+    """
+    Base class for speech-to-text engines. ``recognize`` takes an
+    ``sr.AudioData`` and returns the transcript, raising ``sr.UnknownValueError``
+    when nothing was understood and ``sr.RequestError`` when the engine failed.
+    Backends with ``supports_grammar`` restrict decoding to the phrases of the
+    ``CommandGrammar`` given to ``set_grammar``; backends with
+    ``supports_partials`` can also decode an utterance while it is spoken,
+    through ``stream``. ``native_rate`` is the sample rate the engine works
+    at, which audio is best resampled to before it is sent (None: any).
+    """
+    name = None
+    offline = False
+    supports_grammar = False
+    supports_partials = False
+    native_rate = None
+    grammar = None
+
+    def set_grammar(self, grammar):
+        self.grammar = grammar
+
+    def recognize(self, audio):
+        raise NotImplementedError
+
+    def recognize_with_confidence(self, audio):
+        """Like ``recognize``, but returns (transcript, confidence from 0 to 1, or None if unknown)."""
+        return self.recognize(audio), None
+
+    def stream(self, sample_rate, sample_width):
+        """
+        Starts decoding an utterance incrementally. Returns a stream whose
+        ``feed(pcm)`` takes the next raw audio and returns the transcript so
+        far (a partial hypothesis).
+        """
+        raise NotImplementedError
+
+
+class GoogleBackend(RecognizerBackend):
+    """
+    The Google Web Speech API, through SpeechRecognition. Audio is uploaded as
+    FLAC; ``endpoint`` overrides the API's URL (e.g. for a proxy).
+    """
+    name = "google"
+    native_rate = 16000
+
+    def __init__(self, recognizer=None, language="en-US", key=None, endpoint=None):
+        self.recognizer = recognizer or sr.Recognizer()
+        self.language = language
+        self.key = key
+        self.options = {"endpoint": endpoint} if endpoint else {}
+
+    def recognize(self, audio):
+        return self.recognizer.recognize_google(audio, key=self.key, language=self.language, **self.options)
+
+    def recognize_with_confidence(self, audio):
+        return self.recognizer.recognize_google(audio, key=self.key, language=self.language, with_confidence=True,
+                                                **self.options)
+
+
+class VoskBackend(RecognizerBackend):
+    """Fully offline recognition with a local Vosk (Kaldi) model."""
+    name = "vosk"
+    offline = True
+    supports_grammar = True
+    supports_partials = True
+    _grammar_json = None
+
+    def __init__(self, model_path, recognizer=None, sample_rate=OFFLINE_SAMPLE_RATE):
+        try:
+            import vosk
+        except ImportError as e:
+            raise ImportError("The 'vosk' backend needs the vosk package (pip install vosk).") from e
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.model = vosk.Model(model_path)
+        self.sample_rate = self.native_rate = sample_rate
+
+    def set_grammar(self, grammar):
+        self.grammar = grammar
+        self._grammar_json = grammar.to_vosk() if grammar else None
+
+    def _new_recognizer(self):
+        if self._grammar_json:
+            return self._vosk.KaldiRecognizer(self.model, self.sample_rate, self._grammar_json)
+        return self._vosk.KaldiRecognizer(self.model, self.sample_rate)
+
+    def recognize(self, audio):
+        return self.recognize_with_confidence(audio)[0]
+
+    def recognize_with_confidence(self, audio):
+        decoder = self._new_recognizer()
+        # Per-word confidences, averaged into the transcript's
+        decoder.SetWords(True)
+        decoder.AcceptWaveform(audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2))
+        result = json.loads(decoder.FinalResult())
+        text = result.get("text", "").strip()
+        if not text:
+            raise sr.UnknownValueError()
+        confidences = [word["conf"] for word in result.get("result", []) if "conf" in word]
+        return text, sum(confidences) / len(confidences) if confidences else None
+
+    def stream(self, sample_rate, sample_width):
+        return VoskStream(self._new_recognizer(), sample_rate, sample_width, self.sample_rate)
+
+
+class VoskStream:
+    """Incremental Vosk decoding of one utterance, for partial hypotheses."""
+
+    def __init__(self, decoder, sample_rate, sample_width, model_rate):
+        self.decoder = decoder
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.model_rate = model_rate
+        # Segments Vosk has already finalized within the utterance
+        self._final = []
+
+    def feed(self, pcm):
+        audio = sr.AudioData(pcm, self.sample_rate, self.sample_width)
+        if self.decoder.AcceptWaveform(audio.get_raw_data(convert_rate=self.model_rate, convert_width=2)):
+            text = json.loads(self.decoder.Result()).get("text", "")
+            if text:
+                self._final.append(text)
+            partial = ""
+        else:
+            partial = json.loads(self.decoder.PartialResult()).get("partial", "")
+        return " ".join(self._final + [partial]).strip()
+
+
+class SphinxBackend(RecognizerBackend):
+    """Fully offline recognition with CMU PocketSphinx, through SpeechRecognition."""
+    name = "sphinx"
+    offline = True
+    supports_grammar = True
+    native_rate = OFFLINE_SAMPLE_RATE
+    _grammar_path = None
+
+    def __init__(self, recognizer=None, language="en-US"):
+        try:
+            import pocketsphinx  # noqa: F401
+        except ImportError as e:
+            raise ImportError("The 'sphinx' backend needs the pocketsphinx package (pip install pocketsphinx).") from e
+        self.recognizer = recognizer or sr.Recognizer()
+        self.language = language
+
+    def set_grammar(self, grammar):
+        # PocketSphinx reads JSGF grammars from a file
+        self.grammar = grammar
+        if grammar is None:
+            self._grammar_path = None
+            return
+        fd, path = tempfile.mkstemp(prefix="voice-control-", suffix=".gram")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(grammar.to_jsgf())
+        previous, self._grammar_path = self._grammar_path, path
+        if previous:
+            try:
+                os.remove(previous)
+            except OSError:
+                pass
+
+    def recognize(self, audio):
+        if self._grammar_path:
+            return self.recognizer.recognize_sphinx(audio, language=self.language, grammar=self._grammar_path)
+        return self.recognizer.recognize_sphinx(audio, language=self.language)
+
+
+BACKENDS = {backend.name: backend for backend in (GoogleBackend, VoskBackend, SphinxBackend)}
+
+
+def create_backend(name, recognizer=None, logger=None, **options):
+    """
+    Creates the named backend. If it cannot be created (unknown name, missing
+    package or model), the error is logged and the Google backend is used.
+    """
+    logger = logger or logging.getLogger(__name__)
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        logger.error(f"Unknown recognizer backend '{name}'; using 'google'.")
+        return GoogleBackend(recognizer)
+    try:
+        return backend_class(recognizer=recognizer, **options)
+    except Exception as e:
+        logger.error(f"Failed to initialize the '{name}' recognizer backend: {e}; using 'google'.")
+        return GoogleBackend(recognizer)
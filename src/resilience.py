@@ -0,0 +1,230 @@
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import speech_recognition as sr
+from recognizer_backends import BACKENDS, RecognizerBackend
+
+# Seconds a recognition may take in all, retries and hedges included
+DEADLINE_S = 10.0
+# Further attempts after a failed request, with exponential backoff and full jitter
+RETRIES = 1
+BACKOFF_S = 0.2
+MAX_BACKOFF_S = 2.0
+# A second request is started when the first has not answered after this long
+HEDGE_AFTER_MS = 2500
+# Consecutive failed recognitions that open the circuit, and seconds until it is tried again
+FAILURE_THRESHOLD = 3
+RESET_S = 30.0
+# Requests in flight at once, abandoned ones included
+REQUEST_WORKERS = 8
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing service. After failure_threshold consecutive
+    failures the circuit opens and allow() refuses calls; after reset_s one
+    trial call is let through, and its outcome closes or reopens the circuit.
+    """
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_s=RESET_S, logger=None, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_s = reset_s
+        self.logger = logger or logging.getLogger(__name__)
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and self.clock() - self._opened_at >= self.reset_s:
+                # Let one trial call through
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                self.logger.info("Recognition service is back; circuit closed.")
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                if self.state == "closed":
+                    self.logger.warning(f"Recognition failed {self.failures} times in a row; circuit opened "
+                                        f"for {self.reset_s:g}s.")
+                self.state = "open"
+                self._opened_at = self.clock()
+
+
+class ResilientBackend(RecognizerBackend):
+    """
+    Wraps a recognizer backend (typically the online one) so a recognition
+    never outlasts deadline_s: failed requests are retried with jittered
+    backoff, a request that is slow to answer is hedged with a second one
+    (to the fallback engine if there is one, otherwise the same backend),
+    and the first answer wins. When the backend keeps failing, the circuit
+    breaker sends recognitions straight to the local fallback engine until
+    it has had time to recover. Errors are raised as sr.RequestError.
+    """
+
+    def __init__(self, primary, fallback=None, deadline_s=DEADLINE_S, retries=RETRIES, backoff_s=BACKOFF_S,
+                 max_backoff_s=MAX_BACKOFF_S, hedge_after_ms=HEDGE_AFTER_MS, failure_threshold=FAILURE_THRESHOLD,
+                 reset_s=RESET_S, logger=None, clock=time.monotonic, sleep=time.sleep):
+        self.primary = primary
+        self.fallback = fallback
+        self.deadline_s = deadline_s
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.hedge_after_s = None if hedge_after_ms is None else hedge_after_ms / 1000.0
+        self.logger = logger or logging.getLogger(__name__)
+        self.clock = clock
+        self.sleep = sleep
+        self.breaker = CircuitBreaker(failure_threshold, reset_s, logger=self.logger, clock=clock)
+        self.counts = {"calls": 0, "retries": 0, "hedges": 0, "fallbacks": 0, "failures": 0}
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        # Bounds the socket wait of an abandoned online request
+        if getattr(primary, "recognizer", None) is not None:
+            primary.recognizer.operation_timeout = deadline_s
+
+    # Recognized like the primary backend; the fallback only stands in for it
+    @property
+    def name(self):
+        return self.primary.name
+
+    @property
+    def offline(self):
+        return self.primary.offline
+
+    @property
+    def supports_grammar(self):
+        return self.primary.supports_grammar
+
+    @property
+    def supports_partials(self):
+        return self.primary.supports_partials
+
+    @property
+    def native_rate(self):
+        return self.primary.native_rate
+
+    def set_grammar(self, grammar):
+        self.grammar = grammar
+        self.primary.set_grammar(grammar)
+        if self.fallback is not None:
+            self.fallback.set_grammar(grammar)
+
+    def stream(self, sample_rate, sample_width):
+        return self.primary.stream(sample_rate, sample_width)
+
+    def recognize(self, audio):
+        return self._call("recognize", audio)
+
+    def recognize_with_confidence(self, audio):
+        return self._call("recognize_with_confidence", audio)
+
+    def _call(self, method, audio):
+        self.counts["calls"] += 1
+        if not self.breaker.allow():
+            if self.fallback is None:
+                raise sr.RequestError("the recognition service is failing; not calling it for now")
+            return self._run_fallback(method, audio)
+        try:
+            result = self._attempts(method, audio, self.clock() + self.deadline_s)
+        except sr.UnknownValueError:
+            # The service worked; there just were no words
+            self.breaker.record_success()
+            raise
+        except sr.RequestError as e:
+            self.counts["failures"] += 1
+            self.breaker.record_failure()
+            if self.fallback is None:
+                raise
+            self.logger.warning(f"Recognition failed ({e}); using the '{self.fallback.name}' engine.")
+            return self._run_fallback(method, audio)
+        self.breaker.record_success()
+        return result
+
+    def _run_fallback(self, method, audio):
+        self.counts["fallbacks"] += 1
+        return getattr(self.fallback, method)(audio)
+
+    def _attempts(self, method, audio, deadline):
+        """Tries the request until it succeeds, the retries run out or the deadline passes."""
+        for attempt in range(self.retries + 1):
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                break
+            try:
+                return self._hedged(method, audio, remaining)
+            except sr.RequestError as e:
+                error = e
+            if attempt == self.retries:
+                raise error
+            delay = random.uniform(0.0, min(self.max_backoff_s, self.backoff_s * 2 ** attempt))
+            if self.clock() + delay >= deadline:
+                raise error
+            self.logger.info(f"Recognition request failed ({error}); retrying in {delay:.2f}s.")
+            self.counts["retries"] += 1
+            self.sleep(delay)
+        raise sr.RequestError(f"recognition timed out after {self.deadline_s:g}s")
+
+    def _hedged(self, method, audio, timeout):
+        """Runs one request, adding a hedge if it is slow; returns the first answer."""
+        deadline = self.clock() + timeout
+        pending = {self._submit(self.primary, method, audio)}
+        if self.hedge_after_s is not None and self.hedge_after_s < timeout:
+            done, _ = wait(pending, timeout=self.hedge_after_s)
+            if not done:
+                self.counts["hedges"] += 1
+                pending.add(self._submit(self.fallback or self.primary, method, audio))
+        error = no_answer = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - self.clock()), return_when=FIRST_COMPLETED)
+            if not done:
+                # Still running: abandoned, and bounded by the operation timeout
+                raise sr.RequestError(f"recognition timed out after {timeout:.3g}s")
+            for future in done:
+                try:
+                    return future.result()
+                except sr.UnknownValueError as e:
+                    # One engine heard no words; another may still
+                    no_answer = e
+                except sr.RequestError as e:
+                    error = e
+                except OSError as e:
+                    error = sr.RequestError(f"recognition connection failed: {e}")
+        raise error or no_answer
+
+    def _submit(self, backend, method, audio):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=REQUEST_WORKERS, thread_name_prefix="recognize")
+            return self._executor.submit(getattr(backend, method), audio)
+
+
+def wrap_backend(primary, fallback=None, fallback_options=None, recognizer=None, logger=None, **options):
+    """
+    Wraps primary in a ResilientBackend with the named local fallback engine
+    (e.g. "vosk"), if it can be created. options are ResilientBackend's.
+    """
+    logger = logger or logging.getLogger(__name__)
+    fallback_backend = None
+    if fallback and fallback != primary.name:
+        try:
+            fallback_backend = BACKENDS[fallback](recognizer=recognizer, **(fallback_options or {}))
+        except Exception as e:
+            logger.error(f"Failed to initialize the '{fallback}' fallback recognizer: {e}; recognizing without one.")
+    return ResilientBackend(primary, fallback_backend, logger=logger, **options)
+
@@ -0,0 +1,378 @@
+import io
+import hmac
+import json
+import secrets
+import time
+import asyncio
+import logging
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import speech_recognition as sr
+import latency
+from voice_core import VoiceCore
+
+# Only local clients by default: the API runs commands, including shutdown
+SERVICE_HOST = "127.0.0.1"
+SERVICE_PORT = 8765
+# Threads serving HTTP requests; further requests wait for a free one
+REQUEST_WORKERS = 8
+# Listening sessions (input sources) running at once
+MAX_SESSIONS = 4
+# Largest request body accepted (an uploaded WAV of about 8 minutes at 16 kHz)
+MAX_BODY_BYTES = 16 * 1024 * 1024
+# Host header values of local clients; any other name may be a DNS rebinding attack
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+class ServiceError(Exception):
+    """A request the service refuses, with the HTTP status to answer with."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def open_source(spec):
+    """
+    Opens the audio source of a session setting: "microphone" (the default
+    device), {"device_index": 1} or {"file": "recording.wav"}.
+    """
+    if spec is None or spec == "microphone":
+        return sr.Microphone()
+    if isinstance(spec, dict) and "file" in spec:
+        return sr.AudioFile(spec["file"])
+    if isinstance(spec, dict) and "device_index" in spec:
+        return sr.Microphone(device_index=int(spec["device_index"]))
+    raise ServiceError(400, f"Unknown audio source: {spec!r}")
+
+
+class Session:
+    """One input source, listening for its own wake word."""
+
+    def __init__(self, session_id, recognizer, wake_word):
+        self.id = session_id
+        self.recognizer = recognizer
+        self.wake_word = wake_word.lower()
+        self.core = None
+        self.future = None
+        self.recognitions = 0
+        self.commands = 0
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "wake_word": self.wake_word,
+            "listening": self.future is not None and not self.future.done(),
+            "recognitions": self.recognitions,
+            "commands": self.commands,
+        }
+
+
+class VoiceService:
+    """
+    Runs commands for several sessions against one command handler. Each
+    session has its own audio source, recognizer and wake word, and listens
+    on a worker of a pool of max_sessions; commands can also be sent as
+    text, or as recorded audio to recognize. create_recognizer(source)
+    returns a VoiceRecognizer reading from source.
+    """
+
+    def __init__(self, command_handler, create_recognizer, max_sessions=MAX_SESSIONS, logger=None, tracer=None):
+        self.command_handler = command_handler
+        self.create_recognizer = create_recognizer
+        self.max_sessions = max_sessions
+        self.logger = logger or logging.getLogger(__name__)
+        self.tracer = tracer or latency.tracer
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_sessions, thread_name_prefix="session")
+        self._counts = {"requests": 0, "text_commands": 0, "recognitions": 0, "commands": 0, "errors": 0}
+        # Keep every session's grammar in step with the app index
+        command_handler.app_finder.add_listener(self._update_grammars)
+
+    def count(self, name, session=None):
+        with self._lock:
+            self._counts[name] += 1
+            if session is not None and hasattr(session, name):
+                setattr(session, name, getattr(session, name) + 1)
+
+    def _set_grammar(self, session):
+        session.recognizer.set_grammar(self.command_handler.vocabulary(), session.wake_word,
+                                       accepts=self.command_handler.parse)
+
+    def _update_grammars(self, *args):
+        with self._lock:
+            sessions = [session for session in self._sessions.values() if session is not None]
+        for session in sessions:
+            self._set_grammar(session)
+
+    def _session(self, session_id):
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is None:
+            raise ServiceError(404, f"No session '{session_id}'")
+        return session
+
+    def execute(self, text):
+        """Runs a text command (or sequence). Raises ServiceError when nothing matches."""
+        steps = self.command_handler.macros.plan(text)
+        if steps is None:
+            raise ServiceError(422, f"No command matches '{text}'")
+        self.count("text_commands")
+        self.command_handler.macros.run(steps)
+        return {"command": text, "actions": [step.action for step in steps]}
+
+    def recognize(self, session_id, wav_bytes, execute=True):
+        """Recognizes a WAV recording with a session's recognizer and wake word, and runs the command."""
+        session = self._session(session_id)
+        try:
+            with sr.AudioFile(io.BytesIO(wav_bytes)) as source:
+                audio = session.recognizer.recognizer.record(source)
+        except (ValueError, EOFError) as e:
+            raise ServiceError(400, f"Could not read the audio: {e}")
+        command = self._recognize(session, audio)
+        if command and execute:
+            self._execute(session, command)
+        return {"session": session.id, "command": command, "executed": bool(command and execute)}
+
+    def start_session(self, session_id, source, wake_word):
+        """Starts listening on source for wake_word followed by a command."""
+        with self._lock:
+            if session_id in self._sessions:
+                raise ServiceError(409, f"Session '{session_id}' already exists")
+            if len(self._sessions) >= self.max_sessions:
+                raise ServiceError(503, f"At most {self.max_sessions} sessions can run at once")
+            # Reserved while the recognizer is created outside the lock
+            self._sessions[session_id] = None
+        try:
+            session = Session(session_id, self.create_recognizer(source), wake_word)
+            self._set_grammar(session)
+            recognizer = session.recognizer
+            segmenter = recognizer.create_segmenter(
+                on_partial=partial(self.command_handler.speculate, wake_word=session.wake_word))
+            session.core = VoiceCore(recognizer.microphone, segmenter,
+                                     partial(self._recognize_utterance, session), partial(self._execute, session),
+                                     logger=self.logger, tracer=self.tracer)
+        except Exception:
+            with self._lock:
+                del self._sessions[session_id]
+            raise
+        with self._lock:
+            self._sessions[session_id] = session
+            session.future = self._pool.submit(asyncio.run, session.core.run())
+        session.future.add_done_callback(partial(self._session_ended, session))
+        self.logger.info(f"Session '{session_id}' listening for '{session.wake_word}'.")
+        return session.to_dict()
+
+    def _session_ended(self, session, future):
+        error = future.exception()
+        if error is not None:
+            self.count("errors")
+            self.logger.error(f"Session '{session.id}' failed: {error}")
+        else:
+            self.logger.info(f"Session '{session.id}' stopped listening.")
+
+    def stop_session(self, session_id):
+        session = self._session(session_id)
+        with self._lock:
+            del self._sessions[session_id]
+        session.core.stop()
+        return session.to_dict()
+
+    def sessions(self):
+        with self._lock:
+            return [session.to_dict() for session in self._sessions.values() if session is not None]
+
+    def _recognize_utterance(self, session, audio_bytes):
+        self.count("recognitions", session)
+        return session.recognizer.recognize_utterance(audio_bytes, wake_word=session.wake_word)
+
+    def _recognize(self, session, audio):
+        self.count("recognitions", session)
+        return session.recognizer.recognize_audio(audio, wake_word=session.wake_word)
+
+    def _execute(self, session, command):
+        self.count("commands", session)
+        self.command_handler.execute_command(command)
+
+    def metrics(self):
+        """Counters since start, rates per second, the sessions and the latency of each stage."""
+        uptime = time.monotonic() - self.started
+        with self._lock:
+            counts = dict(self._counts)
+        metrics = {"uptime_s": uptime}
+        metrics.update(counts)
+        for name in ("requests", "recognitions", "commands"):
+            metrics[f"{name}_per_second"] = counts[name] / uptime if uptime else 0.0
+        metrics["sessions"] = self.sessions()
+        metrics["latency"] = self.tracer.stats()
+        return metrics
+
+    def close(self):
+        """Stops every session."""
+        with self._lock:
+            sessions = [session for session in self._sessions.values() if session is not None]
+            self._sessions.clear()
+        for session in sessions:
+            session.core.stop()
+        self._pool.shutdown(wait=False)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON API:
+
+        GET    /metrics
+        GET    /sessions
+        POST   /sessions                  {"id": ..., "wake_word": ..., "source": ...}
+        DELETE /sessions/<id>
+        POST   /sessions/<id>/recognize   WAV body; ?execute=0 to only recognize
+        POST   /command                   {"text": "open notepad then mute"}
+    """
+    server_version = "VoiceControl"
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def _handle(self, method):
+        service = self.server.service
+        service.count("requests")
+        try:
+            self._check_origin()
+            self._authorize()
+            url = urlparse(self.path)
+            status, body = 200, self._route(service, method, [part for part in url.path.split("/") if part],
+                                            parse_qs(url.query))
+        except ServiceError as e:
+            status, body = e.status, {"error": e.message}
+        except Exception as e:
+            service.count("errors")
+            service.logger.error(f"Request {method} {self.path} failed: {e}")
+            status, body = 500, {"error": str(e)}
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self, service, method, parts, query):
+        if method == "GET" and parts == ["metrics"]:
+            return service.metrics()
+        if method == "GET" and parts == ["sessions"]:
+            return {"sessions": service.sessions()}
+        if method == "POST" and parts == ["command"]:
+            text = self._json().get("text")
+            if not isinstance(text, str) or not text.strip():
+                raise ServiceError(400, "Expected {\"text\": \"<command>\"}")
+            return service.execute(text)
+        if method == "POST" and parts == ["sessions"]:
+            options = self._json()
+            if not isinstance(options.get("id"), str):
+                raise ServiceError(400, "Expected {\"id\": \"<session id>\"}")
+            return service.start_session(options["id"], open_source(options.get("source")),
+                                         options.get("wake_word", self.server.wake_word))
+        if method == "DELETE" and len(parts) == 2 and parts[0] == "sessions":
+            return service.stop_session(parts[1])
+        if method == "POST" and len(parts) == 3 and parts[0] == "sessions" and parts[2] == "recognize":
+            execute = query.get("execute", ["1"])[0] not in ("0", "false")
+            self._require_content_type("audio/")
+            return service.recognize(parts[1], self._body(), execute=execute)
+        raise ServiceError(404, f"No such endpoint: {method} /{'/'.join(parts)}")
+
+    def _check_origin(self):
+        """Refuses requests sent by web pages, which browsers mark with an Origin or reach through a foreign Host."""
+        if self.headers.get("Origin") is not None:
+            raise ServiceError(403, "Requests from web pages are not accepted")
+        host = urlparse(f"//{self.headers.get('Host', '')}").hostname
+        if host not in self.server.allowed_hosts:
+            raise ServiceError(403, f"Unexpected Host header: {self.headers.get('Host')}")
+
+    def _authorize(self):
+        if not hmac.compare_digest(self.headers.get("Authorization", ""), f"Bearer {self.server.token}"):
+            raise ServiceError(401, "Missing or wrong token")
+
+    def _require_content_type(self, expected):
+        # Browsers send text/plain or form types without a preflight; JSON and audio bodies need one
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if not content_type.startswith(expected):
+            raise ServiceError(415, f"Expected a {expected} body, got '{content_type}'")
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ServiceError(413, f"Request body over {MAX_BODY_BYTES} bytes")
+        return self.rfile.read(length)
+
+    def _json(self):
+        self._require_content_type("application/json")
+        try:
+            data = json.loads(self._body() or b"{}")
+        except ValueError as e:
+            raise ServiceError(400, f"Invalid JSON: {e}")
+        if not isinstance(data, dict):
+            raise ServiceError(400, "Expected a JSON object")
+        return data
+
+    def log_message(self, format, *args):
+        self.server.service.logger.debug(f"{self.address_string()} {format % args}")
+
+
+class ServiceServer(HTTPServer):
+    """
+    The HTTP front end of a VoiceService. Requests are handled on a pool of
+    worker threads. Each request must carry ``Authorization: Bearer <token>``
+    (without a configured token, a random one is generated and logged), name
+    a loopback address (or the listening host) in its Host header and have no
+    Origin header, so web pages open in a browser cannot reach the API.
+    """
+    # Connections waiting to be accepted; the default of 5 drops bursts from concurrent clients
+    request_queue_size = 64
+
+    def __init__(self, service, host=SERVICE_HOST, port=SERVICE_PORT, token=None, wake_word="hey windows",
+                 workers=REQUEST_WORKERS):
+        super().__init__((host, port), _RequestHandler)
+        self.service = service
+        if not token:
+            token = secrets.token_urlsafe(24)
+            service.logger.warning(f"No service token configured; requests need the header "
+                                   f"'Authorization: Bearer {token}'")
+        self.token = token
+        self.allowed_hosts = LOOPBACK_HOSTS if host in ("", "0.0.0.0", "::") else LOOPBACK_HOSTS + (host,)
+        self.wake_word = wake_word
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="request")
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def start(self):
+        """Serves on a daemon thread; returns at once."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False)
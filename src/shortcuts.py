@@ -0,0 +1,57 @@
+import sys
+import struct
+
+# Shell Link (.lnk) layout, from the [MS-SHLLINK] specification
+_HEADER_SIZE = 0x4C
+_HAS_LINK_TARGET_ID_LIST = 0x01
+_HAS_LINK_INFO = 0x02
+_VOLUME_ID_AND_LOCAL_BASE_PATH = 0x01
+# Shortcuts are small; anything larger is not one
+_MAX_SHORTCUT_BYTES = 1 << 20
+
+
+def _c_string(data, offset, unicode=False):
+    if unicode:
+        end = offset
+        while end + 1 < len(data) and data[end:end + 2] != b"\0\0":
+            end += 2
+        return data[offset:end].decode("utf-16-le", errors="replace")
+    end = data.find(b"\0", offset)
+    # The ANSI code page of the machine that made the shortcut
+    encoding = "mbcs" if sys.platform == "win32" else "cp1252"
+    return data[offset:end if end >= 0 else len(data)].decode(encoding, errors="replace")
+
+
+def resolve_shortcut(path):
+    """
+    Returns the local target path of a Windows shortcut, read from the file
+    itself (no shell or COM call), or None if it has no local target or
+    isn't a valid shortcut.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read(_MAX_SHORTCUT_BYTES)
+    except OSError:
+        return None
+    if len(data) < _HEADER_SIZE or struct.unpack_from("<I", data, 0)[0] != _HEADER_SIZE:
+        return None
+    flags = struct.unpack_from("<I", data, 0x14)[0]
+    offset = _HEADER_SIZE
+    try:
+        if flags & _HAS_LINK_TARGET_ID_LIST:
+            offset += 2 + struct.unpack_from("<H", data, offset)[0]
+        if not flags & _HAS_LINK_INFO:
+            return None
+        info_size, header_size, info_flags, _, base_offset, _, suffix_offset = struct.unpack_from("<7I", data, offset)
+        if not info_flags & _VOLUME_ID_AND_LOCAL_BASE_PATH or offset + info_size > len(data):
+            return None
+        if header_size >= 0x24:
+            unicode_base, unicode_suffix = struct.unpack_from("<2I", data, offset + 0x1C)
+            base = _c_string(data, offset + unicode_base, unicode=True)
+            suffix = _c_string(data, offset + unicode_suffix, unicode=True)
+        else:
+            base = _c_string(data, offset + base_offset)
+            suffix = _c_string(data, offset + suffix_offset)
+    except struct.error:
+        return None
+    return base + suffix or None
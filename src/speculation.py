@@ -0,0 +1,132 @@
+import os
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+# Lookups run one at a time: each partial only adds a word to the last one
+SPECULATION_WORKERS = 1
+# Speculative lookups kept at once; the oldest are dropped
+MAX_SPECULATIONS = 16
+# Seconds the final command waits for a speculative lookup of its app that is still running
+TAKE_TIMEOUT = 1.0
+
+
+class StreamingSegmenter:
+    """
+    Wraps an Endpointer so that the audio of the utterance in progress is
+    also decoded as it comes in, by a backend with ``supports_partials``.
+    Each new partial transcript is passed to ``on_partial(text)`` on the
+    segmentation thread; the utterances returned are the endpointer's, and
+    are recognized as usual.
+    """
+    latency_stage = "vad"
+
+    def __init__(self, endpointer, backend, on_partial, logger=None):
+        self.endpointer = endpointer
+        self.backend = backend
+        self.on_partial = on_partial
+        self.logger = logger or logging.getLogger(__name__)
+        self._stream = None
+        self._fed = 0
+        self._partial = ""
+        self._disabled = False
+
+    @property
+    def noise_floor_db(self):
+        return self.endpointer.noise_floor_db
+
+    def process(self, chunk):
+        utterance = self.endpointer.process(chunk)
+        if self._disabled:
+            return utterance
+        captured = self.endpointer.captured
+        if captured is None:
+            self._stream = None
+            return utterance
+        try:
+            if self._stream is None:
+                self._stream = self.backend.stream(self.endpointer.sample_rate, self.endpointer.sample_width)
+                self._fed, self._partial = 0, ""
+            partial = self._stream.feed(bytes(captured[self._fed:]))
+            self._fed = len(captured)
+            if partial and partial != self._partial:
+                self._partial = partial
+                self.on_partial(partial)
+        except Exception as e:
+            # Partials only save time; the utterance is still recognized in full
+            self.logger.warning(f"Partial recognition failed: {e}; not decoding partials any more.")
+            self._stream = None
+            self._disabled = True
+        return utterance
+
+
+class Speculator:
+    """
+    Looks up the applications named in partial transcripts before the final
+    transcript is in. Each "open <name>" seen in a partial is resolved with
+    find_app on a background thread, and the path checked to exist, so when
+    the final command names the same application, take() has its path ready.
+    Lookups that the final command doesn't confirm are discarded.
+    """
+
+    def __init__(self, parse, find_app, logger=None, max_entries=MAX_SPECULATIONS):
+        self.parse = parse
+        self.find_app = find_app
+        self.logger = logger or logging.getLogger(__name__)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._executor = None
+
+    def speculate(self, text):
+        """Starts looking up the applications of a partial command, if it is an "open" command."""
+        parsed = self.parse(text)
+        if parsed is None or parsed[0] != "open_applications":
+            return
+        with self._lock:
+            for name in parsed[1]["apps"]:
+                name = name.lower()
+                if name in self._entries:
+                    continue
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=SPECULATION_WORKERS,
+                                                        thread_name_prefix="speculation")
+                self._entries[name] = self._executor.submit(self._resolve, name)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)[1].cancel()
+
+    def _resolve(self, name):
+        path = self.find_app(name)
+        # Also brings the file's metadata into the OS cache for the launch
+        if path and not os.path.exists(path):
+            return None
+        return path
+
+    def take(self, app_name, timeout=TAKE_TIMEOUT):
+        """Returns the speculatively resolved path of app_name, or None if there is none to use."""
+        with self._lock:
+            future = self._entries.pop(app_name.lower(), None)
+        path = None
+        if future is not None:
+            try:
+                path = future.result(timeout)
+            except (CancelledError, TimeoutError):
+                pass
+            except Exception as e:
+                self.logger.warning(f"Speculative lookup of '{app_name}' failed: {e}")
+        if path:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return path
+
+    def discard(self):
+        """Drops every pending speculation."""
+        with self._lock:
+            futures = list(self._entries.values())
+            self._entries.clear()
+        for future in futures:
+            future.cancel()
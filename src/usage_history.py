@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import logging
+import threading
+
+HISTORY_VERSION = 1
+# A launch counts half as much after this many days
+HALF_LIFE_DAYS = 14.0
+# Applications kept in the history; the least used are dropped
+MAX_ENTRIES = 200
+# Spoken names remembered per application
+MAX_ALIASES = 8
+
+
+class UsageHistory:
+    """
+    Which applications the user launches, kept in a small JSON file. Each
+    application (by path) has a frecency score, the number of launches with
+    each one decaying by half every half_life_days, and the spoken names
+    that opened it.
+    """
+
+    def __init__(self, path=None, half_life_days=HALF_LIFE_DAYS, max_entries=MAX_ENTRIES,
+                 logger=None, clock=time.time):
+        self.path = path
+        self.half_life = half_life_days * 86400.0
+        self.max_entries = max_entries
+        self.logger = logger or logging.getLogger(__name__)
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _decayed(self, entry, now):
+        return entry["score"] * 0.5 ** (max(0.0, now - entry["last"]) / self.half_life)
+
+    def record(self, app_path, spoken_name=None):
+        """Counts a launch of app_path, opened by saying spoken_name, and saves the history."""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(app_path)
+            if entry is None:
+                entry = self._entries[app_path] = {"score": 0.0, "last": now, "count": 0, "aliases": []}
+            entry["score"] = self._decayed(entry, now) + 1.0
+            entry["last"] = now
+            entry["count"] += 1
+            if spoken_name:
+                aliases = [alias for alias in entry["aliases"] if alias != spoken_name]
+                entry["aliases"] = [spoken_name] + aliases[:MAX_ALIASES - 1]
+            if len(self._entries) > self.max_entries:
+                least_used = min(self._entries, key=lambda path: self._decayed(self._entries[path], now))
+                del self._entries[least_used]
+            self._save()
+
+    def score(self, app_path, now=None):
+        """The app's decayed launch count; 0 for an app never launched."""
+        entry = self._entries.get(app_path)
+        if entry is None:
+            return 0.0
+        return self._decayed(entry, self.clock() if now is None else now)
+
+    def affinity(self, app_path, now=None):
+        """The score mapped into [0, 1): 0 when never launched, 0.5 after one recent launch."""
+        score = self.score(app_path, now)
+        return score / (score + 1.0)
+
+    def top(self, n):
+        """Returns up to n (app_path, aliases) of the most used applications, most used first."""
+        now = self.clock()
+        with self._lock:
+            entries = list(self._entries.items())
+        entries.sort(key=lambda item: self._decayed(item[1], now), reverse=True)
+        return [(path, list(entry["aliases"])) for path, entry in entries[:n]]
+
+    def _load(self):
+        if not self.path or not os.path.isfile(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable usage history '{self.path}': {e}")
+            return {}
+        if not isinstance(data, dict) or data.get("version") != HISTORY_VERSION:
+            return {}
+        return data.get("apps", {})
+
+    def _save(self):
+        """Writes the history atomically. Must hold the lock, so saves can't overtake each other."""
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": HISTORY_VERSION, "apps": self._entries}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.logger.warning(f"Could not save usage history '{self.path}': {e}")
@@ -0,0 +1,147 @@
+import numpy as np
+from collections import deque
+from audio_features import frame_signal, pcm_to_float
+
+FRAME_MS = 20
+# A frame is speech when it is this far above the noise floor...
+SPEECH_MARGIN_DB = 10.0
+# ...its spectrum is peaky rather than flat like broadband noise...
+MAX_FLATNESS = 0.35
+# ...and most of its energy falls in the voice band
+VOICE_BAND_HZ = (100.0, 4000.0)
+MIN_VOICE_BAND_RATIO = 0.5
+# Frames quieter than this (dB) are never speech
+MIN_ENERGY_DB = -60.0
+# Noise floor adaptation per second: falls quickly, rises slowly
+FLOOR_FALL_RATE = 0.9
+FLOOR_RISE_RATE = 0.2
+
+# Default endpointing, in milliseconds
+PRE_ROLL_MS = 300
+MIN_SPEECH_MS = 200
+TRAILING_SILENCE_MS = 700
+MAX_UTTERANCE_MS = 10000
+
+
+class VoiceActivityDetector:
+    """
+    Frame-level voice activity detection. Every frame of a chunk is classified
+    in one vectorized pass from its energy relative to a noise floor, its
+    spectral flatness and the share of its energy in the voice band. The floor
+    keeps adapting to the frames judged to be noise, so a room that gets
+    louder or quieter does not leave the detector stuck.
+    """
+
+    def __init__(self, sample_rate, frame_ms=FRAME_MS, margin_db=SPEECH_MARGIN_DB):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.margin_db = margin_db
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.noise_floor_db = None
+        self._window = np.hanning(self.frame_length).astype(np.float32)
+        freqs = np.fft.rfftfreq(self.frame_length, 1.0 / sample_rate)
+        self._voice_band = (freqs >= VOICE_BAND_HZ[0]) & (freqs <= VOICE_BAND_HZ[1])
+        self._pending = np.empty(0, dtype=np.float32)
+
+    def features(self, frames):
+        """Energy (dB), spectral flatness and voice band energy ratio of each frame."""
+        energy = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        spectrum = np.abs(np.fft.rfft(frames * self._window, axis=1)) ** 2 + 1e-12
+        flatness = np.exp(np.mean(np.log(spectrum), axis=1)) / np.mean(spectrum, axis=1)
+        band_ratio = spectrum[:, self._voice_band].sum(axis=1) / spectrum.sum(axis=1)
+        return energy, flatness, band_ratio
+
+    def classify(self, frames):
+        """Returns a boolean speech mask for the frames and adapts the noise floor."""
+        if not len(frames):
+            return np.zeros(0, dtype=bool)
+        energy, flatness, band_ratio = self.features(frames)
+        if self.noise_floor_db is None:
+            self.noise_floor_db = float(energy.min())
+        voiced = (flatness < MAX_FLATNESS) & (band_ratio > MIN_VOICE_BAND_RATIO) & (energy > MIN_ENERGY_DB)
+        speech = voiced & (energy > self.noise_floor_db + self.margin_db)
+
+        noise = energy[~speech]
+        if len(noise):
+            level = float(np.median(noise))
+            rate = FLOOR_FALL_RATE if level < self.noise_floor_db else FLOOR_RISE_RATE
+            # Per-frame smoothing over the chunk, so the rate does not depend on the chunk size
+            alpha = 1.0 - (1.0 - rate) ** (len(noise) * self.frame_ms / 1000.0)
+            self.noise_floor_db += alpha * (level - self.noise_floor_db)
+        return speech
+
+    def process(self, samples):
+        """Appends float samples and returns the speech mask of the newly completed frames."""
+        self._pending = np.concatenate((self._pending, samples))
+        frames = frame_signal(self._pending, self.frame_length, self.frame_length)
+        self._pending = self._pending[len(frames) * self.frame_length:]
+        return self.classify(frames)
+
+    def reset(self):
+        self._pending = np.empty(0, dtype=np.float32)
+
+
+class Endpointer:
+    """
+    Splits a raw PCM stream into utterances using the voice activity detector.
+    An utterance starts with the first speech frame (plus some pre-roll, so
+    quiet onsets are not clipped) and ends after enough trailing silence.
+    """
+    latency_stage = "vad"
+
+    def __init__(self, sample_rate, sample_width=2, pre_roll_ms=PRE_ROLL_MS, min_speech_ms=MIN_SPEECH_MS,
+                 trailing_silence_ms=TRAILING_SILENCE_MS, max_utterance_ms=MAX_UTTERANCE_MS, vad=None):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.pre_roll_ms = pre_roll_ms
+        self.min_speech_ms = min_speech_ms
+        self.trailing_silence_ms = trailing_silence_ms
+        self.max_utterance_ms = max_utterance_ms
+        self.vad = vad or VoiceActivityDetector(sample_rate)
+        self._pre_roll = deque()
+        self._pre_roll_bytes = 0
+        self._pre_roll_limit = int(sample_rate * pre_roll_ms / 1000) * sample_width
+        self._captured = None
+
+    @property
+    def noise_floor_db(self):
+        return self.vad.noise_floor_db
+
+    @property
+    def captured(self):
+        """The audio of the utterance in progress so far (pre-roll included), or None between utterances."""
+        return self._captured
+
+    def process(self, chunk):
+        """Feeds a raw PCM chunk. Returns the utterance (raw PCM bytes) once it has ended, otherwise None."""
+        speech = self.vad.process(pcm_to_float(chunk, self.sample_width))
+        chunk_ms = 1000.0 * len(chunk) / (self.sample_width * self.sample_rate)
+        frame_ms = self.vad.frame_ms
+
+        if self._captured is None:
+            if not speech.any():
+                self._pre_roll.append(chunk)
+                self._pre_roll_bytes += len(chunk)
+                while self._pre_roll and self._pre_roll_bytes - len(self._pre_roll[0]) >= self._pre_roll_limit:
+                    self._pre_roll_bytes -= len(self._pre_roll.popleft())
+                return None
+            self._captured = bytearray(b"".join(self._pre_roll))
+            self._pre_roll.clear()
+            self._pre_roll_bytes = 0
+            self._speech_ms = 0.0
+            self._silence_ms = 0.0
+            self._elapsed_ms = 0.0
+
+        self._captured.extend(chunk)
+        self._elapsed_ms += chunk_ms
+        if speech.any():
+            self._speech_ms += np.count_nonzero(speech) * frame_ms
+            self._silence_ms = (len(speech) - 1 - np.flatnonzero(speech)[-1]) * frame_ms
+        else:
+            self._silence_ms += len(speech) * frame_ms
+
+        if self._silence_ms >= self.trailing_silence_ms or self._elapsed_ms >= self.max_utterance_ms:
+            utterance, self._captured = bytes(self._captured), None
+            # Ignore clicks and other short bursts
+            return utterance if self._speech_ms >= self.min_speech_ms else None
+        return None
@@ -0,0 +1,198 @@
+import asyncio
+import logging
+import threading
+import concurrent.futures
+import latency
+from audio_pipeline import AudioCapture
+
+# Recognitions allowed in flight at once
+MAX_RECOGNITIONS = 2
+# Utterances waiting for a recognition slot; beyond this, segmentation waits
+UTTERANCE_QUEUE_SIZE = 4
+# Recognitions (running or done) waiting for their command to run
+COMMAND_QUEUE_SIZE = 8
+# Seconds before a recognition or a command is given up on
+RECOGNITION_TIMEOUT = 15.0
+COMMAND_TIMEOUT = 30.0
+
+
+class VoiceCore:
+    """
+    The app's asyncio core. Audio is captured and segmented on a dedicated
+    thread (microphone reads block); each utterance then becomes a
+    recognition task, several of which may be in flight, and the recognized
+    commands run in the order they were spoken. Every stage has a timeout and
+    bounded queues between them apply backpressure. Each utterance gets a
+    latency trace, active on the threads that recognize it and run its
+    command.
+
+    ``recognize(audio)`` and ``execute(command)`` are blocking callables and
+    run on worker threads. ``run()`` works the same with or without a GUI;
+    ``stop()`` may be called from any thread.
+    """
+
+    def __init__(self, source, segmenter, recognize, execute, logger=None, max_recognitions=MAX_RECOGNITIONS,
+                 recognition_timeout=RECOGNITION_TIMEOUT, command_timeout=COMMAND_TIMEOUT, tracer=None):
+        self.recognize = recognize
+        self.execute = execute
+        self.logger = logger or logging.getLogger(__name__)
+        self.tracer = tracer or latency.tracer
+        self.max_recognitions = max_recognitions
+        self.recognition_timeout = recognition_timeout
+        self.command_timeout = command_timeout
+        self.capture = AudioCapture(source, segmenter, self._submit_utterance, logger=self.logger, tracer=self.tracer)
+        self.loop = None
+        self._stopping = threading.Event()
+        self._stop_requested = None
+
+    def stop(self):
+        """Stops listening and cancels pending work."""
+        self._stopping.set()
+        self.capture.stop()
+        loop = self.loop
+        if loop is not None and self._stop_requested is not None:
+            try:
+                loop.call_soon_threadsafe(self._stop_requested.set)
+            except RuntimeError:
+                # The loop has already finished
+                pass
+
+    async def run(self):
+        """
+        Runs until stop() is called, or until an audio source that ends (e.g. a
+        file) has been fully processed.
+        """
+        self.loop = asyncio.get_running_loop()
+        self._utterances = asyncio.Queue(UTTERANCE_QUEUE_SIZE)
+        self._recognitions = asyncio.Queue(COMMAND_QUEUE_SIZE)
+        self._slots = asyncio.Semaphore(self.max_recognitions)
+        self._stop_requested = asyncio.Event()
+        self._pending = set()
+        if self._stopping.is_set():
+            return
+
+        capture_done = self.loop.create_future()
+        threading.Thread(target=self._run_capture, args=(capture_done,), daemon=True).start()
+        stop_requested = asyncio.ensure_future(self._stop_requested.wait())
+        workers = [asyncio.ensure_future(self._dispatch()), asyncio.ensure_future(self._execute())]
+        try:
+            await asyncio.wait({capture_done, stop_requested}, return_when=asyncio.FIRST_COMPLETED)
+            if not self._stop_requested.is_set():
+                # The source ended: let everything already captured run
+                await self._utterances.join()
+                await self._recognitions.join()
+        finally:
+            self._stopping.set()
+            self.capture.stop()
+            tasks = workers + [stop_requested] + list(self._pending)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _in_thread(self, func, *args):
+        """
+        Runs a blocking call on a daemon thread and returns a future for its
+        result. Unlike the default executor, a call that never returns does
+        not hold up shutdown.
+        """
+        future = self.loop.create_future()
+
+        def settle(result, error):
+            if not future.done():
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+
+        def target():
+            result, error = None, None
+            try:
+                result = func(*args)
+            except Exception as e:
+                error = e
+            try:
+                self.loop.call_soon_threadsafe(settle, result, error)
+            except RuntimeError:
+                # The loop has already finished
+                pass
+
+        threading.Thread(target=target, daemon=True).start()
+        return future
+
+    def _run_capture(self, done):
+        try:
+            self.capture.run()
+        finally:
+            try:
+                self.loop.call_soon_threadsafe(lambda: done.done() or done.set_result(None))
+            except RuntimeError:
+                pass
+
+    def _submit_utterance(self, utterance):
+        """Called on the capture thread; waits while the utterance queue is full."""
+        # The utterance has just ended: its command's latency is timed from here
+        trace = self.tracer.start_trace()
+        future = asyncio.run_coroutine_threadsafe(self._utterances.put((utterance, trace)), self.loop)
+        while not self._stopping.is_set():
+            try:
+                return future.result(timeout=0.1)
+            except concurrent.futures.TimeoutError:
+                continue
+        future.cancel()
+
+    async def _dispatch(self):
+        while True:
+            utterance, trace = await self._utterances.get()
+            try:
+                await self._slots.acquire()
+                task = asyncio.ensure_future(self._recognize(utterance, trace))
+                self._pending.add(task)
+                task.add_done_callback(self._pending.discard)
+                # Queued in spoken order, so commands run in that order too
+                await self._recognitions.put((task, trace))
+            finally:
+                self._utterances.task_done()
+
+    async def _recognize(self, utterance, trace):
+        try:
+            return await asyncio.wait_for(self._in_thread(self._recognize_traced, utterance, trace),
+                                          self.recognition_timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Recognition timed out after {self.recognition_timeout:g}s.")
+        except Exception as e:
+            self.logger.error(f"Recognition failed: {e}")
+        finally:
+            self._slots.release()
+        return None
+
+    async def _execute(self):
+        while True:
+            task, trace = await self._recognitions.get()
+            try:
+                command = await task
+                if command:
+                    await self._run_command(command, trace)
+            finally:
+                self._recognitions.task_done()
+
+    async def _run_command(self, command, trace=None):
+        try:
+            await asyncio.wait_for(self._in_thread(self._execute_command, command, trace), self.command_timeout)
+        except asyncio.TimeoutError:
+            # The command keeps running on its thread; later commands go ahead
+            self.logger.warning(f"Command '{command}' still running after {self.command_timeout:g}s; not waiting for it.")
+
+    def _recognize_traced(self, utterance, trace):
+        # Time from the end of the utterance until its recognition starts
+        self.tracer.mark(trace, "capture")
+        with self.tracer.activate(trace), self.tracer.span("recognize"):
+            return self.recognize(utterance)
+
+    def _execute_command(self, command, trace=None):
+        try:
+            with self.tracer.activate(trace), self.tracer.span("execute_command"):
+                self.execute(command)
+        except Exception as e:
+            self.logger.error(f"Command '{command}' failed: {e}")
+        finally:
+            self.tracer.finish(trace)
@@ -1,30 +1,195 @@
 import speech_recognition as sr
 import logging
+import latency
+from recognizer_backends import create_backend
+from command_grammar import CommandGrammar
+from vad import Endpointer
+from audio_features import pcm_to_float
 
 class VoiceRecognizer:
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, wake_word_templates=None, backend="google", backend_options=None,
+                 endpointing=None, recognition_cache=None, tracer=None, source=None, preprocessing=None,
+                 resilience=None):
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        # Any speech_recognition AudioSource, e.g. sr.Microphone(device_index=1) or sr.AudioFile(path)
+        self.microphone = source if source is not None else sr.Microphone()
         self.logger = logger or logging.getLogger(__name__)
+        self.tracer = tracer or latency.tracer
+        self.backend = create_backend(backend, recognizer=self.recognizer, logger=self.logger, **(backend_options or {}))
+        if resilience is not None and not self.backend.offline:
+            # Keyword arguments for the ResilientBackend, e.g. {"deadline_s": 5, "fallback": "vosk"}
+            from resilience import wrap_backend
+            self.backend = wrap_backend(self.backend, recognizer=self.recognizer, logger=self.logger, **resilience)
+        self.wake_word_gate = None
+        self.grammar = None
+        # Keyword arguments for the Endpointer, e.g. {"trailing_silence_ms": 500}
+        self.endpointing = endpointing or {}
+        self._endpointer = None
+        self.cache = None
+        self.preprocessor = None
+        if preprocessing is not None:
+            # Keyword arguments for the AudioPreprocessor, e.g. {"padding_ms": 300}
+            from audio_preprocessing import AudioPreprocessor
+            self.preprocessor = AudioPreprocessor(**preprocessing)
         with self.microphone as source:
-            self.recognizer.adjust_for_ambient_noise(source)
+            self.sample_rate = source.SAMPLE_RATE
+            self.sample_width = source.SAMPLE_WIDTH
+            if recognition_cache is not None:
+                # Keyword arguments for the RecognitionCache, e.g. {"capacity": 64}
+                from recognition_cache import RecognitionCache
+                self.cache = RecognitionCache(source.SAMPLE_RATE, logger=self.logger, **recognition_cache)
+            if wake_word_templates:
+                # Imported here so numpy is only needed when the local gate is used
+                from wake_word import WakeWordDetector, WakeWordGate
+                detector = WakeWordDetector.from_wav_files(
+                    wake_word_templates, source.SAMPLE_RATE, logger=self.logger
+                )
+                self.wake_word_gate = WakeWordGate(detector, source.SAMPLE_WIDTH, logger=self.logger)
 
     def listen_for_command(self, wake_word="hey windows"):
         with self.microphone as source:
             self.logger.info(f"Listening for command with wake word '{wake_word}'...")
             try:
-                audio = self.recognizer.listen(source)
-                text = self.recognizer.recognize_google(audio)
-                if text.lower().startswith(wake_word):
-                    self.logger.info(f"Command recognized: {text}")
-                    command = text[len(wake_word):].strip()
-                    return command
+                if self.wake_word_gate:
+                    return self._listen_after_wake_word(source, wake_word)
+                # The endpointer's noise floor keeps adapting across calls
+                if self._endpointer is None:
+                    self._endpointer = self.create_segmenter()
+                while True:
+                    chunk = source.stream.read(source.CHUNK)
+                    if not chunk:
+                        # End of a file-backed source
+                        return None
+                    utterance = self._endpointer.process(chunk)
+                    if utterance:
+                        return self.recognize_utterance(utterance, wake_word)
             except sr.UnknownValueError:
                 self.logger.warning("Could not understand audio")
             except sr.RequestError as e:
                 self.logger.error(f"Could not request results; {e}")
         return None
 
+    def _listen_after_wake_word(self, source, wake_word):
+        """
+        Streams raw microphone chunks through the local wake word gate and only
+        sends the audio that follows a detected wake word for recognition.
+        """
+        while True:
+            chunk = source.stream.read(source.CHUNK)
+            if not chunk:
+                # End of a file-backed source
+                return None
+            command_audio = self.wake_word_gate.process(chunk)
+            if command_audio:
+                break
+        transcript, pending = self._transcribe(command_audio)
+        text = transcript
+        # The end of the wake word may have been captured along with the command
+        if text.lower().startswith(wake_word):
+            text = text[len(wake_word):].strip()
+        self.logger.info(f"Command recognized: {text}")
+        command = self._constrain(text) or None
+        if command:
+            self._remember(pending, transcript)
+        return command
+
+    def create_segmenter(self, on_partial=None):
+        """
+        Returns the utterance segmenter for the continuous capture pipeline:
+        the local wake word gate when configured, otherwise voice activity
+        endpointing. With on_partial, and a backend that can decode while the
+        command is spoken, on_partial(transcript) receives each partial
+        transcript of the utterance in progress.
+        """
+        if self.wake_word_gate:
+            return self.wake_word_gate
+        endpointer = Endpointer(self.sample_rate, self.sample_width, **self.endpointing)
+        if on_partial is not None and self.backend.supports_partials:
+            from speculation import StreamingSegmenter
+            return StreamingSegmenter(endpointer, self.backend, on_partial, logger=self.logger)
+        return endpointer
+
+    def recognize_utterance(self, audio_bytes, wake_word="hey windows"):
+        """
+        Recognizes one utterance of raw microphone audio. Returns the command
+        that follows the wake word, or None.
+        """
+        try:
+            transcript, pending = self._transcribe(audio_bytes)
+        except sr.UnknownValueError:
+            self.logger.warning("Could not understand audio")
+            return None
+        except sr.RequestError as e:
+            self.logger.error(f"Could not request results; {e}")
+            return None
+        text = transcript
+        if text.lower().startswith(wake_word):
+            text = text[len(wake_word):].strip()
+        elif not self.wake_word_gate:
+            # Without the local gate, the wake word must be in the transcript
+            return None
+        self.logger.info(f"Command recognized: {text}")
+        command = self._constrain(text) or None
+        if command:
+            self._remember(pending, transcript)
+        return command
+
+    def recognize_audio(self, audio, wake_word="hey windows"):
+        """Like recognize_utterance, for an sr.AudioData in any format (e.g. an uploaded WAV)."""
+        return self.recognize_utterance(
+            audio.get_raw_data(convert_rate=self.sample_rate, convert_width=self.sample_width), wake_word
+        )
+
+    def _transcribe(self, audio_bytes):
+        """
+        Returns the transcript of raw audio and, when it came from the backend,
+        the (fingerprint, confidence) to cache it under. A repeat of a recently
+        recognized utterance is answered from the cache instead.
+        """
+        backend_stage = f"recognize_{self.backend.name}"
+        if self.cache is None:
+            audio = self._prepare(audio_bytes)
+            with self.tracer.span(backend_stage):
+                return self.backend.recognize(audio).strip(), None
+        with self.tracer.span("recognition_cache"):
+            fingerprint = self.cache.fingerprint(pcm_to_float(audio_bytes, self.sample_width))
+            text = self.cache.lookup(fingerprint)
+        if text is not None:
+            return text, None
+        audio = self._prepare(audio_bytes)
+        with self.tracer.span(backend_stage):
+            text, confidence = self.backend.recognize_with_confidence(audio)
+        return text.strip(), (fingerprint, confidence)
+
+    def _prepare(self, audio_bytes):
+        """The sr.AudioData sent to the backend, preprocessed when configured."""
+        if self.preprocessor is None:
+            return sr.AudioData(audio_bytes, self.sample_rate, self.sample_width)
+        with self.tracer.span("preprocess"):
+            return self.preprocessor.process(audio_bytes, self.sample_rate, self.sample_width,
+                                             target_rate=self.backend.native_rate)
+
+    def _remember(self, pending, transcript):
+        """Caches a transcript that turned out to be a command."""
+        if pending is not None:
+            self.cache.store(pending[0], transcript, pending[1])
+
+    def set_grammar(self, phrases, wake_word=None, accepts=None):
+        """
+        Restricts recognition to the given command phrases. Called again
+        whenever the command vocabulary (e.g. the app index) changes.
+        """
+        # With the local gate, the wake word is not part of the recognized audio
+        self.grammar = CommandGrammar(phrases, None if self.wake_word_gate else wake_word, accepts=accepts)
+        self.backend.set_grammar(self.grammar)
+        self.logger.info(f"Recognition grammar updated: {len(self.grammar)} phrases.")
+
+    def _constrain(self, command):
+        """Snaps a free-form transcript to the grammar when the backend cannot decode with it."""
+        if self.grammar is None or self.backend.supports_grammar or not command:
+            return command
+        return self.grammar.snap(command)
+
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     logger = logging.getLogger(__name__)
@@ -0,0 +1,155 @@
+import time
+import logging
+import threading
+
+# A change of volume moves the level at most this far at a time...
+RAMP_MAX_STEP = 0.08
+# ...in steps this far apart
+RAMP_STEP_MS = 30
+# The cached level is trusted for this long after it was last read or set;
+# after that it is read again, as it may have been changed elsewhere
+LEVEL_CACHE_SECONDS = 2.0
+
+
+def _clamp(level):
+    return min(1.0, max(0.0, level))
+
+
+class VolumeController:
+    """
+    Master volume control on top of an endpoint with pycaw's
+    ``IAudioEndpointVolume`` methods. The last known level is cached, so a
+    relative step usually costs no read. Requests only move a target level;
+    a worker thread ramps the endpoint towards the latest target, at most
+    max_step every step_ms, so several requests in quick succession become
+    one smooth change instead of a read-modify-write each. A max_step of 1
+    sets the target at once.
+    """
+
+    def __init__(self, endpoint, logger=None, max_step=RAMP_MAX_STEP, step_ms=RAMP_STEP_MS,
+                 cache_seconds=LEVEL_CACHE_SECONDS, clock=time.monotonic):
+        self.endpoint = endpoint
+        self.logger = logger or logging.getLogger(__name__)
+        self.max_step = max_step
+        self.step_s = step_ms / 1000.0
+        self.cache_seconds = cache_seconds
+        self.clock = clock
+        self._condition = threading.Condition()
+        self._level = None
+        self._level_time = 0.0
+        self._target = None
+        self._worker = None
+
+    @property
+    def level(self):
+        """The current level (0 to 1), from the cache when it is fresh."""
+        with self._condition:
+            return self._current()
+
+    @property
+    def target(self):
+        """The level being ramped to, or the current level when idle."""
+        with self._condition:
+            return self._target if self._target is not None else self._current()
+
+    def _current(self):
+        if self._worker is None and (self._level is None or self.clock() - self._level_time > self.cache_seconds):
+            self._level = self.endpoint.GetMasterVolumeLevelScalar()
+            self._level_time = self.clock()
+        return self._level
+
+    def step(self, delta):
+        """Changes the volume by delta (e.g. 0.1 for 10 percent). Returns the new target level."""
+        with self._condition:
+            base = self._target if self._target is not None else self._current()
+            return self._request(base + delta)
+
+    def set(self, level):
+        """Sets the volume to level (0 to 1). Returns the new target level."""
+        with self._condition:
+            return self._request(level)
+
+    def _request(self, level):
+        self._target = _clamp(level)
+        if self._worker is None:
+            self._current()
+            self._worker = threading.Thread(target=self._ramp, daemon=True)
+            self._worker.start()
+        return self._target
+
+    def toggle_mute(self):
+        """Toggles mute and returns whether the output is now muted."""
+        muted = not self.endpoint.GetMute()
+        self.endpoint.SetMute(muted, None)
+        return muted
+
+    def wait(self, timeout=None):
+        """Waits until the volume has reached its target. Returns False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._worker is None, timeout)
+
+    def _ramp(self):
+        while True:
+            with self._condition:
+                target, level = self._target, self._level
+                if target == level:
+                    self._target = None
+                    self._worker = None
+                    self._condition.notify_all()
+                    return
+            # Walk on from the last level set, so a new target keeps the per-step cap
+            if abs(target - level) <= self.max_step:
+                level = target
+            else:
+                level += self.max_step if target > level else -self.max_step
+            try:
+                self.endpoint.SetMasterVolumeLevelScalar(level, None)
+            except Exception as e:
+                self.logger.error(f"Failed to set the volume: {e}")
+                with self._condition:
+                    # Read the level again next time
+                    self._level, self._target, self._worker = None, None, None
+                    self._condition.notify_all()
+                return
+            with self._condition:
+                self._level, self._level_time = level, self.clock()
+                reached = level == self._target
+            if not reached:
+                time.sleep(self.step_s)
+
+
+class FakeVolumeEndpoint:
+    """
+    Stand-in for the pycaw endpoint volume interface, for tests and
+    benchmarks on any OS. Records every level set and counts the calls;
+    ``call_ms`` models the cost of a COM round trip.
+    """
+
+    def __init__(self, level=0.5, muted=False, call_ms=0.0):
+        self.level = level
+        self.muted = muted
+        self.call_s = call_ms / 1000.0
+        self.calls = 0
+        self.history = []
+
+    def _call(self):
+        self.calls += 1
+        if self.call_s:
+            time.sleep(self.call_s)
+
+    def GetMasterVolumeLevelScalar(self):
+        self._call()
+        return self.level
+
+    def SetMasterVolumeLevelScalar(self, level, event_context):
+        self._call()
+        self.level = level
+        self.history.append(level)
+
+    def GetMute(self):
+        self._call()
+        return self.muted
+
+    def SetMute(self, muted, event_context):
+        self._call()
+        self.muted = muted
@@ -0,0 +1,246 @@
+import logging
+import numpy as np
+from audio_features import MfccExtractor, pcm_to_float, read_wav, resample
+
+# Average per-frame MFCC distance below which a match counts as the wake word,
+# used when there are too few templates to calibrate from
+DEFAULT_THRESHOLD = 5.0
+# Calibrated threshold = worst leave-one-out template distance times this margin.
+# Enrollment recordings are few and clean, so live speech needs generous slack.
+CALIBRATION_MARGIN = 2.5
+# Frames quieter than this (dB) are never treated as speech
+MIN_ENERGY_DB = -55.0
+# Frames more than this below the loudest frame are not used for the cepstral mean
+VOICED_RANGE_DB = 30.0
+# The recent-audio window is matched every this many feature frames (10 ms each)
+EVAL_HOP_FRAMES = 5
+# Length of the recent-audio window relative to the longest template
+WINDOW_RATIO = 1.5
+
+# Endpointing of the command that follows the wake word
+SPEECH_MARGIN_DB = 10.0
+TRAILING_SILENCE_MS = 700
+NO_SPEECH_TIMEOUT_MS = 3000
+MAX_COMMAND_MS = 8000
+
+
+class _TemplateMatcher:
+    """
+    Subsequence DTW (SPRING) of one template against a sequence of frames.
+    Each step only looks at the previous frame, so a whole frame is updated
+    with a handful of vectorized operations.
+    """
+
+    def __init__(self, template):
+        self.template = template
+        self.reset()
+
+    def reset(self):
+        size = len(self.template) + 1
+        self._cost = np.full(size, np.inf)
+        self._cost[0] = 0.0
+        self._length = np.zeros(size)
+
+    def step(self, frame):
+        """Consumes one feature frame and returns the best normalized match cost ending here."""
+        distances = np.linalg.norm(self.template - frame, axis=1)
+        cost, length = self._cost, self._length
+        # Predecessors: diagonal (j - 1), horizontal (j), skip (j - 2)
+        candidates = np.vstack((cost[:-1], cost[1:], np.concatenate(([np.inf], cost[:-2]))))
+        lengths = np.vstack((length[:-1], length[1:], np.concatenate(([0.0], length[:-2]))))
+        best = np.argmin(candidates, axis=0)
+        columns = np.arange(len(distances))
+        self._cost = np.concatenate(([0.0], candidates[best, columns] + distances))
+        self._length = np.concatenate(([0.0], lengths[best, columns] + 1.0))
+        return self._cost[-1] / self._length[-1]
+
+
+def _normalize(mfcc, energy):
+    """Cepstral mean normalization over the voiced frames; drops the energy coefficient."""
+    voiced = (energy > energy.max() - VOICED_RANGE_DB) & (energy > MIN_ENERGY_DB)
+    if not voiced.any():
+        return None, voiced
+    return (mfcc - mfcc[voiced].mean(axis=0))[:, 1:], voiced
+
+
+class WakeWordDetector:
+    """
+    Local, streaming wake-word spotter. Incoming raw audio is turned into MFCC
+    frames; every few frames the most recent window is matched against enrolled
+    recordings of the wake word with subsequence DTW, so no audio leaves the
+    machine until the wake word is heard.
+    """
+
+    def __init__(self, templates, sample_rate, threshold=None, logger=None):
+        self.logger = logger or logging.getLogger(__name__)
+        self.sample_rate = sample_rate
+        self._extractor = MfccExtractor(sample_rate)
+        self._templates = [t for t in (self._template_features(samples) for samples in templates) if t is not None]
+        if not self._templates:
+            raise ValueError("At least one wake word template with audible speech is required.")
+        self._matchers = [_TemplateMatcher(template) for template in self._templates]
+        self.window_frames = int(max(len(t) for t in self._templates) * WINDOW_RATIO)
+        self.threshold = threshold if threshold is not None else self.calibrate()
+        self.samples_seen = 0
+        self.last_score = np.inf
+        self.reset()
+
+    @classmethod
+    def from_wav_files(cls, paths, sample_rate, threshold=None, logger=None):
+        """Builds a detector from enrollment WAV files, resampled to the stream's rate."""
+        templates = []
+        for path in paths:
+            samples, rate = read_wav(path)
+            templates.append(resample(samples, rate, sample_rate))
+        return cls(templates, sample_rate, threshold=threshold, logger=logger)
+
+    def _template_features(self, samples):
+        mfcc, energy = self._extractor.extract(samples)
+        if not len(mfcc):
+            return None
+        normalized, voiced = _normalize(mfcc, energy)
+        if normalized is None:
+            return None
+        # Keep only the voiced part of the enrollment recording
+        return normalized[np.argmax(voiced): len(voiced) - np.argmax(voiced[::-1])]
+
+    def _match(self, frames, tail):
+        """Best normalized match cost of any template ending within the last ``tail`` frames."""
+        best = np.inf
+        for matcher in self._matchers:
+            matcher.reset()
+            for i, frame in enumerate(frames):
+                score = matcher.step(frame)
+                if i >= len(frames) - tail:
+                    best = min(best, score)
+        return best
+
+    def calibrate(self):
+        """
+        Derives a threshold from the enrollment templates: each template is
+        matched against the others and the worst best-match cost, with a margin,
+        becomes the threshold.
+        """
+        if len(self._templates) < 2:
+            return DEFAULT_THRESHOLD
+        worst = 0.0
+        matchers = self._matchers
+        for i, template in enumerate(self._templates):
+            self._matchers = matchers[:i] + matchers[i + 1:]
+            worst = max(worst, self._match(template, len(template)))
+        self._matchers = matchers
+        return worst * CALIBRATION_MARGIN
+
+    def reset(self):
+        """Clears buffered audio, e.g. after a detection."""
+        self._extractor.reset()
+        self._mfcc = np.empty((0, self._extractor._dct.shape[0]), dtype=np.float32)
+        self._energy = np.empty(0, dtype=np.float32)
+        self._since_eval = 0
+        self._candidate = np.inf
+
+    def process(self, samples):
+        """
+        Feeds float samples to the detector. Returns True if the wake word ended
+        within them; buffered audio is cleared after a detection.
+        """
+        mfcc, energy = self._extractor.push(samples)
+        self.samples_seen += len(samples)
+        if not len(mfcc):
+            return False
+        self._mfcc = np.concatenate((self._mfcc, mfcc))[-self.window_frames:]
+        self._energy = np.concatenate((self._energy, energy))[-self.window_frames:]
+        self._since_eval += len(mfcc)
+        if self._since_eval < EVAL_HOP_FRAMES:
+            return False
+
+        tail, self._since_eval = self._since_eval, 0
+        normalized, _ = _normalize(self._mfcc, self._energy)
+        # Nothing to match unless the newest frames contain speech
+        if normalized is None or self._energy[-tail:].max() <= MIN_ENERGY_DB:
+            score = np.inf
+        else:
+            score = self._match(normalized, tail)
+        self.last_score = score
+
+        # Fire once the match stops improving, so the detection lines up with
+        # the end of the wake word rather than with a partial match
+        if score < self.threshold and score <= self._candidate:
+            self._candidate = score
+            return False
+        if self._candidate < self.threshold:
+            self.reset()
+            return True
+        return False
+
+
+class WakeWordGate:
+    """
+    Gates a raw PCM stream on the wake word: chunks are fed to the detector
+    until it fires, then the following audio is captured until the speaker
+    stops. Only that captured command audio is handed on for recognition.
+    """
+    latency_stage = "wake_word"
+
+    def __init__(self, detector, sample_width=2, logger=None):
+        self.detector = detector
+        self.sample_width = sample_width
+        self.logger = logger or logging.getLogger(__name__)
+        self.sample_rate = detector.sample_rate
+        self.noise_floor_db = None
+        self._capturing = False
+        self._captured = bytearray()
+
+    def _chunk_energy(self, samples):
+        return 10.0 * np.log10(np.mean(samples * samples) + 1e-10) if len(samples) else -100.0
+
+    def process(self, chunk):
+        """
+        Feeds a raw PCM chunk. Returns the command audio (raw PCM bytes) once an
+        utterance following the wake word has ended, otherwise None.
+        """
+        samples = pcm_to_float(chunk, self.sample_width)
+        energy = self._chunk_energy(samples)
+        chunk_ms = 1000.0 * len(samples) / self.sample_rate
+
+        if not self._capturing:
+            # Track the background level while waiting for the wake word
+            if self.noise_floor_db is None:
+                self.noise_floor_db = energy
+            elif energy < self.noise_floor_db:
+                self.noise_floor_db = energy
+            else:
+                self.noise_floor_db += 0.01 * (energy - self.noise_floor_db)
+
+            if self.detector.process(samples):
+                self.logger.info("Wake word detected.")
+                self._start_capture()
+            return None
+
+        self._captured.extend(chunk)
+        self._elapsed_ms += chunk_ms
+        if energy > self.noise_floor_db + SPEECH_MARGIN_DB:
+            self._heard_speech = True
+            self._silence_ms = 0.0
+        else:
+            self._silence_ms += chunk_ms
+
+        if not self._heard_speech and self._elapsed_ms >= NO_SPEECH_TIMEOUT_MS:
+            self.logger.info("No command followed the wake word.")
+            self._stop_capture()
+            return None
+        if (self._heard_speech and self._silence_ms >= TRAILING_SILENCE_MS) or self._elapsed_ms >= MAX_COMMAND_MS:
+            return self._stop_capture()
+        return None
+
+    def _start_capture(self):
+        self._capturing = True
+        self._captured = bytearray()
+        self._elapsed_ms = 0.0
+        self._silence_ms = 0.0
+        self._heard_speech = False
+
+    def _stop_capture(self):
+        self._capturing = False
+        self.detector.reset()
+        return bytes(self._captured)
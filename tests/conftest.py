@@ -0,0 +1,98 @@
+import json
+import time
+import threading
+import numpy as np
+import pytest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class _FakeSpeechHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        with server.lock:
+            server.received.append(len(body))
+            fault = server.faults.pop(0) if server.faults else None
+        time.sleep((server.latency_ms + (fault if isinstance(fault, (int, float)) else 0)) / 1000.0)
+        if fault == "error":
+            self.send_error(500, "Injected failure")
+            return
+        result = {"result": [{"alternative": [{"transcript": server.transcript, "confidence": 0.95}],
+                              "final": True}], "result_index": 0}
+        data = ('{"result":[]}\n' + json.dumps(result) + "\n").encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except ConnectionError:
+            # The client gave up on the request, e.g. a hedged one that lost
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeSpeechServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the Google Web Speech API (point GoogleBackend's
+    endpoint at ``url``). Every request is answered with ``transcript`` after
+    ``latency_ms``. Entries of ``faults`` apply to the next requests in turn:
+    "error" answers HTTP 500, a number adds that many ms.
+    """
+
+    def __init__(self, transcript):
+        super().__init__(("127.0.0.1", 0), _FakeSpeechHandler)
+        self.transcript = transcript
+        self.latency_ms = 0.0
+        self.faults = []
+        self.received = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/speech-api/v2/recognize"
+
+
+class FakeClock:
+    """A clock the test moves by setting ``now``."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def _write_utterances(path, durations, gap=1.0, rate=16000):
+    """Writes a WAV of tone bursts (one per duration, in seconds) separated by quiet noise."""
+    from src.audio_features import write_wav
+    rng = np.random.default_rng(0)
+    parts = [rng.normal(0, 0.001, int(rate * gap))]
+    for duration in durations:
+        t = np.arange(int(rate * duration)) / rate
+        parts.append(0.3 * np.sin(2 * np.pi * 220 * t))
+        parts.append(rng.normal(0, 0.001, int(rate * gap)))
+    write_wav(str(path), np.concatenate(parts), rate)
+
+
+@pytest.fixture
+def utterances_wav():
+    """Writes a recording of utterances: utterances_wav(path, durations, gap=1.0)."""
+    return _write_utterances
+
+
+@pytest.fixture
+def speech_server():
+    """A FakeSpeechServer answering "hey windows open notepad", running for the test."""
+    server = FakeSpeechServer("hey windows open notepad")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,48 @@
+import os
+import pytest
+from src.app_catalog import AppCatalog
+
+def _apps():
+    return {
+        "word": "C:\\Start Menu\\Office\\Word.lnk",
+        "excel": "C:\\Start Menu\\Office\\Excel.lnk",
+        "chrome": "C:/Users/me/Desktop/Chrome.lnk",
+        "code": "C:\\Start Menu\\Visual Studio Code.lnk",
+    }
+
+def test_catalog_reads_like_the_dict_it_replaces():
+    """
+    Test that the catalog answers lookups like a dict, iterates in the original order and keeps the first path of a name.
+    """
+    apps = _apps()
+    catalog = AppCatalog(list(apps.items()) + [("word", "D:\\Other\\Word.exe")])
+
+    assert catalog == apps and apps == catalog
+    assert list(catalog) == list(apps)
+    assert list(catalog.items()) == list(apps.items())
+    assert list(catalog.values()) == list(apps.values())
+    assert catalog["chrome"] == "C:/Users/me/Desktop/Chrome.lnk"
+    assert catalog.get("notepad") is None and "notepad" not in catalog and "word" in catalog
+    with pytest.raises(KeyError):
+        catalog["notepad"]
+    # The two Office apps share one directory entry
+    assert catalog.directory_count == 3
+
+def test_prefix_queries_and_path_membership(tmp_path):
+    """
+    Test that names are found by prefix, and paths (built with os.path.join) are recognized as the catalog's.
+    """
+    directory = str(tmp_path / "Programs")
+    catalog = AppCatalog.from_entries([
+        ("code", directory, "Code.lnk"),
+        ("codeblocks", directory, "CodeBlocks.lnk"),
+        ("copilot", directory, "Copilot.lnk"),
+        ("alias", directory, "Code.lnk"),
+    ])
+
+    assert [entry.name for entry in catalog.prefixed("code")] == ["code", "codeblocks"]
+    assert catalog.prefixed("co")[-1].path == os.path.join(directory, "Copilot.lnk")
+    assert catalog.prefixed("zoom") == []
+    assert catalog.entry("alias").path == os.path.join(directory, "Code.lnk")
+    assert catalog.has_path(os.path.join(directory, "CodeBlocks.lnk"))
+    assert not catalog.has_path(os.path.join(str(tmp_path), "Code.lnk"))
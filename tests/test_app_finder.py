@@ -2,15 +2,16 @@ import pytest
 from unittest.mock import patch, MagicMock
 import os
 import sys
+import threading
+import time
 from src.app_finder import AppFinder
 
 @patch('sys.platform', 'win32')
 @patch('os.environ.get')
 @patch('os.path.isdir')
-@patch('os.walk')
-def test_discover_apps_windows(mock_walk, mock_isdir, mock_environ_get):
+def test_get_search_paths_windows(mock_isdir, mock_environ_get):
     """
-    Test that the AppFinder discovers applications correctly on Windows.
+    Test that the AppFinder searches the Desktop and Start Menu directories on Windows.
     """
     # Arrange
     user_profile = "C:\\Users\\TestUser"
@@ -26,29 +27,94 @@ def test_discover_apps_windows(mock_walk, mock_isdir, mock_environ_get):
     }.get(key, default)
     mock_isdir.return_value = True
 
-    # Mock the file system structure for all expected paths
-    desktop_path = os.path.join(user_profile, "Desktop")
-    public_desktop_path = os.path.join(public, "Desktop")
-    start_menu_path = os.path.join(app_data, "Microsoft", "Windows", "Start Menu", "Programs")
-    public_start_menu_path = os.path.join(program_data, "Microsoft", "Windows", "Start Menu", "Programs")
-
-    walk_data = {
-        desktop_path: [(desktop_path, [], ["Chrome.lnk", "Spotify.exe"])],
-        public_desktop_path: [],
-        start_menu_path: [(start_menu_path, [], ["Word.lnk"])],
-        public_start_menu_path: [(public_start_menu_path, [], ["Excel.exe"])],
-    }
-    mock_walk.side_effect = lambda path: walk_data.get(path, [])
+    # Act
+    with patch.object(AppFinder, '_discover_apps', return_value={}):
+        paths = AppFinder()._get_search_paths()
+
+    # Assert
+    assert paths == [
+        os.path.join(user_profile, "Desktop"),
+        os.path.join(public, "Desktop"),
+        os.path.join(app_data, "Microsoft", "Windows", "Start Menu", "Programs"),
+        os.path.join(program_data, "Microsoft", "Windows", "Start Menu", "Programs"),
+    ]
+
+def _make_tree(tmp_path):
+    """Creates a small Desktop/Start Menu layout and returns its search paths."""
+    desktop_path = tmp_path / "Desktop"
+    public_desktop_path = tmp_path / "Public Desktop"
+    start_menu_path = tmp_path / "Start Menu"
+    public_start_menu_path = tmp_path / "Public Start Menu"
+    for path in (desktop_path, public_desktop_path, start_menu_path / "Office", public_start_menu_path):
+        path.mkdir(parents=True)
+
+    (desktop_path / "Chrome.lnk").touch()
+    (desktop_path / "Spotify.exe").touch()
+    (desktop_path / "notes.txt").touch()
+    (start_menu_path / "Office" / "Word.lnk").touch()
+    (public_start_menu_path / "Excel.exe").touch()
+    (public_start_menu_path / "Chrome.lnk").touch()
+    return [str(desktop_path), str(public_desktop_path), str(start_menu_path), str(public_start_menu_path)]
+
+def test_discover_apps_windows(tmp_path):
+    """
+    Test that the AppFinder discovers applications correctly on Windows.
+    """
+    # Arrange
+    search_paths = _make_tree(tmp_path)
 
     # Act
-    finder = AppFinder()
+    with patch.object(AppFinder, '_get_search_paths', return_value=search_paths):
+        finder = AppFinder()
 
     # Assert
     assert len(finder.app_map) == 4
-    assert finder.app_map["chrome"] == os.path.join(desktop_path, "Chrome.lnk")
-    assert finder.app_map["word"] == os.path.join(start_menu_path, "Word.lnk")
+    assert finder.app_map["chrome"] == os.path.join(search_paths[0], "Chrome.lnk")
+    assert finder.app_map["word"] == os.path.join(search_paths[2], "Office", "Word.lnk")
     assert finder.find_app("spotify") is not None
 
+def test_discover_apps_uses_persistent_index(tmp_path):
+    """
+    Test that a warm start reuses the persistent index and only rescans changed directories.
+    """
+    # Arrange
+    search_paths = _make_tree(tmp_path)
+    index_path = str(tmp_path / "cache" / "app_index.json")
+
+    with patch.object(AppFinder, '_get_search_paths', return_value=search_paths):
+        cold = AppFinder(index_path=index_path)
+        assert os.path.isfile(index_path)
+
+        # Act: an unchanged tree is not listed again
+        with patch('os.scandir', wraps=os.scandir) as mock_scandir:
+            warm = AppFinder(index_path=index_path)
+        assert mock_scandir.call_count == 0
+        assert warm.app_map == cold.app_map
+
+        # Act: a new shortcut only triggers a rescan of its own directory
+        office_path = os.path.join(search_paths[2], "Office")
+        open(os.path.join(office_path, "Outlook.lnk"), "w").close()
+        os.utime(office_path, ns=(0, os.stat(office_path).st_mtime_ns + 1_000_000_000))
+        with patch('os.scandir', wraps=os.scandir) as mock_scandir:
+            updated = AppFinder(index_path=index_path)
+
+    # Assert
+    mock_scandir.assert_called_once_with(office_path)
+    assert updated.app_map["outlook"] == os.path.join(office_path, "Outlook.lnk")
+
+def test_discover_apps_ignores_corrupt_index(tmp_path):
+    """
+    Test that an unreadable index falls back to a full scan.
+    """
+    search_paths = _make_tree(tmp_path)
+    index_path = tmp_path / "app_index.json"
+    index_path.write_text("not json")
+
+    with patch.object(AppFinder, '_get_search_paths', return_value=search_paths):
+        finder = AppFinder(index_path=str(index_path))
+
+    assert len(finder.app_map) == 4
+
 @patch('sys.platform', 'linux')
 def test_discover_apps_linux(caplog):
     """
@@ -75,3 +141,193 @@ def test_find_app_no_match():
     finder = AppFinder()
     finder.app_map = {"firefox": "path/to/firefox.exe"}
     assert finder.find_app("chrome") is None
+
+def test_find_app_prefers_best_match():
+    finder = AppFinder()
+    finder.app_map = {
+        "chrome canary helper": "path/to/canary.exe",
+        "google chrome": "path/to/google_chrome.exe",
+    }
+    assert finder.find_app("chrome") == "path/to/google_chrome.exe"
+
+def test_find_app_tolerates_misrecognition():
+    finder = AppFinder()
+    finder.app_map = {"visual studio code": "path/to/code.exe", "code blocks": "path/to/codeblocks.exe"}
+    assert finder.find_app("vs code") == "path/to/code.exe"
+    assert finder.find_app("visual studeo code") == "path/to/code.exe"
+
+def test_find_app_unknown_multi_word_name():
+    """
+    Test that a name sharing only some of its words with the indexed apps is not found, rather than opening another app.
+    """
+    finder = AppFinder()
+    finder.app_map = {"microsoft word": "path/to/Microsoft Word.lnk", "google chrome": "path/to/Google Chrome.lnk"}
+    assert finder.find_app("microsoft teams") is None
+    assert finder.find_app("google earth") is None
+    assert finder.find_app("microsoft ward") == "path/to/Microsoft Word.lnk"
+
+def test_usage_history_breaks_close_matches():
+    """
+    Test that among good fuzzy matches the app launched more often wins, and the spoken name then resolves directly.
+    """
+    from src.usage_history import UsageHistory
+    finder = AppFinder(history=UsageHistory())
+    finder.app_map = {
+        "chrome canary helper": "path/to/canary.exe",
+        "google chrome": "path/to/google_chrome.exe",
+    }
+    assert finder.find_app("chrome") == "path/to/google_chrome.exe"
+
+    for _ in range(3):
+        finder.history.record("path/to/canary.exe")
+    assert finder.find_app("chrome") == "path/to/canary.exe"
+    # A poor match is not promoted, however often it was used
+    finder.history.record("path/to/google_chrome.exe")
+    assert finder.find_app("firefox") is None
+
+    # A launch is history, not a pin: the name still goes through the ranking
+    finder.record_launch("Browser", "path/to/google_chrome.exe")
+    assert finder._hot == {}
+    assert finder.find_app("browser") is None
+
+def test_prewarm_skips_missing_apps(tmp_path):
+    """
+    Test that prewarming maps the spoken names of used apps whose files still exist to the apps they rank to.
+    """
+    from src.usage_history import UsageHistory
+    kept, removed = tmp_path / "Spotify.lnk", tmp_path / "Old Game.lnk"
+    kept.write_bytes(b"")
+    history = UsageHistory()
+    history.record(str(kept), "spotfy")
+    # Once opened by a wrong match: not pinned, since the ranking picks another app for it
+    history.record(str(kept), "old games")
+    history.record(str(removed), "game")
+    finder = AppFinder(history=history, search_paths=[str(tmp_path)])
+    finder.app_map = {"spotify": str(kept), "old game": str(removed)}
+    finder.prewarm()
+
+    assert finder._hot == {"spotfy": str(kept)}
+
+def test_find_app_candidates_scored():
+    finder = AppFinder()
+    finder.app_map = {"firefox": "path/to/firefox.exe", "firefox developer edition": "path/to/dev.exe"}
+    candidates = finder.find_app_candidates("firefox", k=2)
+    assert [name for name, _, _ in candidates] == ["firefox", "firefox developer edition"]
+    assert candidates[0][2] == 1.0
+    assert candidates[0][2] > candidates[1][2]
+
+def test_discover_apps_parallel_keeps_precedence(tmp_path):
+    """
+    Test that concurrent discovery keeps the os.walk "first found takes precedence" order.
+    """
+    # Arrange
+    first, second = tmp_path / "first", tmp_path / "second"
+    for i in range(20):
+        (first / f"vendor {i:02d}" / "tools").mkdir(parents=True)
+        (first / f"vendor {i:02d}" / "tools" / "Shared.lnk").touch()
+        (first / f"vendor {i:02d}" / f"App {i}.lnk").touch()
+    second.mkdir()
+    (second / "Shared.lnk").touch()
+    (second / "Extra.exe").touch()
+    search_paths = [str(first), str(second), str(tmp_path / "missing")]
+    expected = {}
+    for path in search_paths:
+        for root, _, files in os.walk(path):
+            for file in files:
+                expected.setdefault(os.path.splitext(file)[0].lower(), os.path.join(root, file))
+
+    # Act
+    serial = AppFinder(search_paths=search_paths, max_workers=1)
+    parallel = AppFinder(search_paths=search_paths, max_workers=8)
+
+    # Assert
+    assert list(serial.app_map.items()) == list(expected.items())
+    assert list(parallel.app_map.items()) == list(expected.items())
+    assert parallel.app_map["extra"] == os.path.join(str(second), "Extra.exe")
+
+def _touch_app(directory, file_name):
+    """Adds a shortcut and bumps the directory mtime so the change is always detected."""
+    open(os.path.join(directory, file_name), "w").close()
+    os.utime(directory, ns=(0, os.stat(directory).st_mtime_ns + 1_000_000_000))
+
+def test_background_discovery_serves_cached_index_first(tmp_path):
+    """
+    Test that background discovery starts from the cached index and swaps in the full scan.
+    """
+    # Arrange
+    search_paths = _make_tree(tmp_path)
+    index_path = str(tmp_path / "app_index.json")
+    AppFinder(search_paths=search_paths, index_path=index_path)
+    _touch_app(search_paths[1], "Teams.lnk")
+    release = threading.Event()
+    discover_apps = AppFinder._discover_apps
+
+    def slow_discovery(self):
+        release.wait(5)
+        return discover_apps(self)
+
+    # Act
+    with patch.object(AppFinder, '_discover_apps', slow_discovery):
+        finder = AppFinder(search_paths=search_paths, index_path=index_path, background=True)
+        deadline = time.monotonic() + 5
+        while "word" not in finder.app_map and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        # Assert: the cached index is served while the scan is blocked
+        assert not finder.ready.is_set()
+        assert finder.find_app("word") is not None
+        assert "teams" not in finder.app_map
+
+        release.set()
+        assert finder.ready.wait(5)
+    assert finder.app_map["teams"] == os.path.join(search_paths[1], "Teams.lnk")
+
+def test_find_app_waits_for_background_discovery():
+    """
+    Test that a lookup issued before discovery finishes is briefly queued.
+    """
+    release = threading.Event()
+    with patch.object(AppFinder, '_discover_apps', side_effect=lambda: release.wait(5) and {"notepad": "n.exe"}):
+        finder = AppFinder(search_paths=[], background=True)
+        threading.Timer(0.05, release.set).start()
+        assert finder.find_app("notepad") == "n.exe"
+    assert finder.ready.is_set()
+
+def test_refresh_picks_up_new_apps(tmp_path):
+    search_paths = _make_tree(tmp_path)
+    finder = AppFinder(search_paths=search_paths, index_path=str(tmp_path / "app_index.json"))
+    assert finder.refresh() is False
+
+    _touch_app(search_paths[0], "Slack.lnk")
+
+    assert finder.refresh() is True
+    assert finder.find_app("slack") == os.path.join(search_paths[0], "Slack.lnk")
+
+def test_periodic_rescan(tmp_path):
+    search_paths = _make_tree(tmp_path)
+    finder = AppFinder(search_paths=search_paths, background=True, rescan_interval=0.01)
+    try:
+        assert finder.ready.wait(5)
+        _touch_app(search_paths[0], "Zoom.lnk")
+        deadline = time.monotonic() + 5
+        while "zoom" not in finder.app_map and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert "zoom" in finder.app_map
+    finally:
+        finder.stop()
+
+def test_listeners_notified_on_refresh(tmp_path):
+    """
+    Test that listeners receive the new app map when a refresh changes it.
+    """
+    (tmp_path / "notepad.exe").touch()
+    finder = AppFinder(search_paths=[str(tmp_path)])
+    seen = []
+    finder.add_listener(seen.append)
+
+    assert not finder.refresh()
+    (tmp_path / "paint.exe").touch()
+    os.utime(tmp_path, ns=(0, os.stat(tmp_path).st_mtime_ns + 10**9))
+    assert finder.refresh()
+    assert seen == [finder.app_map]
+    assert "paint" in seen[0]
@@ -0,0 +1,38 @@
+import pytest
+from src.app_search import AppSearchIndex, edit_distance, normalize, soundex
+
+def test_normalize():
+    assert normalize("  Notepad++ (x64) ") == "notepad x64"
+
+def test_soundex():
+    assert soundex("robert") == soundex("rupert") == "r163"
+    assert soundex("spotify") != soundex("outlook")
+
+def test_edit_distance_with_limit():
+    assert edit_distance("studeo", "studio", 2) == 1
+    assert edit_distance("chrome", "firefox", 2) == 3
+
+def test_search_ranks_exact_match_first():
+    index = AppSearchIndex(["microsoft teams classic", "microsoft teams", "teamviewer"])
+    results = index.search("microsoft teams", k=3)
+    assert results[0] == ("microsoft teams", 1.0)
+    assert [name for name, _ in results][1] == "microsoft teams classic"
+
+def test_search_matches_acronyms_and_sound_alikes():
+    index = AppSearchIndex(["visual studio code", "vlc media player", "foxit reader"])
+    assert index.search("vs code", k=1)[0][0] == "visual studio code"
+    assert index.search("foxet reader", k=1)[0][0] == "foxit reader"
+
+def test_search_ties_prefer_first_discovered():
+    index = AppSearchIndex(["word 2016", "word 2019"])
+    assert [name for name, _ in index.search("word", k=2)] == ["word 2016", "word 2019"]
+
+def test_search_no_candidates():
+    index = AppSearchIndex(["firefox"])
+    assert index.search("spotify") == []
+    assert index.search("") == []
+
+def test_search_rejects_names_missing_a_spoken_word():
+    index = AppSearchIndex(["microsoft word", "google chrome", "microsoft teams classic"])
+    assert index.search("google earth") == []
+    assert [name for name, _ in index.search("microsoft teams")] == ["microsoft teams classic"]
@@ -0,0 +1,48 @@
+import time
+import threading
+import speech_recognition as sr
+from src.audio_pipeline import RingBuffer, AudioCapture
+from src.vad import Endpointer
+
+RATE = 16000
+
+def test_ring_buffer_wraps_and_reports_overrun():
+    """
+    Test that the ring buffer wraps around and skips readers past overwritten audio.
+    """
+    ring = RingBuffer(8)
+    ring.write(b'abcdef')
+    assert ring.read(0, 4) == (b'abcd', 0)
+    ring.write(b'ghijkl')
+    # Bytes 0-3 were overwritten, so the read starts at the oldest byte left
+    assert ring.read(0, 100) == (b'efghijkl', 4)
+    assert ring.read(10, 100) == (b'kl', 10)
+
+def test_ring_buffer_read_waits_for_writer():
+    """
+    Test that a reader blocks until audio arrives and gets nothing once the ring is closed.
+    """
+    ring = RingBuffer(16)
+    threading.Timer(0.05, ring.write, args=(b'xy',)).start()
+    assert ring.read(0, 4, timeout=2) == (b'xy', 0)
+    ring.close()
+    assert ring.read(2, 4) == (b'', 2)
+
+def test_capture_hands_over_every_utterance(tmp_path, utterances_wav):
+    """
+    Test that capture segments a whole file-backed source, even when the consumer is slow.
+    """
+    path = tmp_path / "speech.wav"
+    utterances_wav(path, [0.3, 0.6, 0.9])
+    utterances = []
+
+    def on_utterance(audio):
+        time.sleep(0.1)
+        utterances.append(len(audio))
+
+    capture = AudioCapture(sr.AudioFile(str(path)), Endpointer(RATE), on_utterance)
+    capture.run()
+
+    assert len(utterances) == 3
+    assert utterances == sorted(utterances)
+    assert capture.dropped_bytes == 0
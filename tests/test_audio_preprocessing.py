@@ -0,0 +1,59 @@
+import numpy as np
+from unittest.mock import patch, MagicMock
+from src.audio_features import float_to_pcm, pcm_to_float, resample
+from src.audio_preprocessing import AudioPreprocessor, trim_silence
+from src.voice_recognition import VoiceRecognizer
+
+def _tone(rate, duration, freq=220.0, amplitude=0.3):
+    t = np.arange(int(rate * duration)) / rate
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+def _utterance(rate):
+    """Pre-roll, a soft onset 30 dB down, the command, and the trailing silence the endpointer keeps."""
+    rng = np.random.default_rng(0)
+    quiet = lambda seconds: rng.normal(0, 0.0005, int(rate * seconds)).astype(np.float32)
+    return np.concatenate([quiet(0.3), _tone(rate, 0.1, amplitude=0.01), _tone(rate, 0.6), quiet(0.7)])
+
+def test_trim_keeps_the_speech_and_some_padding():
+    """
+    Test that silence at both ends is cut down to the padding, while a soft onset is kept.
+    """
+    rate = 16000
+    trimmed = trim_silence(_utterance(rate), rate, padding_ms=100)
+
+    assert abs(len(trimmed) / rate - (0.1 + 0.6 + 2 * 0.1)) < 0.03
+    assert np.abs(trimmed[int(0.1 * rate):int(0.15 * rate)]).max() < 0.02
+
+def test_resampling_keeps_speech_band_and_removes_aliases():
+    """
+    Test that downsampling keeps a tone in the new band and filters out one above its Nyquist frequency.
+    """
+    low = resample(_tone(48000, 1.0, freq=1000), 48000, 16000)
+    high = resample(_tone(48000, 1.0, freq=11000), 48000, 16000)
+
+    assert len(low) == 16000
+    assert 0.25 < np.abs(low[100:-100]).max() < 0.35
+    assert np.abs(high[100:-100]).max() < 0.01
+
+@patch('speech_recognition.Microphone')
+@patch('speech_recognition.Recognizer')
+def test_backend_receives_trimmed_audio_at_its_rate(mock_recognizer_class, mock_microphone_class):
+    """
+    Test that with preprocessing on, the backend gets mono audio trimmed and resampled to its native rate.
+    """
+    recognizer_instance = mock_recognizer_class.return_value = MagicMock()
+    recognizer_instance.recognize_google.return_value = "hey windows open notepad"
+    source = mock_microphone_class.return_value.__enter__.return_value
+    source.SAMPLE_RATE, source.SAMPLE_WIDTH = 44100, 2
+    recognizer = VoiceRecognizer(preprocessing={"padding_ms": 100})
+
+    assert recognizer.recognize_utterance(float_to_pcm(_utterance(44100))) == "open notepad"
+    audio = recognizer_instance.recognize_google.call_args[0][0]
+    assert (audio.sample_rate, audio.sample_width) == (16000, 2)
+    assert abs(len(audio.frame_data) / (2 * 16000) - 0.9) < 0.03
+
+    # Interleaved stereo is mixed down to the same mono audio
+    stereo = np.repeat(_utterance(44100), 2)
+    prepared = AudioPreprocessor(trim=False).process(float_to_pcm(stereo), 44100, target_rate=16000, channels=2)
+    mono = resample(_utterance(44100), 44100, 16000)
+    assert np.allclose(pcm_to_float(prepared.frame_data), mono, atol=1e-3)
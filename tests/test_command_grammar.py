@@ -0,0 +1,57 @@
+import json
+from src.command_grammar import CommandGrammar
+
+PHRASES = ["volume up", "volume down", "shutdown", "sleep", "open notepad", "open visual studio code"]
+
+def test_grammar_includes_wake_word_prefix():
+    """
+    Test that the wake word is prepended to every phrase when given.
+    """
+    grammar = CommandGrammar(PHRASES, wake_word="Hey System")
+    assert "hey system volume up" in grammar.phrases
+    assert grammar.commands == sorted(PHRASES)
+    assert "system" in grammar.words()
+
+def test_grammar_exports():
+    """
+    Test that the Vosk and JSGF exports list every phrase.
+    """
+    grammar = CommandGrammar(PHRASES)
+    assert json.loads(grammar.to_vosk()) == sorted(PHRASES) + ["[unk]"]
+    jsgf = grammar.to_jsgf()
+    assert jsgf.startswith("#JSGF V1.0;")
+    assert "open visual studio code | shutdown" in jsgf
+
+def test_snap_to_closest_command():
+    """
+    Test that misheard transcripts snap to the closest valid command.
+    """
+    grammar = CommandGrammar(PHRASES)
+    assert grammar.snap("Volume Up!") == "volume up"
+    assert grammar.snap("volum dawn") == "volume down"
+    assert grammar.snap("opens spotify") == "open spotify"
+
+def test_snap_leaves_unrelated_text():
+    """
+    Test that text unlike any command is returned unchanged.
+    """
+    grammar = CommandGrammar(PHRASES)
+    assert grammar.snap("what is the weather") == "what is the weather"
+
+def test_snap_rejects_near_misses():
+    """
+    Test that short misheard words are not snapped, and nothing is snapped to a power command.
+    """
+    grammar = CommandGrammar(PHRASES + ["restart"])
+    assert grammar.snap("volume app") == "volume app"
+    assert grammar.snap("start") == "start"
+    assert grammar.snap("sheep") == "sheep"
+    assert grammar.snap("shut down") == "shut down"
+    assert grammar.snap("restarts") == "restarts"
+
+def test_snap_keeps_accepted_commands():
+    """
+    Test that text accepted by the command parser is not snapped to a listed phrase.
+    """
+    grammar = CommandGrammar(PHRASES + ["volume up by thirty"], accepts=lambda text: text.startswith("volume up by"))
+    assert grammar.snap("volume up by 35") == "volume up by 35"
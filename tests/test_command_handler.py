@@ -4,6 +4,8 @@ import sys
 import importlib
 import logging
 from src.command_handler import CommandHandler
+from src.volume_control import FakeVolumeEndpoint
+from src.launcher import FakePlatform
 
 @pytest.fixture
 def command_handler():
@@ -12,6 +14,7 @@ def command_handler():
     """
     with patch('src.command_handler.AppFinder'):
         handler = CommandHandler()
+        handler.launcher.platform = FakePlatform()
         yield handler
 
 def test_open_application_success(command_handler):
@@ -19,10 +22,20 @@ def test_open_application_success(command_handler):
     Test that a known application can be opened.
     """
     command_handler.app_finder.find_app.return_value = "path/to/chrome.exe"
-    # Patch os.startfile with create=True to avoid AttributeError on non-Windows systems
-    with patch('os.startfile', create=True) as mock_startfile:
-        command_handler.open_application("chrome")
-        mock_startfile.assert_called_once_with("path/to/chrome.exe")
+    command_handler.open_application("chrome")
+    assert command_handler.launcher.wait(timeout=5)
+    assert command_handler.launcher.platform.opened == ["path/to/chrome.exe"]
+    command_handler.app_finder.record_launch.assert_called_once_with("chrome", "path/to/chrome.exe")
+
+def test_failed_launch_is_not_recorded(command_handler):
+    """
+    Test that an application that could not be started doesn't count towards the usage history.
+    """
+    command_handler.launcher.platform.failing.add("path/to/missing.exe")
+    command_handler.app_finder.find_app.return_value = "path/to/missing.exe"
+    command_handler.open_application("missing")
+    assert command_handler.launcher.wait(timeout=5)
+    command_handler.app_finder.record_launch.assert_not_called()
 
 def test_open_application_not_found(command_handler, caplog):
     """
@@ -41,6 +54,21 @@ def test_execute_command_open_application(command_handler):
         command_handler.execute_command("open chrome")
         mock_open.assert_called_once_with("chrome")
 
+def test_macro_runs_its_commands_by_name(command_handler):
+    """
+    Test that a configured macro becomes a command whose steps go through the current command table.
+    """
+    command_handler.load_macros({"end my day": ["open spotify", "shutdown"]})
+    confirm = MagicMock(return_value=False)
+    command_handler.commands['shutdown'] = lambda: command_handler.shutdown(confirmation_callback=confirm)
+
+    with patch.object(command_handler, 'open_application') as mock_open, patch('os.system') as mock_os_system:
+        command_handler.execute_command("End my day")
+    mock_open.assert_called_once_with("spotify")
+    confirm.assert_called_once()
+    mock_os_system.assert_not_called()
+    assert "end my day" in command_handler.vocabulary()
+
 def test_volume_up_windows():
     """
     Test that the volume_up method increases the volume on Windows.
@@ -52,9 +80,39 @@ def test_volume_up_windows():
 
         handler = CommandHandler()
         handler.volume_up()
+        # The change is ramped in the background
+        assert handler.volume.wait(timeout=5)
 
         mock_volume_interface.SetMasterVolumeLevelScalar.assert_called_with(0.6, None)
 
+def test_repeated_volume_commands_are_coalesced():
+    """
+    Test that volume commands in quick succession read the level once and end at their combined target.
+    """
+    endpoint = FakeVolumeEndpoint(level=0.3)
+    with patch('src.command_handler.CommandHandler._get_volume_interface', return_value=endpoint):
+        handler = CommandHandler()
+        for _ in range(5):
+            handler.execute_command("volume up")
+        handler.execute_command("volume down by 20")
+        assert handler.volume.wait(timeout=5)
+
+    assert endpoint.level == pytest.approx(0.6)
+    assert endpoint.history[-1] == pytest.approx(0.6)
+    assert endpoint.calls - len(endpoint.history) == 1
+
+def test_volume_endpoint_opens_on_first_volume_command():
+    """
+    Test that the audio endpoint is only opened by the first volume command, and only once.
+    """
+    with patch('src.command_handler.CommandHandler._get_volume_interface', return_value=FakeVolumeEndpoint()) as mock_get_interface:
+        handler = CommandHandler()
+        mock_get_interface.assert_not_called()
+        handler.execute_command("set volume to 20 percent")
+        handler.execute_command("volume up")
+        assert handler.volume.wait(timeout=5)
+    mock_get_interface.assert_called_once()
+
 def test_volume_up_linux(caplog):
     """
     Test that volume control is not supported on Linux.
@@ -64,21 +122,30 @@ def test_volume_up_linux(caplog):
         handler.volume_up()
     assert "Volume control is not supported on this OS." in caplog.text
 
-@patch('os.system')
-def test_shutdown_command(mock_os_system, command_handler):
+def test_shutdown_command(command_handler):
     """
-    Test that the shutdown command calls os.system with the correct arguments.
+    Test that the shutdown command runs shutdown with the correct arguments, without a shell.
     """
     command_handler.shutdown(confirmation_callback=lambda: True)
-    mock_os_system.assert_called_once_with("shutdown /s /t 1")
+    assert command_handler.launcher.wait(timeout=5)
+    assert command_handler.launcher.platform.commands == [["shutdown", "/s", "/t", "1"]]
 
-@patch('os.system')
-def test_sleep_command(mock_os_system, command_handler):
+def test_sleep_command(command_handler):
     """
-    Test that the sleep command calls os.system with the correct arguments.
+    Test that the sleep command runs rundll32 with the correct arguments, without a shell.
     """
     command_handler.sleep()
-    mock_os_system.assert_called_once_with("rundll32.exe powrprof.dll,SetSuspendState 0,1,0")
+    assert command_handler.launcher.wait(timeout=5)
+    assert command_handler.launcher.platform.commands == [["rundll32.exe", "powrprof.dll,SetSuspendState", "0,1,0"]]
+
+def test_power_commands_are_not_run_on_other_platforms():
+    """
+    Test that power commands are refused outside Windows instead of being run.
+    """
+    with patch('src.command_handler.AppFinder'), patch('sys.platform', 'linux'), patch('subprocess.run') as mock_run:
+        handler = CommandHandler()
+        handler.shutdown(confirmation_callback=lambda: True)
+    mock_run.assert_not_called()
 
 def test_execute_command_unknown_command(command_handler):
     """
@@ -97,3 +164,51 @@ def test_execute_command_empty_input(command_handler):
     with patch.object(command_handler, 'open_application') as mock_open:
         command_handler.execute_command("")
         mock_open.assert_not_called()
+
+def test_vocabulary_lists_commands_and_apps(command_handler):
+    """
+    Test that the vocabulary covers the fixed commands and one open phrase per app.
+    """
+    command_handler.app_finder.app_map = {"notepad": "notepad.exe", "google chrome": "chrome.lnk"}
+    vocabulary = command_handler.vocabulary()
+    assert "volume up" in vocabulary
+    assert "set volume to fifty percent" in vocabulary
+    assert "open" not in vocabulary
+    assert "open notepad" in vocabulary
+    assert "open google chrome" in vocabulary
+
+def test_execute_command_with_arguments(command_handler):
+    """
+    Test that arguments spoken with a command are passed on.
+    """
+    with patch.object(command_handler, 'volume_up') as mock_volume_up, \
+         patch.object(command_handler, 'set_volume') as mock_set_volume, \
+         patch.object(command_handler, 'open_application') as mock_open:
+        command_handler.execute_command("volume up by 30")
+        command_handler.execute_command("set volume to 40 percent")
+        command_handler.execute_command("open chrome and spotify")
+    mock_volume_up.assert_called_once_with(amount=30)
+    mock_set_volume.assert_called_once_with(level=40)
+    # Launches may run concurrently, in any order
+    assert sorted(call.args for call in mock_open.call_args_list) == [("chrome",), ("spotify",)]
+
+def test_app_names_containing_and_are_not_split(command_handler):
+    """
+    Test that an app whose name contains "and" is opened as one, and a bare number after volume up is the step.
+    """
+    command_handler.app_finder.app_map = {"windows fax and scan": "fax.lnk", "notepad": "notepad.lnk"}
+    command_handler.app_finder.find_app_candidates.return_value = []
+    assert command_handler.parse("open windows fax and scan and notepad") == (
+        "open_applications", {"apps": ["windows fax and scan", "notepad"]})
+    assert command_handler.parse("open notepad and paint") == ("open_applications", {"apps": ["notepad", "paint"]})
+    assert command_handler.parse("volume up 30") == ("volume_up", {"amount": 30})
+
+def test_register_adds_command(command_handler):
+    """
+    Test that commands registered at runtime are dispatched with their arguments.
+    """
+    action = MagicMock(__name__="greet")
+    command_handler.register("say hello to {name:word}", action)
+    command_handler.execute_command("say hello to world")
+    action.assert_called_once_with(name="world")
+    assert "say hello to" not in command_handler.vocabulary()
@@ -0,0 +1,72 @@
+import pytest
+from src.command_registry import CommandRegistry, parse_number, number_words, split_list
+
+@pytest.fixture
+def registry():
+    registry = CommandRegistry()
+    registry.add("volume up [by {amount:int} [percent]]", "volume_up")
+    registry.add("set volume to {level:int} [percent]", "set_volume")
+    registry.add("open {apps:list}", "open_applications")
+    registry.add("open {app:word} in background", "open_background")
+    registry.add("mute", "mute")
+    return registry
+
+def test_match_extracts_typed_arguments(registry):
+    """
+    Test that slots are converted to their declared types.
+    """
+    assert registry.match("volume up") == ("volume_up", {})
+    assert registry.match("Volume up by 30") == ("volume_up", {"amount": 30})
+    assert registry.match("set volume to 40 percent") == ("set_volume", {"level": 40})
+    assert registry.match("set volume to 40%.") == ("set_volume", {"level": 40})
+    assert registry.match("set volume to forty five") == ("set_volume", {"level": 45})
+    assert registry.match("open chrome and spotify") == ("open_applications", {"apps": ["chrome", "spotify"]})
+
+def test_match_prefers_longest_command(registry):
+    """
+    Test that the command with the most matching words wins, regardless of registration order.
+    """
+    assert registry.match("open notepad in background") == ("open_background", {"app": "notepad"})
+    assert registry.match("open notepad") == ("open_applications", {"apps": ["notepad"]})
+
+def test_match_requires_whole_words(registry):
+    """
+    Test that trailing words are ignored but partial words do not match.
+    """
+    assert registry.match("mute please") == ("mute", {})
+    assert registry.match("muted") is None
+    assert registry.match("some unknown command") is None
+
+def test_phrases_expand_optional_parts_and_slots(registry):
+    """
+    Test that patterns expand into concrete phrases for recognition grammars.
+    """
+    phrases = registry.phrases({"apps": ["notepad"]})
+    assert "volume up" in phrases
+    assert "volume up by thirty percent" in phrases
+    assert "set volume to hundred" in phrases
+    assert "open notepad" in phrases
+    # The word slot has no listed values
+    assert not any(phrase.endswith("in background") for phrase in phrases)
+
+def test_invalid_patterns_are_rejected():
+    """
+    Test that malformed patterns raise ValueError when added.
+    """
+    registry = CommandRegistry()
+    for pattern in ["volume [up", "volume up]", "set {level:float}", "[please] mute"]:
+        with pytest.raises(ValueError):
+            registry.add(pattern, "action")
+
+def test_number_helpers():
+    """
+    Test number parsing and spelling, and list splitting.
+    """
+    assert parse_number("one hundred") == 100
+    assert parse_number("twenty-five") == 25
+    assert number_words(45) == "forty five"
+    assert split_list("word, excel and outlook") == ["word", "excel", "outlook"]
+    apps = {"windows fax and scan", "tom and jerry"}
+    assert split_list("windows fax and scan and notepad", apps.__contains__) == ["windows fax and scan", "notepad"]
+    assert split_list("tom and jerry", apps.__contains__) == ["tom and jerry"]
+    assert split_list("tom, and jerry", apps.__contains__) == ["tom", "jerry"]
@@ -0,0 +1,25 @@
+import pytest
+import json
+from src.config import DEFAULT_CONFIG, load_config
+
+def test_load_config_defaults_when_missing(tmp_path):
+    config = load_config(str(tmp_path / "missing.json"))
+    assert config == DEFAULT_CONFIG
+    assert config is not DEFAULT_CONFIG
+
+def test_load_config_overrides_defaults(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"recognizer_backend": "vosk", "backend_options": {"vosk": {"model_path": "model"}}}))
+
+    config = load_config(str(path))
+
+    assert config["recognizer_backend"] == "vosk"
+    assert config["backend_options"]["vosk"] == {"model_path": "model"}
+    assert config["wake_word"] == DEFAULT_CONFIG["wake_word"]
+
+def test_load_config_ignores_invalid_file(tmp_path, caplog):
+    path = tmp_path / "config.json"
+    path.write_text("[1, 2")
+
+    assert load_config(str(path)) == DEFAULT_CONFIG
+    assert "Ignoring unreadable configuration" in caplog.text
@@ -0,0 +1,81 @@
+import csv
+import json
+import threading
+import pytest
+from src.latency import LatencyTracer
+
+def test_spans_are_aggregated_into_percentiles():
+    """
+    Test that span durations are kept per stage and summarized as percentiles.
+    """
+    tracer = LatencyTracer()
+    for duration_ms in range(1, 101):
+        tracer._record("find_app", 0.0, duration_ms / 1000.0, None)
+    with tracer.span("startfile"):
+        pass
+
+    stats = tracer.stats()
+    assert stats["find_app"]["count"] == 100
+    assert stats["find_app"]["p50_ms"] == pytest.approx(50.5)
+    assert stats["find_app"]["p99_ms"] == pytest.approx(99.01)
+    assert stats["find_app"]["max_ms"] == pytest.approx(100.0)
+    assert stats["startfile"]["count"] == 1
+
+def test_trace_collects_spans_from_several_threads():
+    """
+    Test that spans on any thread where a trace is active are added to that command's trace.
+    """
+    tracer = LatencyTracer()
+    trace = tracer.start_trace()
+
+    def work(stage):
+        with tracer.activate(trace), tracer.span(stage):
+            pass
+
+    for stage in ("recognize", "execute_command"):
+        worker = threading.Thread(target=work, args=(stage,))
+        worker.start()
+        worker.join()
+    # Spans outside an active trace only count towards the stage
+    with tracer.span("vad"):
+        pass
+    tracer.finish(trace)
+
+    [exported] = tracer.traces()
+    assert [span["stage"] for span in exported["spans"]] == ["recognize", "execute_command"]
+    assert exported["total_ms"] >= exported["spans"][-1]["offset_ms"]
+    assert set(tracer.stats()) == {"recognize", "execute_command", "vad", "total"}
+
+def test_disabled_tracer_records_nothing():
+    """
+    Test that a disabled tracer hands out a shared no-op span and starts no traces.
+    """
+    tracer = LatencyTracer(enabled=False)
+    assert tracer.span("find_app") is tracer.span("startfile")
+    with tracer.activate(tracer.start_trace()), tracer.span("find_app"):
+        pass
+    tracer.finish(None)
+    assert tracer.stats() == {}
+    assert tracer.traces() == []
+
+def test_export_json_and_csv(tmp_path):
+    """
+    Test that the statistics are exported as JSON (with traces) and as CSV (one row per stage).
+    """
+    tracer = LatencyTracer()
+    trace = tracer.start_trace()
+    with tracer.activate(trace), tracer.span("find_app"):
+        pass
+    tracer.finish(trace)
+
+    tracer.export(str(tmp_path / "latency.json"))
+    tracer.export(str(tmp_path / "latency.csv"))
+
+    with open(tmp_path / "latency.json") as f:
+        exported = json.load(f)
+    assert set(exported["stages"]) == {"find_app", "total"}
+    assert exported["traces"][0]["spans"][0]["stage"] == "find_app"
+    with open(tmp_path / "latency.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["stage"] for row in rows] == ["find_app", "total"]
+    assert float(rows[0]["p90_ms"]) >= 0.0
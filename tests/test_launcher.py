@@ -0,0 +1,71 @@
+import pytest
+import time
+import logging
+from src.latency import LatencyTracer
+from src.launcher import Launcher, FakePlatform
+
+def test_launch_returns_before_a_slow_start():
+    """
+    Test that launching returns at once, and the outcome and PID are reported when the start completes.
+    """
+    launcher = Launcher(platform=FakePlatform(open_ms=200))
+    start = time.perf_counter()
+    future = launcher.launch("outlook", "C:/Programs/Outlook.lnk")
+    assert time.perf_counter() - start < 0.1
+    assert launcher.running() == []
+
+    pid = future.result(timeout=5)
+    assert launcher.running() == [("outlook", pid)]
+
+def test_launch_is_timed_in_the_command_trace():
+    """
+    Test that the launch span on the worker is added to the trace of the command that started it,
+    and the trace only completes once the application has started.
+    """
+    tracer = LatencyTracer()
+    launcher = Launcher(platform=FakePlatform(open_ms=50), tracer=tracer)
+    trace = tracer.start_trace()
+    with tracer.activate(trace), tracer.span("execute_command"):
+        future = launcher.launch("outlook", "C:/Programs/Outlook.lnk")
+    tracer.finish(trace)
+    assert tracer.traces() == []
+
+    future.result(timeout=5)
+    [exported] = tracer.traces()
+    assert [span["stage"] for span in exported["spans"]] == ["execute_command", "launch"]
+    assert exported["total_ms"] >= 50
+
+def test_repeated_launch_is_deduplicated_while_running(caplog, clock):
+    """
+    Test that opening a running app again within the window is ignored, but not after it exits or the window passes.
+    """
+    platform = FakePlatform()
+    launcher = Launcher(platform=platform, dedup_seconds=10, clock=clock)
+    path = "C:/Programs/Teams.lnk"
+    with caplog.at_level(logging.INFO):
+        assert launcher.launch("teams", path) is not None
+        launcher.wait(timeout=5)
+        clock.now = 3.0
+        assert launcher.launch("teams", path) is None
+    assert "'teams' was opened 3s ago; not opening it again." in caplog.text
+
+    platform.exit(path)
+    assert launcher.launch("teams", path) is not None
+    launcher.wait(timeout=5)
+    clock.now = 20.0
+    assert launcher.launch("teams", path) is not None
+    launcher.wait(timeout=5)
+    assert platform.opened == [path] * 3
+
+def test_failed_launch_is_logged_and_can_be_retried(caplog):
+    """
+    Test that a launch error is logged from the worker and does not block the next attempt.
+    """
+    platform = FakePlatform(failing=["C:/missing.lnk"])
+    launcher = Launcher(platform=platform)
+    launcher.launch("missing", "C:/missing.lnk")
+    assert launcher.wait(timeout=5)
+    assert "Could not open 'missing': [WinError 2]" in caplog.text
+
+    platform.failing.clear()
+    assert launcher.launch("missing", "C:/missing.lnk").result(timeout=5) is not None
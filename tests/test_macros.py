@@ -0,0 +1,73 @@
+import pytest
+import threading
+from src.command_registry import CommandRegistry
+from src.macros import MacroEngine, split_sequence
+
+@pytest.fixture
+def registry():
+    registry = CommandRegistry()
+    registry.add("open {apps:list}", "open_applications")
+    registry.add("volume up [by {amount:int} [percent]]", "volume_up")
+    registry.add("volume down [by {amount:int} [percent]]", "volume_down")
+    registry.add("mute", "mute")
+    return registry
+
+def _engine(registry, run_action, **kwargs):
+    return MacroEngine(registry.match, run_action, concurrent_actions=["open_applications"], **kwargs)
+
+def test_sequence_steps_borrow_the_previous_verb(registry):
+    """
+    Test that a sequence is split into commands, with a bare name taking the verb of the step before it.
+    """
+    engine = _engine(registry, None)
+    assert split_sequence("open outlook then teams, and then mute") == ["open outlook", "teams", "mute"]
+
+    steps = engine.plan("open outlook then teams then mute")
+    assert [(step.action, step.arguments) for step in steps] == [
+        ("open_applications", {"apps": ["outlook"]}),
+        ("open_applications", {"apps": ["teams"]}),
+        ("mute", {}),
+    ]
+    assert [step.arguments for step in engine.plan("volume up by 20 then down")] == [{"amount": 20}, {}]
+    assert engine.plan("open chrome and spotify")[1].arguments == {"apps": ["spotify"]}
+    assert engine.plan("what time is it then mute") is None
+
+def test_launches_run_together_and_other_steps_wait(registry):
+    """
+    Test that launches run concurrently, and a step after them only runs once they are all done.
+    """
+    # Both launches must be running at once to pass the barrier
+    barrier = threading.Barrier(2, timeout=5)
+    done = []
+
+    def run_action(action, arguments):
+        if action == "open_applications":
+            barrier.wait()
+        done.append((action, arguments.get("apps")))
+
+    engine = _engine(registry, run_action)
+    engine.run(engine.plan("open outlook then teams then mute then volume up"))
+
+    assert sorted(done[:2]) == [("open_applications", ["outlook"]), ("open_applications", ["teams"])]
+    assert done[2:] == [("mute", None), ("volume_up", None)]
+
+def test_macros_are_compiled_once_when_loaded(registry, caplog):
+    """
+    Test that macros are parsed when loaded, invalid ones are skipped, and running one parses nothing.
+    """
+    parsed = []
+
+    def parse(text):
+        parsed.append(text)
+        return registry.match(text)
+
+    ran = []
+    engine = MacroEngine(parse, lambda action, arguments: ran.append(action))
+    loaded = engine.load({"start my day": ["open outlook then teams", "volume down by 30"], "broken": ["fly away"]})
+
+    assert list(loaded) == ["start my day"]
+    assert "Macro 'broken': no command matches 'fly away'" in caplog.text
+    parsed.clear()
+    engine.run(engine.macros["start my day"])
+    assert parsed == []
+    assert ran == ["open_applications", "open_applications", "volume_down"]
@@ -1,17 +1,21 @@
 import pytest
-from unittest.mock import patch, MagicMock
+import time
+import logging
+import threading
+from unittest.mock import patch, MagicMock, AsyncMock
 import tkinter as tk
-from src.main_app import VoiceControlApp
+from src.main_app import VoiceControlApp, TkBridge, ScrolledTextHandler
 from speech_recognition import AudioSource
 
 @pytest.fixture
 def app():
     """
     Pytest fixture to create a VoiceControlApp instance for testing.
-    This fixture patches the GUI and the listener thread to avoid starting them.
+    This fixture patches the GUI and the background threads to avoid starting them.
+    Each thread gets its own mock so the listener thread can be checked on its own.
     """
     with patch('tkinter.Tk') as mock_tk, \
-         patch('threading.Thread'), \
+         patch('threading.Thread', side_effect=lambda *args, **kwargs: MagicMock()), \
          patch('speech_recognition.Microphone') as mock_microphone:
         # Configure the mock to return a valid AudioSource object with all required attributes
         mock_audio_source = MagicMock(spec=AudioSource)
@@ -23,6 +27,8 @@ def app():
         mock_microphone.return_value.__enter__.return_value = mock_audio_source
         root = mock_tk()
         app = VoiceControlApp(root)
+        # The listener thread is mocked, so load on this thread instead
+        app.load_components()
         yield app
 
 def test_app_initialization(app):
@@ -70,13 +76,156 @@ def test_restart_command_without_confirmation(mock_popup, app):
         mock_popup.assert_called_once_with("Restart Confirmation", "Are you sure you want to restart?")
         mock_os_system.assert_not_called()
 
-def test_listening_loop_command_execution(app):
+def test_listening_runs_voice_core(app):
     """
-    Test that a recognized command is executed in the listening loop.
+    Test that listening runs the asyncio core, wired to recognition and command execution.
     """
-    # Make the listening loop run only once
-    with patch.object(app.voice_recognizer, 'listen_for_command', side_effect=["open chrome", SystemExit]), \
-         patch.object(app.command_handler, 'execute_command') as mock_execute:
-        with pytest.raises(SystemExit):
-            app.start_listening()
-        mock_execute.assert_called_once_with("open chrome")
+    assert app.core.execute == app.command_handler.execute_command
+    assert app.core.recognize.func == app.voice_recognizer.recognize_utterance
+    assert app.core.recognize.keywords == {"wake_word": "hey windows"}
+
+    with patch.object(app.core, 'run', new_callable=AsyncMock) as mock_run:
+        app.start_listening()
+    mock_run.assert_awaited_once()
+
+def test_close_stops_voice_core(app):
+    """
+    Test that closing the window stops the core before the window is destroyed.
+    """
+    with patch.object(app.core, 'stop') as mock_stop:
+        app.on_close()
+    mock_stop.assert_called_once()
+    app.root.destroy.assert_called_once()
+
+def test_bridge_runs_worker_calls_on_tk_thread():
+    """
+    Test that calls from worker threads only run when the Tk thread polls the bridge.
+    """
+    root = MagicMock()
+    bridge = TkBridge(root)
+    result = []
+    worker = threading.Thread(target=lambda: result.append(bridge.call(lambda a, b: (a + b, threading.current_thread()), 2, 3)))
+    worker.start()
+    while bridge._calls.empty():
+        time.sleep(0.01)
+
+    bridge._poll()
+    worker.join(timeout=2)
+    assert result == [(5, threading.current_thread())]
+    assert bridge.call(max, 1, 4) == 4
+
+def _log_handler(**kwargs):
+    handler = ScrolledTextHandler(MagicMock(), **kwargs)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger = logging.getLogger("test_gui_log")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.handlers = [handler]
+    return handler, logger
+
+def test_log_handler_batches_records_from_threads():
+    """
+    Test that records from worker threads only reach the widget when drained, in one insert per batch.
+    """
+    handler, logger = _log_handler(batch_size=100)
+    workers = [threading.Thread(target=lambda i=i: [logger.info(f"worker {i} line {n}") for n in range(50)]) for i in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    handler.text_widget.insert.assert_not_called()
+
+    assert handler.drain() == 100
+    assert handler.drain() == 100
+    assert handler.drain() == 0
+    assert handler.text_widget.insert.call_count == 2
+    assert handler.text_widget.insert.call_args.args[1].count("\n") == 100
+
+def test_log_handler_keeps_bounded_view():
+    """
+    Test that the view is trimmed to the most recent lines and the queue never holds more than that.
+    """
+    handler, logger = _log_handler(max_lines=10, batch_size=4)
+    for n in range(25):
+        logger.info(f"line {n}")
+    assert len(handler._pending) == 10
+
+    while handler.drain():
+        pass
+    inserted = "".join(call.args[1] for call in handler.text_widget.insert.call_args_list)
+    assert inserted.split()[::2] == ["line"] * 10
+    assert inserted.split()[1::2] == [str(n) for n in range(15, 25)]
+    handler.text_widget.delete.assert_not_called()
+
+    # Five more lines, in batches of 4 and 1, push the oldest five out of the view
+    for n in range(25, 30):
+        logger.info(f"line {n}")
+    while handler.drain():
+        pass
+    assert [call.args for call in handler.text_widget.delete.call_args_list] == [("1.0", "5.0"), ("1.0", "2.0")]
+
+def test_latency_table_lists_stages_in_pipeline_order():
+    """
+    Test that the latency table shows the stages in pipeline order, with the backend after the cache.
+    """
+    from src.main_app import format_latency_table
+    stats = {stage: {"count": 2, "mean_ms": 1.0, "p50_ms": 1.0, "p90_ms": 2.0, "p99_ms": 3.0, "max_ms": 3.0}
+             for stage in ["total", "launch", "recognize_google", "capture", "recognition_cache"]}
+
+    lines = format_latency_table(stats).splitlines()
+
+    assert [line.split()[0] for line in lines[1:]] == ["capture", "recognition_cache", "recognize_google", "launch", "total"]
+    assert lines[1].split()[1:] == ["2", "1.0", "2.0", "3.0"]
+    assert format_latency_table({}) == "No commands timed yet."
+
+def test_export_latency(app, tmp_path):
+    """
+    Test that the export button writes the latency statistics to the chosen file.
+    """
+    path = str(tmp_path / "latency.csv")
+    with patch('tkinter.filedialog.asksaveasfilename', return_value=path):
+        app.export_latency()
+    with open(path) as f:
+        assert f.readline().startswith("stage,count,mean_ms,p50_ms,p90_ms,p99_ms,max_ms")
+
+def test_startup_failure_is_shown_in_status(app):
+    """
+    Test that an error while loading the components is shown as the status instead of listening.
+    """
+    app.core = None
+    with patch('src.main_app.create_components', side_effect=OSError("No Default Input Device Available")), \
+         patch.object(app, 'set_status') as mock_status:
+        app.start_listening()
+    mock_status.assert_called_with("Startup failed: No Default Input Device Available")
+    assert app.core is None
+
+def test_importing_main_app_defers_heavy_modules():
+    """
+    Test that importing the app and drawing the first latency table don't import the speech, audio or volume modules.
+    """
+    import os
+    import subprocess
+    import sys
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    code = ("import sys, main_app; main_app.format_latency_table(main_app.latency.tracer.stats()); "
+            "print(sorted(m for m in ('speech_recognition', 'numpy', 'asyncio', "
+            "'command_handler', 'voice_recognition') if m in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", code], cwd=src, capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
+
+def test_headless_mode_regenerates_the_grammar_as_apps_are_found():
+    """
+    Test that headless mode sets the grammar at startup and again whenever the app index changes.
+    """
+    from src import main_app
+    command_handler, voice_recognizer = MagicMock(), MagicMock()
+    command_handler.vocabulary.side_effect = [["open notepad"], ["open notepad", "open teams"]]
+    with patch('src.main_app.create_components', return_value=(command_handler, voice_recognizer)), \
+         patch('src.main_app.create_core'), \
+         patch('asyncio.run'):
+        main_app.run_headless()
+
+    listener = command_handler.app_finder.add_listener.call_args[0][0]
+    listener({"teams": "C:/Start Menu/teams.lnk"})
+    assert [c.args[0] for c in voice_recognizer.set_grammar.call_args_list] == [
+        ["open notepad"], ["open notepad", "open teams"]]
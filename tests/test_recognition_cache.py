@@ -0,0 +1,106 @@
+import pytest
+import numpy as np
+from src.audio_features import read_wav, write_wav
+from src.recognition_cache import RecognitionCache
+
+SAMPLE_RATE = 16000
+# (F1, F2) formants of the vowels in two commands that differ in their last word
+VOLUME_UP = [(570, 840), (300, 870), (300, 870), (730, 1090)]
+VOLUME_DOWN = [(570, 840), (300, 870), (300, 870), (660, 1720)]
+OPEN_NOTEPAD = [(570, 840), (530, 1840), (570, 840), (660, 1720), (730, 1090)]
+
+def synth_speech(formants, rng, f0=130.0, stretch=1.0, syllable_ms=110):
+    """Speech-like audio: harmonics shaped by vowel formants, one syllable per vowel."""
+    pieces = []
+    for f1, f2 in formants:
+        t = np.arange(int(SAMPLE_RATE * syllable_ms * stretch / 1000)) / SAMPLE_RATE
+        harmonics = np.arange(1, int(4000 / f0)) * f0
+        gains = np.exp(-((harmonics - f1) / 120.0) ** 2) + 0.6 * np.exp(-((harmonics - f2) / 180.0) ** 2) + 0.02
+        phases = rng.uniform(0, 2 * np.pi, len(harmonics))
+        pieces.append((gains[:, None] * np.sin(2 * np.pi * harmonics[:, None] * t + phases[:, None])).sum(axis=0) * np.hanning(len(t)))
+    speech = np.concatenate(pieces)
+    return 0.3 * speech / np.abs(speech).max()
+
+def utterance(formants, rng, gain=1.0, **kwargs):
+    """The command between short stretches of background noise."""
+    speech = gain * synth_speech(formants, rng, **kwargs)
+    signal = np.concatenate([np.zeros(int(0.3 * SAMPLE_RATE)), speech, np.zeros(int(0.3 * SAMPLE_RATE))])
+    return signal + 0.003 * rng.standard_normal(len(signal))
+
+@pytest.fixture
+def recordings(tmp_path):
+    """WAV fixtures: two takes of 'volume up', one of 'volume down' and one of 'open notepad'."""
+    rng = np.random.default_rng(0)
+    takes = {
+        "volume_up_1": utterance(VOLUME_UP, rng),
+        "volume_up_2": utterance(VOLUME_UP, rng, gain=0.6, f0=133.0, stretch=1.03),
+        "volume_down": utterance(VOLUME_DOWN, rng),
+        "open_notepad": utterance(OPEN_NOTEPAD, rng),
+    }
+    paths = {}
+    for name, samples in takes.items():
+        paths[name] = str(tmp_path / f"{name}.wav")
+        write_wav(paths[name], samples, SAMPLE_RATE)
+    return {name: read_wav(path)[0] for name, path in paths.items()}
+
+def test_repeated_utterance_is_answered_from_cache(recordings):
+    """
+    Test that a second take of a cached command is a hit while other commands miss.
+    """
+    cache = RecognitionCache(SAMPLE_RATE)
+    assert cache.lookup(cache.fingerprint(recordings["volume_up_1"])) is None
+    assert cache.store(cache.fingerprint(recordings["volume_up_1"]), "hey windows volume up", confidence=0.95)
+
+    assert cache.lookup(cache.fingerprint(recordings["volume_up_2"])) == "hey windows volume up"
+    assert cache.lookup(cache.fingerprint(recordings["volume_down"])) is None
+    assert cache.lookup(cache.fingerprint(recordings["open_notepad"])) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 3, 1)
+    assert stats["hit_rate"] == 0.25
+
+def test_low_confidence_transcripts_are_not_cached(recordings):
+    """
+    Test that only transcripts at or above the confidence threshold are stored.
+    """
+    cache = RecognitionCache(SAMPLE_RATE, min_confidence=0.8)
+    fingerprint = cache.fingerprint(recordings["volume_up_1"])
+
+    assert not cache.store(fingerprint, "volume app", confidence=0.4)
+    assert not cache.store(fingerprint, "volume up", confidence=None)
+    assert cache.lookup(cache.fingerprint(recordings["volume_up_2"])) is None
+    assert cache.stats()["rejected_low_confidence"] == 2
+
+    # Without a threshold, backends that report no confidence are cached too
+    ungated = RecognitionCache(SAMPLE_RATE, min_confidence=None)
+    assert ungated.store(fingerprint, "volume up")
+
+def test_least_recently_used_entry_is_evicted(recordings):
+    """
+    Test that the cache stays bounded and evicts the entry unused for longest.
+    """
+    cache = RecognitionCache(SAMPLE_RATE, capacity=2, min_confidence=None)
+    fingerprints = {name: cache.fingerprint(samples) for name, samples in recordings.items()}
+    cache.store(fingerprints["volume_up_1"], "volume up")
+    cache.store(fingerprints["volume_down"], "volume down")
+    # Using 'volume up' makes 'volume down' the least recently used
+    assert cache.lookup(fingerprints["volume_up_2"]) == "volume up"
+
+    cache.store(fingerprints["open_notepad"], "open notepad")
+
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+    assert cache.lookup(fingerprints["volume_down"]) is None
+    assert cache.lookup(fingerprints["volume_up_2"]) == "volume up"
+
+def test_silence_has_no_fingerprint():
+    """
+    Test that audio without enough voiced sound is neither looked up nor cached.
+    """
+    rng = np.random.default_rng(1)
+    cache = RecognitionCache(SAMPLE_RATE, min_confidence=None)
+    fingerprint = cache.fingerprint(0.0003 * rng.standard_normal(SAMPLE_RATE))
+
+    assert fingerprint is None
+    assert cache.lookup(fingerprint) is None
+    assert not cache.store(fingerprint, "volume up")
+    assert cache.stats()["misses"] == 0
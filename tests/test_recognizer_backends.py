@@ -0,0 +1,93 @@
+import pytest
+import json
+from unittest.mock import patch, MagicMock
+import speech_recognition as sr
+from src.recognizer_backends import GoogleBackend, VoskBackend, create_backend
+
+def _audio():
+    return sr.AudioData(b'\x00\x00' * 1600, 16000, 2)
+
+def test_create_backend_google():
+    recognizer = MagicMock()
+    recognizer.recognize_google.return_value = "open notepad"
+
+    backend = create_backend("google", recognizer=recognizer)
+
+    assert isinstance(backend, GoogleBackend)
+    assert backend.recognize(_audio()) == "open notepad"
+
+def test_google_backend_reports_confidence():
+    recognizer = MagicMock()
+    recognizer.recognize_google.return_value = ("open notepad", 0.92)
+
+    assert GoogleBackend(recognizer).recognize_with_confidence(_audio()) == ("open notepad", 0.92)
+    assert recognizer.recognize_google.call_args.kwargs["with_confidence"]
+
+def test_create_backend_unknown_falls_back_to_google(caplog):
+    backend = create_backend("nonexistent", recognizer=MagicMock())
+    assert isinstance(backend, GoogleBackend)
+    assert "Unknown recognizer backend 'nonexistent'" in caplog.text
+
+def test_create_backend_missing_package_falls_back_to_google(caplog):
+    with patch.dict('sys.modules', {'vosk': None}):
+        backend = create_backend("vosk", recognizer=MagicMock(), model_path="model")
+    assert isinstance(backend, GoogleBackend)
+    assert "needs the vosk package" in caplog.text
+
+@pytest.fixture
+def fake_vosk():
+    vosk = MagicMock()
+    with patch.dict('sys.modules', {'vosk': vosk}):
+        yield vosk
+
+def test_vosk_backend_recognizes_offline(fake_vosk):
+    decoder = fake_vosk.KaldiRecognizer.return_value
+    decoder.FinalResult.return_value = json.dumps({"text": "volume up"})
+
+    backend = create_backend("vosk", model_path="model")
+
+    assert isinstance(backend, VoskBackend)
+    assert backend.offline
+    assert backend.recognize(_audio()) == "volume up"
+    fake_vosk.Model.assert_called_once_with("model")
+    decoder.AcceptWaveform.assert_called_once()
+
+def test_vosk_backend_nothing_understood(fake_vosk):
+    fake_vosk.KaldiRecognizer.return_value.FinalResult.return_value = json.dumps({"text": ""})
+    backend = VoskBackend("model")
+    with pytest.raises(sr.UnknownValueError):
+        backend.recognize(_audio())
+
+def test_vosk_backend_averages_word_confidence(fake_vosk):
+    decoder = fake_vosk.KaldiRecognizer.return_value
+    decoder.FinalResult.return_value = json.dumps(
+        {"text": "volume up", "result": [{"word": "volume", "conf": 1.0}, {"word": "up", "conf": 0.6}]}
+    )
+
+    assert VoskBackend("model").recognize_with_confidence(_audio()) == ("volume up", 0.8)
+    decoder.SetWords.assert_called_once_with(True)
+
+def test_vosk_backend_decodes_with_grammar(fake_vosk):
+    from src.command_grammar import CommandGrammar
+    backend = VoskBackend("model")
+    grammar = CommandGrammar(["volume up", "open notepad"])
+    backend.set_grammar(grammar)
+    fake_vosk.KaldiRecognizer.return_value.FinalResult.return_value = json.dumps({"text": "volume up"})
+
+    backend.recognize(_audio())
+
+    fake_vosk.KaldiRecognizer.assert_called_with(backend.model, 16000, grammar.to_vosk())
+
+def test_sphinx_backend_writes_jsgf_grammar():
+    from src.command_grammar import CommandGrammar
+    from src.recognizer_backends import SphinxBackend
+    recognizer = MagicMock()
+    with patch.dict('sys.modules', {'pocketsphinx': MagicMock()}):
+        backend = SphinxBackend(recognizer)
+    backend.set_grammar(CommandGrammar(["sleep"]))
+
+    backend.recognize(_audio())
+
+    path = recognizer.recognize_sphinx.call_args.kwargs["grammar"]
+    with open(path, encoding="utf-8") as f:
+        assert "public <command> = sleep;" in f.read()
@@ -0,0 +1,95 @@
+import time
+import pytest
+import speech_recognition as sr
+from unittest.mock import patch
+from src.recognizer_backends import GoogleBackend, RecognizerBackend
+from src.resilience import ResilientBackend
+from src.voice_recognition import VoiceRecognizer
+
+AUDIO = sr.AudioData(b"\x00\x10" * 8000, 16000, 2)
+
+class LocalBackend(RecognizerBackend):
+    """Stands in for an offline engine."""
+    name = "local"
+    offline = True
+
+    def recognize(self, audio):
+        return "open notepad locally"
+
+@patch('speech_recognition.Microphone')
+def test_failed_and_slow_requests_are_retried_and_hedged(mock_microphone_class, speech_server):
+    """
+    Test that a request failing with HTTP 500 is retried, and a slow one is hedged with a second request.
+    """
+    source = mock_microphone_class.return_value.__enter__.return_value
+    source.SAMPLE_RATE, source.SAMPLE_WIDTH = 16000, 2
+    recognizer = VoiceRecognizer(backend_options={"endpoint": speech_server.url},
+                                 resilience={"backoff_s": 0.01, "hedge_after_ms": 200})
+    backend = recognizer.backend
+    # Wrapped around the Google backend, under its name
+    assert backend.primary.name == backend.name == "google" and backend.counts["calls"] == 0
+
+    speech_server.faults = ["error"]
+    assert backend.recognize(AUDIO) == "hey windows open notepad"
+    assert backend.counts["retries"] == 1 and len(speech_server.received) == 2
+
+    speech_server.faults = [3000]
+    start = time.monotonic()
+    assert backend.recognize(AUDIO) == "hey windows open notepad"
+    assert time.monotonic() - start < 1.5
+    assert backend.counts["hedges"] == 1 and len(speech_server.received) == 4
+
+def test_deadline_bounds_a_hanging_service(speech_server):
+    """
+    Test that a service that does not answer makes the call fail with a RequestError by the deadline.
+    """
+    speech_server.latency_ms = 3000
+    backend = ResilientBackend(GoogleBackend(endpoint=speech_server.url), deadline_s=0.4, hedge_after_ms=None)
+
+    start = time.monotonic()
+    with pytest.raises(sr.RequestError):
+        backend.recognize(AUDIO)
+    assert time.monotonic() - start < 1.0
+    assert backend.primary.recognizer.operation_timeout == 0.4
+
+def test_circuit_breaker_falls_back_to_the_local_engine_and_recovers(speech_server):
+    """
+    Test that repeated failures open the circuit so the local engine answers without calling the service,
+    and that after the reset time a successful trial call closes it again.
+    """
+    now = [0.0]
+    backend = ResilientBackend(GoogleBackend(endpoint=speech_server.url), fallback=LocalBackend(), retries=0,
+                               hedge_after_ms=None, failure_threshold=2, reset_s=30,
+                               clock=lambda: time.monotonic() + now[0])
+    speech_server.faults = ["error"] * 2
+
+    assert backend.recognize(AUDIO) == "open notepad locally"
+    assert backend.recognize(AUDIO) == "open notepad locally"
+    assert backend.breaker.state == "open"
+    assert backend.recognize(AUDIO) == "open notepad locally"
+    assert len(speech_server.received) == 2
+
+    now[0] += 31
+    assert backend.recognize(AUDIO) == "hey windows open notepad"
+    assert backend.breaker.state == "closed" and len(speech_server.received) == 3
+    assert backend.counts["fallbacks"] == 3
+
+def test_a_hedge_that_hears_nothing_does_not_end_the_call(speech_server):
+    """
+    Test that a hedge answering with no words lets the slower request answer, and that no words
+    are reported only when no request heard any.
+    """
+    class DeafBackend(LocalBackend):
+        def recognize(self, audio):
+            time.sleep(0.1)
+            raise sr.UnknownValueError()
+
+    speech_server.latency_ms = 500
+    backend = ResilientBackend(GoogleBackend(endpoint=speech_server.url), fallback=DeafBackend(), hedge_after_ms=50)
+    assert backend.recognize(AUDIO) == "hey windows open notepad"
+    assert backend.counts["hedges"] == 1
+
+    backend = ResilientBackend(DeafBackend(), fallback=DeafBackend(), hedge_after_ms=50)
+    with pytest.raises(sr.UnknownValueError):
+        backend.recognize(AUDIO)
+    assert backend.breaker.state == "closed"
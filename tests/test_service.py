@@ -0,0 +1,142 @@
+import pytest
+import json
+import urllib.request
+import urllib.error
+from unittest.mock import patch, MagicMock
+import numpy as np
+import speech_recognition as sr
+from src.audio_features import write_wav
+from src.command_handler import CommandHandler
+from src.launcher import FakePlatform
+from src.voice_recognition import VoiceRecognizer
+from src.service import VoiceService, ServiceServer
+
+RATE = 16000
+
+def _command_wav(path, rate=RATE):
+    """Writes one tone burst, standing in for a spoken command, between stretches of quiet noise."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(0.6 * rate)) / rate
+    write_wav(str(path), np.concatenate([rng.normal(0, 0.001, rate), 0.3 * np.sin(2 * np.pi * 220 * t),
+                                         rng.normal(0, 0.001, rate)]), rate)
+
+@pytest.fixture
+def service():
+    """A service whose recognizers 'hear' the transcript set for their source in service.transcripts."""
+    with patch('src.command_handler.AppFinder'):
+        handler = CommandHandler()
+    handler.launcher.platform = FakePlatform()
+    handler.app_finder.find_app.side_effect = lambda name: f"C:/Start Menu/{name}.lnk"
+    transcripts = {}
+
+    def create_recognizer(source):
+        recognizer = VoiceRecognizer(source=source)
+        recognizer.recognizer.recognize_google = MagicMock(
+            return_value=transcripts.get(getattr(source, "filename_or_fileobject", None), "hey windows open notepad"))
+        return recognizer
+
+    service = VoiceService(handler, create_recognizer, max_sessions=2)
+    service.transcripts = transcripts
+    yield service
+    service.close()
+
+def _request(server, method, path, body=None, token=None, content_type="application/json", headers=None):
+    data = json.dumps(body).encode() if isinstance(body, dict) else body
+    request = urllib.request.Request(server.url + path, data=data, method=method, headers=headers or {})
+    request.add_header("Content-Type", content_type)
+    if token:
+        request.add_header("Authorization", f"Bearer {token}")
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+@pytest.fixture
+def server(service):
+    server = ServiceServer(service, port=0, token="secret")
+    server.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_text_commands_over_loopback_require_the_token(service, server):
+    """
+    Test that text commands are run through the API only with the token, and unknown ones are refused.
+    """
+    assert _request(server, "POST", "/command", {"text": "open notepad"})[0] == 401
+
+    status, body = _request(server, "POST", "/command", {"text": "open outlook then teams"}, token="secret")
+    assert (status, body["actions"]) == (200, ["open_applications", "open_applications"])
+    assert service.command_handler.launcher.wait(timeout=5)
+    assert sorted(service.command_handler.launcher.platform.opened) == ["C:/Start Menu/outlook.lnk",
+                                                                       "C:/Start Menu/teams.lnk"]
+
+    status, body = _request(server, "POST", "/command", {"text": "make me a sandwich"}, token="secret")
+    assert status == 422
+    assert _request(server, "GET", "/metrics", token="secret")[1]["text_commands"] == 1
+
+def test_requests_from_web_pages_are_refused(service, server, caplog):
+    """
+    Test that browser-style requests (simple content types, an Origin, a rebound Host name) run nothing,
+    and that a server without a configured token generates and logs one.
+    """
+    command = json.dumps({"text": "shutdown"}).encode()
+    assert _request(server, "POST", "/command", command, token="secret", content_type="text/plain")[0] == 415
+    assert _request(server, "POST", "/command", {"text": "shutdown"}, token="secret",
+                    headers={"Origin": "https://evil.example"})[0] == 403
+    assert _request(server, "POST", "/command", {"text": "shutdown"}, token="secret",
+                    headers={"Host": "evil.example:8765"})[0] == 403
+    assert service.metrics()["text_commands"] == 0
+    assert service.command_handler.launcher.platform.commands == []
+
+    with caplog.at_level("WARNING"):
+        default = ServiceServer(service, port=0)
+    try:
+        assert len(default.token) >= 32 and default.token in caplog.text
+        default.start()
+        assert _request(default, "POST", "/command", {"text": "shutdown"})[0] == 401
+    finally:
+        default.shutdown()
+        default.server_close()
+
+def test_sessions_listen_on_their_own_sources_and_wake_words(service, tmp_path):
+    """
+    Test that each session recognizes its own file-backed source with its own wake word, up to max_sessions.
+    """
+    room, kiosk = str(tmp_path / "room.wav"), str(tmp_path / "kiosk.wav")
+    _command_wav(room)
+    _command_wav(kiosk)
+    service.transcripts.update({room: "hey room open notepad", kiosk: "hey room open calculator"})
+
+    with patch.object(service.command_handler, 'open_application') as mock_open:
+        service.start_session("room", sr.AudioFile(room), "Hey Room")
+        service.start_session("kiosk", sr.AudioFile(kiosk), "ok kiosk")
+        with pytest.raises(Exception, match="At most 2 sessions"):
+            service.start_session("third", sr.AudioFile(room), "hey third")
+        for session in list(service._sessions.values()):
+            session.future.result(timeout=10)
+
+    mock_open.assert_called_once_with("notepad")
+    metrics = service.metrics()
+    assert (metrics["recognitions"], metrics["commands"]) == (2, 1)
+    assert {s["id"]: (s["recognitions"], s["commands"]) for s in metrics["sessions"]} == {"room": (1, 1), "kiosk": (1, 0)}
+
+def test_uploaded_audio_is_recognized_with_the_session_wake_word(service, server, tmp_path):
+    """
+    Test that a WAV posted to a session, at any sample rate, is recognized and only run when asked to.
+    """
+    source, upload = str(tmp_path / "source.wav"), tmp_path / "upload.wav"
+    _command_wav(source)
+    _command_wav(upload, rate=44100)
+    service.transcripts[source] = "hey room open notepad"
+    service.start_session("room", sr.AudioFile(source), "hey room")
+    service._sessions["room"].future.result(timeout=10)
+
+    with patch.object(service.command_handler, 'open_application') as mock_open:
+        status, body = _request(server, "POST", "/sessions/room/recognize?execute=0", upload.read_bytes(),
+                                token="secret", content_type="audio/wav")
+        assert (status, body["command"], body["executed"]) == (200, "open notepad", False)
+        mock_open.assert_not_called()
+        assert _request(server, "POST", "/sessions/nowhere/recognize", b"", token="secret",
+                        content_type="audio/wav")[0] == 404
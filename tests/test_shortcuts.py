@@ -0,0 +1,30 @@
+import struct
+from src.shortcuts import resolve_shortcut
+
+def _shortcut(base, suffix="", id_list=b""):
+    """Builds a minimal .lnk with a LinkInfo holding an ANSI local base path."""
+    flags = 0x02 | (0x01 if id_list else 0)
+    header = struct.pack("<I16sI", 0x4C, b"\0" * 16, flags).ljust(0x4C, b"\0")
+    target_ids = struct.pack("<H", len(id_list)) + id_list if id_list else b""
+    volume_id = struct.pack("<I", 0x10).ljust(0x10, b"\0")
+    base_bytes, suffix_bytes = base.encode("cp1252") + b"\0", suffix.encode("cp1252") + b"\0"
+    header_size = 0x1C
+    volume_offset = header_size
+    base_offset = volume_offset + len(volume_id)
+    suffix_offset = base_offset + len(base_bytes)
+    size = suffix_offset + len(suffix_bytes)
+    link_info = struct.pack("<7I", size, header_size, 0x01, volume_offset, base_offset, 0, suffix_offset)
+    return header + target_ids + link_info + volume_id + base_bytes + suffix_bytes
+
+def test_resolve_shortcut_reads_local_target(tmp_path):
+    """
+    Test that the target path is read from a shortcut, and that other files give None.
+    """
+    link = tmp_path / "Notepad.lnk"
+    link.write_bytes(_shortcut("C:\\Windows\\System32\\", "notepad.exe", id_list=b"\x02\x00"))
+    assert resolve_shortcut(str(link)) == "C:\\Windows\\System32\\notepad.exe"
+
+    not_a_link = tmp_path / "readme.lnk"
+    not_a_link.write_bytes(b"hello")
+    assert resolve_shortcut(str(not_a_link)) is None
+    assert resolve_shortcut(str(tmp_path / "missing.lnk")) is None
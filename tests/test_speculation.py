@@ -0,0 +1,119 @@
+import numpy as np
+from unittest.mock import patch
+from src.audio_features import float_to_pcm
+from src.command_handler import CommandHandler
+from src.command_registry import CommandRegistry
+from src.launcher import FakePlatform
+from src.recognizer_backends import RecognizerBackend
+from src.speculation import Speculator, StreamingSegmenter
+from src.vad import Endpointer
+
+RATE = 16000
+
+class _StreamingBackend(RecognizerBackend):
+    """Reveals one more word of the transcript for every 1 / words_per_second of audio fed."""
+    name = "streaming"
+    supports_partials = True
+
+    def __init__(self, transcript, words_per_second=4.0):
+        self.words = transcript.split()
+        self.words_per_second = words_per_second
+
+    def stream(self, sample_rate, sample_width):
+        backend, fed = self, []
+
+        class Stream:
+            def feed(self, pcm):
+                fed.append(len(pcm) / (sample_rate * sample_width))
+                return " ".join(backend.words[:int(sum(fed) * backend.words_per_second)])
+        return Stream()
+
+def _registry():
+    registry = CommandRegistry()
+    registry.add("open {apps:list}", "open_applications")
+    registry.add("mute", "mute")
+    return registry
+
+def test_partials_stream_while_the_utterance_is_spoken():
+    """
+    Test that partial transcripts arrive during speech, before the endpointer returns the utterance.
+    """
+    rng = np.random.default_rng(0)
+    t = np.arange(RATE) / RATE
+    samples = np.concatenate([rng.normal(0, 0.001, RATE), 0.3 * np.sin(2 * np.pi * 220 * t),
+                              rng.normal(0, 0.001, RATE)]).astype(np.float32)
+    events = []
+    segmenter = StreamingSegmenter(Endpointer(RATE), _StreamingBackend("hey windows open notepad"),
+                                   lambda text: events.append(text))
+    data = float_to_pcm(samples)
+    for i in range(0, len(data), 960):
+        if segmenter.process(data[i:i + 960]):
+            events.append(None)
+
+    assert events[-1] is None
+    assert events[:-1] == ["hey", "hey windows", "hey windows open", "hey windows open notepad"]
+
+def test_streaming_stops_after_a_failure(caplog):
+    """
+    Test that a backend whose stream fails is not retried on every chunk, while utterances still come through.
+    """
+    class _BrokenBackend(_StreamingBackend):
+        def stream(self, sample_rate, sample_width):
+            self.calls = getattr(self, "calls", 0) + 1
+            raise RuntimeError("model not loaded")
+
+    rng = np.random.default_rng(0)
+    t = np.arange(RATE) / RATE
+    samples = np.concatenate([rng.normal(0, 0.001, RATE), 0.3 * np.sin(2 * np.pi * 220 * t),
+                              rng.normal(0, 0.001, RATE)]).astype(np.float32)
+    backend = _BrokenBackend("hey windows")
+    segmenter = StreamingSegmenter(Endpointer(RATE), backend, lambda text: None)
+    data = float_to_pcm(samples)
+    utterances = [segmenter.process(data[i:i + 960]) for i in range(0, len(data), 960)]
+
+    assert sum(1 for utterance in utterances if utterance) == 1
+    assert backend.calls == 1
+    assert caplog.text.count("Partial recognition failed") == 1
+
+def test_confirmed_speculation_is_used_and_others_discarded(tmp_path):
+    """
+    Test that take() returns a speculative lookup the final command confirms, and nothing for other names.
+    """
+    notepad = tmp_path / "notepad.lnk"
+    notepad.write_bytes(b"")
+    lookups = []
+
+    def find_app(name):
+        lookups.append(name)
+        return str(notepad) if "note" in name else None
+
+    speculator = Speculator(_registry().match, find_app)
+    for partial in ("open", "open note", "open notepad", "mute"):
+        speculator.speculate(partial)
+
+    assert speculator.take("notepad") == str(notepad)
+    assert speculator.take("notepad") is None
+    assert sorted(lookups) == ["note", "notepad"]
+    speculator.discard()
+    assert speculator.take("note") is None
+    assert (speculator.hits, speculator.misses) == (1, 2)
+
+def test_open_command_uses_the_path_resolved_from_partials(tmp_path):
+    """
+    Test that an "open" command confirmed by the final transcript launches without a second app lookup.
+    """
+    notepad = tmp_path / "notepad.exe"
+    notepad.write_bytes(b"")
+    with patch('src.command_handler.AppFinder'):
+        handler = CommandHandler()
+    handler.launcher.platform = FakePlatform()
+    handler.app_finder.find_app.return_value = str(notepad)
+
+    handler.speculate("hey windows open notepad", wake_word="hey windows")
+    handler.speculate("open calculator", wake_word="hey windows")
+    handler.execute_command("open notepad")
+
+    handler.app_finder.find_app.assert_called_once_with("notepad")
+    assert handler.launcher.wait(timeout=5)
+    assert handler.launcher.platform.opened == [str(notepad)]
+    assert handler.speculation.hits == 1
@@ -0,0 +1,36 @@
+import pytest
+from src.usage_history import UsageHistory
+
+DAY = 86400.0
+
+def test_launches_decay_and_persist(tmp_path, clock):
+    """
+    Test that each launch adds one to a score that halves every half-life, and that the history survives a restart.
+    """
+    path = str(tmp_path / "history.json")
+    history = UsageHistory(path, half_life_days=14, clock=clock)
+    history.record("C:/chrome.lnk", "chrome")
+    history.record("C:/chrome.lnk", "browser")
+    assert history.score("C:/chrome.lnk") == pytest.approx(2.0)
+    assert history.affinity("C:/spotify.lnk") == 0.0
+
+    clock.now += 14 * DAY
+    reloaded = UsageHistory(path, half_life_days=14, clock=clock)
+    assert reloaded.score("C:/chrome.lnk") == pytest.approx(1.0)
+    assert reloaded.top(5) == [("C:/chrome.lnk", ["browser", "chrome"])]
+
+def test_recent_use_outranks_old_frequent_use_and_least_used_is_dropped(clock):
+    """
+    Test that the top list is ordered by decayed score and the history stays within max_entries.
+    """
+    history = UsageHistory(None, half_life_days=7, max_entries=2, clock=clock)
+    for _ in range(4):
+        history.record("old.lnk")
+    clock.now += 21 * DAY
+    history.record("new.lnk")
+    history.record("new.lnk")
+    assert [path for path, _ in history.top(5)] == ["new.lnk", "old.lnk"]
+
+    history.record("newest.lnk")
+    assert len(history) == 2
+    assert [path for path, _ in history.top(5)] == ["new.lnk", "newest.lnk"]
@@ -0,0 +1,71 @@
+import numpy as np
+from src.audio_features import float_to_pcm, frame_signal
+from src.vad import VoiceActivityDetector, Endpointer
+
+RATE = 16000
+
+def _tone(duration, amplitude=0.3, freq=220.0):
+    t = np.arange(int(RATE * duration)) / RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+def _noise(duration, level, seed=0):
+    return np.random.default_rng(seed).normal(0, level, int(RATE * duration)).astype(np.float32)
+
+def _stream(endpointer, samples, chunk=480):
+    """Feeds samples as PCM chunks. Returns (utterances, end time in seconds of the chunk that closed each)."""
+    data = float_to_pcm(samples)
+    results = []
+    for i in range(0, len(data), 2 * chunk):
+        utterance = endpointer.process(data[i:i + 2 * chunk])
+        if utterance:
+            results.append((utterance, (i + 2 * chunk) / (2 * RATE)))
+    return results
+
+def test_classify_separates_voiced_sound_from_noise():
+    """
+    Test that voiced frames count as speech while loud broadband noise does not.
+    """
+    vad = VoiceActivityDetector(RATE)
+    vad.process(_noise(0.5, 0.001))
+    frames = lambda samples: frame_signal(samples, vad.frame_length, vad.frame_length)
+
+    assert vad.classify(frames(_tone(0.2) + _noise(0.2, 0.001))).all()
+    assert not vad.classify(frames(_noise(0.2, 0.05))).any()
+
+def test_noise_floor_follows_louder_room():
+    """
+    Test that the noise floor rises with the background level and speech is still detected above it.
+    """
+    vad = VoiceActivityDetector(RATE)
+    vad.process(_noise(1.0, 0.001))
+    quiet_floor = vad.noise_floor_db
+    vad.process(_noise(10.0, 0.01, seed=1))
+
+    assert vad.noise_floor_db > quiet_floor + 15
+    assert vad.process(_tone(0.2, amplitude=0.2) + _noise(0.2, 0.01, seed=2)).mean() > 0.9
+
+def test_endpointer_splits_utterances():
+    """
+    Test that the endpointer returns one utterance per burst, with pre-roll and trailing silence.
+    """
+    gap = _noise(1.0, 0.001)
+    samples = np.concatenate([gap, _tone(0.5), gap, _tone(1.0), gap])
+    utterances = [u for u, _ in _stream(Endpointer(RATE), samples)]
+
+    assert len(utterances) == 2
+    # Burst, pre-roll and trailing silence (bytes are 2 per sample)
+    assert 0.5 + 0.7 <= len(utterances[0]) / (2 * RATE) <= 0.5 + 0.7 + 0.4
+    assert len(utterances[1]) > len(utterances[0])
+
+def test_endpointer_timeouts_are_configurable():
+    """
+    Test that a shorter trailing silence ends the utterance sooner, and short clicks are ignored.
+    """
+    samples = np.concatenate([_noise(1.0, 0.001), _tone(0.05), _noise(1.0, 0.001), _tone(0.5), _noise(1.0, 0.001)])
+    default = _stream(Endpointer(RATE), samples)
+    quick = _stream(Endpointer(RATE, trailing_silence_ms=300), samples)
+
+    assert len(default) == len(quick) == 1
+    speech_end = 2.55
+    assert 0.7 <= default[0][1] - speech_end <= 0.8
+    assert 0.3 <= quick[0][1] - speech_end <= 0.4
@@ -0,0 +1,139 @@
+import time
+import asyncio
+import threading
+import numpy as np
+import speech_recognition as sr
+from src.audio_features import float_to_pcm
+from src.vad import Endpointer
+from src.voice_core import VoiceCore
+
+RATE = 16000
+
+def _core(path, recognize, execute, **kwargs):
+    return VoiceCore(sr.AudioFile(str(path)), Endpointer(RATE), recognize, execute, **kwargs)
+
+def _tenths(audio):
+    """Utterance length in tenths of a second, used as a stand-in transcript."""
+    return len(audio) // (2 * RATE // 10)
+
+def test_commands_run_in_spoken_order_with_concurrent_recognition(tmp_path, utterances_wav):
+    """
+    Test that several recognitions run at once but commands still run in the order spoken.
+    """
+    path = tmp_path / "speech.wav"
+    utterances_wav(path, [0.9, 0.6, 0.3])
+    executed = []
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def recognize(audio):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        # Longer utterances take longer, so later ones finish first
+        time.sleep(_tenths(audio) / 50)
+        with lock:
+            active[0] -= 1
+        return f"command {_tenths(audio)}"
+
+    asyncio.run(_core(path, recognize, executed.append, max_recognitions=3).run())
+
+    lengths = [int(command.split()[1]) for command in executed]
+    assert len(lengths) == 3
+    assert lengths == sorted(lengths, reverse=True)
+    assert peak[0] > 1
+
+def test_slow_command_does_not_block_later_commands(tmp_path, caplog, utterances_wav):
+    """
+    Test that a command running past its timeout is left running while later ones go ahead.
+    """
+    path = tmp_path / "speech.wav"
+    utterances_wav(path, [0.3, 0.3])
+    commands = iter(["open slow app", "volume up"])
+    executed = []
+
+    def execute(command):
+        if command == "open slow app":
+            time.sleep(1.0)
+        executed.append(command)
+
+    start = time.monotonic()
+    asyncio.run(_core(path, lambda audio: next(commands), execute, command_timeout=0.2).run())
+
+    assert executed == ["volume up"]
+    assert time.monotonic() - start < 1.0
+    assert "Command 'open slow app' still running after 0.2s" in caplog.text
+
+def test_failing_and_hung_recognitions_are_skipped(tmp_path, caplog, utterances_wav):
+    """
+    Test that a failing or timed out recognition is logged without stopping the loop.
+    """
+    path = tmp_path / "speech.wav"
+    utterances_wav(path, [0.3, 0.3, 0.3])
+    results = iter([RuntimeError("network down"), "hang", "volume up"])
+    executed = []
+
+    def recognize(audio):
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        if result == "hang":
+            time.sleep(1.0)
+        return result
+
+    asyncio.run(_core(path, recognize, executed.append, recognition_timeout=0.2).run())
+
+    assert executed == ["volume up"]
+    assert "Recognition failed: network down" in caplog.text
+    assert "Recognition timed out after 0.2s." in caplog.text
+
+class _EndlessSource:
+    """A microphone stand-in that keeps producing quiet audio in real time."""
+    SAMPLE_RATE, SAMPLE_WIDTH, CHUNK = RATE, 2, 480
+
+    def __enter__(self):
+        self.stream = self
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def read(self, size):
+        time.sleep(size / RATE)
+        return float_to_pcm(np.zeros(size, dtype=np.float32))
+
+def test_stop_from_another_thread():
+    """
+    Test that stop() ends a run on a live source promptly.
+    """
+    core = VoiceCore(_EndlessSource(), Endpointer(RATE), lambda audio: None, lambda command: None)
+    threading.Timer(0.2, core.stop).start()
+    start = time.monotonic()
+
+    asyncio.run(core.run())
+
+    assert time.monotonic() - start < 2.0
+
+def test_each_command_is_traced_from_utterance_end(tmp_path, utterances_wav):
+    """
+    Test that every command gets a latency trace covering capture, recognition and execution.
+    """
+    from src.latency import LatencyTracer
+    path = tmp_path / "speech.wav"
+    utterances_wav(path, [0.5, 0.5])
+    tracer = LatencyTracer()
+
+    def recognize(audio):
+        with tracer.span("recognize_stub"):
+            time.sleep(0.02)
+        return "open notepad"
+
+    asyncio.run(_core(path, recognize, lambda command: time.sleep(0.01), tracer=tracer).run())
+
+    traces = tracer.traces()
+    assert len(traces) == 2
+    for trace in traces:
+        stages = [span["stage"] for span in trace["spans"]]
+        assert stages == ["capture", "recognize_stub", "recognize", "execute_command"]
+        assert trace["total_ms"] >= 30
+    assert tracer.stats()["vad"]["count"] > 0
@@ -1,8 +1,23 @@
 import pytest
 from unittest.mock import patch, MagicMock
+import numpy as np
 import speech_recognition as sr
+from src.audio_features import float_to_pcm
 from src.voice_recognition import VoiceRecognizer
 
+def _speak(mock_microphone_class, rate=16000, chunk=480):
+    """
+    Makes the mocked microphone stream one second of quiet, a short burst of
+    voiced sound and another second of quiet, then end.
+    """
+    rng = np.random.default_rng(0)
+    t = np.arange(int(0.6 * rate)) / rate
+    samples = np.concatenate([rng.normal(0, 0.001, rate), 0.3 * np.sin(2 * np.pi * 220 * t), rng.normal(0, 0.001, rate)])
+    data = float_to_pcm(samples)
+    source = mock_microphone_class.return_value.__enter__.return_value
+    source.SAMPLE_RATE, source.SAMPLE_WIDTH, source.CHUNK = rate, 2, chunk
+    source.stream.read.side_effect = [data[i:i + 2 * chunk] for i in range(0, len(data), 2 * chunk)] + [b'']
+
 @patch('speech_recognition.Microphone')
 @patch('speech_recognition.Recognizer')
 def test_listen_for_command_detected(mock_recognizer_class, mock_microphone_class):
@@ -13,6 +28,7 @@ def test_listen_for_command_detected(mock_recognizer_class, mock_microphone_clas
     mock_recognizer_instance = MagicMock()
     mock_recognizer_instance.recognize_google.return_value = "hey system open chrome"
     mock_recognizer_class.return_value = mock_recognizer_instance
+    _speak(mock_microphone_class)
 
     recognizer = VoiceRecognizer()
 
@@ -21,8 +37,9 @@ def test_listen_for_command_detected(mock_recognizer_class, mock_microphone_clas
 
     # Assert
     assert command == "open chrome"
-    mock_recognizer_instance.adjust_for_ambient_noise.assert_called_once()
-    mock_recognizer_instance.listen.assert_called_once()
+    # The voice activity detector replaces the one-off ambient noise calibration
+    mock_recognizer_instance.adjust_for_ambient_noise.assert_not_called()
+    mock_recognizer_instance.listen.assert_not_called()
     mock_recognizer_instance.recognize_google.assert_called_once()
 
 @patch('speech_recognition.Microphone')
@@ -35,6 +52,7 @@ def test_listen_for_command_no_wake_word(mock_recognizer_class, mock_microphone_
     mock_recognizer_instance = MagicMock()
     mock_recognizer_instance.recognize_google.return_value = "open notepad"
     mock_recognizer_class.return_value = mock_recognizer_instance
+    _speak(mock_microphone_class)
 
     recognizer = VoiceRecognizer()
 
@@ -54,6 +72,7 @@ def test_listen_for_command_unknown_value_error(mock_recognizer_class, mock_micr
     mock_recognizer_instance = MagicMock()
     mock_recognizer_instance.recognize_google.side_effect = sr.UnknownValueError()
     mock_recognizer_class.return_value = mock_recognizer_instance
+    _speak(mock_microphone_class)
 
     recognizer = VoiceRecognizer()
 
@@ -62,3 +81,128 @@ def test_listen_for_command_unknown_value_error(mock_recognizer_class, mock_micr
 
     # Assert
     assert command is None
+
+@patch('wake_word.WakeWordDetector.from_wav_files')
+@patch('speech_recognition.Microphone')
+@patch('speech_recognition.Recognizer')
+def test_listen_for_command_with_wake_word_gate(mock_recognizer_class, mock_microphone_class, mock_from_wav_files):
+    """
+    Test that only the audio after a locally detected wake word is sent for recognition.
+    """
+    # Arrange
+    loud, quiet = b'\x00\x40' * 1024, b'\x00\x00' * 1024
+    chunks = [quiet, loud, quiet] + [loud] * 5 + [quiet] * 20
+    source = mock_microphone_class.return_value.__enter__.return_value
+    source.SAMPLE_RATE, source.SAMPLE_WIDTH, source.CHUNK = 16000, 2, 1024
+    source.stream.read.side_effect = chunks
+    detector = MagicMock(sample_rate=16000)
+    # The wake word ends in the third chunk
+    detector.process.side_effect = [False, False, True]
+    mock_from_wav_files.return_value = detector
+
+    mock_recognizer_instance = MagicMock()
+    mock_recognizer_instance.recognize_google.return_value = "open chrome"
+    mock_recognizer_class.return_value = mock_recognizer_instance
+
+    recognizer = VoiceRecognizer(wake_word_templates=["hey_windows.wav"])
+
+    # Act
+    command = recognizer.listen_for_command()
+
+    # Assert
+    assert command == "open chrome"
+    mock_recognizer_instance.listen.assert_not_called()
+    audio = mock_recognizer_instance.recognize_google.call_args[0][0]
+    # Five chunks of speech followed by enough silence to end the command
+    assert audio.get_raw_data().startswith(loud * 5)
+    assert detector.process.call_count == 3
+
+@patch('speech_recognition.Microphone')
+@patch('speech_recognition.Recognizer')
+def test_wake_word_gate_end_of_stream(mock_recognizer_class, mock_microphone_class):
+    """
+    Test that a file-backed source that runs out of audio yields no command.
+    """
+    source = mock_microphone_class.return_value.__enter__.return_value
+    source.stream.read.return_value = b''
+    recognizer = VoiceRecognizer()
+    recognizer.wake_word_gate = MagicMock()
+
+    assert recognizer.listen_for_command() is None
+    mock_recognizer_class.return_value.recognize_google.assert_not_called()
+
+@patch('speech_recognition.Microphone')
+@patch('speech_recognition.Recognizer')
+def test_listen_for_command_snaps_to_grammar(mock_recognizer_class, mock_microphone_class):
+    """
+    Test that a backend without grammar support has its transcript snapped to a valid command.
+    """
+    mock_recognizer_instance = MagicMock()
+    mock_recognizer_instance.recognize_google.return_value = "hey system volum dawn"
+    mock_recognizer_class.return_value = mock_recognizer_instance
+    _speak(mock_microphone_class)
+
+    recognizer = VoiceRecognizer()
+    recognizer.set_grammar(["volume up", "volume down", "open notepad"], wake_word="hey system")
+
+    assert recognizer.listen_for_command("hey system") == "volume down"
+
+@patch('speech_recognition.Microphone')
+@patch('speech_recognition.Recognizer')
+def test_recognize_utterance_requires_wake_word(mock_recognizer_class, mock_microphone_class):
+    """
+    Test that pipeline utterances without the wake word are ignored and the wake word is stripped otherwise.
+    """
+    mock_recognizer_instance = MagicMock()
+    mock_recognizer_instance.recognize_google.side_effect = ["what time is it", "hey windows open chrome"]
+    mock_recognizer_class.return_value = mock_recognizer_instance
+    mock_microphone_class.return_value.__enter__.return_value.SAMPLE_RATE = 16000
+    mock_microphone_class.return_value.__enter__.return_value.SAMPLE_WIDTH = 2
+
+    recognizer = VoiceRecognizer()
+
+    assert recognizer.recognize_utterance(b'\x00\x00' * 160) is None
+    assert recognizer.recognize_utterance(b'\x00\x00' * 160) == "open chrome"
+
+@patch('speech_recognition.Microphone')
+@patch('speech_recognition.Recognizer')
+def test_listen_for_command_silence(mock_recognizer_class, mock_microphone_class):
+    """
+    Test that a stream without speech never reaches the recognizer.
+    """
+    source = mock_microphone_class.return_value.__enter__.return_value
+    source.SAMPLE_RATE, source.SAMPLE_WIDTH, source.CHUNK = 16000, 2, 480
+    quiet = float_to_pcm(np.random.default_rng(0).normal(0, 0.001, 480))
+    source.stream.read.side_effect = [quiet] * 100 + [b'']
+
+    recognizer = VoiceRecognizer()
+
+    assert recognizer.listen_for_command() is None
+    mock_recognizer_class.return_value.recognize_google.assert_not_called()
+
+@patch('speech_recognition.Microphone')
+@patch('speech_recognition.Recognizer')
+def test_repeated_command_skips_recognizer(mock_recognizer_class, mock_microphone_class):
+    """
+    Test that with the recognition cache, a repeat of a confidently recognized command is not sent to the backend.
+    """
+    mock_recognizer_instance = MagicMock()
+    mock_recognizer_instance.recognize_google.side_effect = [("hey windows volume up", 0.93), ("hey windows mute", 0.91)]
+    mock_recognizer_class.return_value = mock_recognizer_instance
+    mock_microphone_class.return_value.__enter__.return_value.SAMPLE_RATE = 16000
+    mock_microphone_class.return_value.__enter__.return_value.SAMPLE_WIDTH = 2
+    rng = np.random.default_rng(0)
+    t = np.arange(8000) / 16000
+
+    def take(freq):
+        tones = np.concatenate([0.3 * np.sin(2 * np.pi * f * t) for f in (freq, 2 * freq)])
+        return float_to_pcm(tones + rng.normal(0, 0.003, len(tones)))
+
+    recognizer = VoiceRecognizer(recognition_cache={})
+
+    assert recognizer.recognize_utterance(take(220)) == "volume up"
+    assert recognizer.recognize_utterance(take(220)) == "volume up"
+    assert recognizer.recognize_utterance(take(700)) == "mute"
+    assert mock_recognizer_instance.recognize_google.call_count == 2
+    assert mock_recognizer_instance.recognize_google.call_args.kwargs["with_confidence"]
+    assert recognizer.cache.stats()["hits"] == 1
@@ -0,0 +1,98 @@
+import time
+import pytest
+import logging
+from unittest.mock import MagicMock
+from src.volume_control import FakeVolumeEndpoint, VolumeController
+
+def test_change_is_ramped_smoothly():
+    """
+    Test that a change of volume is spread over several increasing steps that end exactly on the target.
+    """
+    endpoint = FakeVolumeEndpoint(level=0.2)
+    volume = VolumeController(endpoint, max_step=0.1, step_ms=10)
+
+    assert volume.set(0.8) == 0.8
+    assert volume.wait(timeout=5)
+
+    assert len(endpoint.history) > 2
+    assert endpoint.history == sorted(endpoint.history)
+    assert endpoint.history[-1] == 0.8
+    assert volume.level == 0.8
+
+def test_requests_during_a_ramp_move_one_target():
+    """
+    Test that relative steps build on the pending target, are clamped, and cost a single read.
+    """
+    endpoint = FakeVolumeEndpoint(level=0.5)
+    volume = VolumeController(endpoint, max_step=0.05, step_ms=10)
+
+    for _ in range(6):
+        target = volume.step(0.1)
+    assert target == 1.0
+    assert volume.step(-0.25) == 0.75
+    assert volume.wait(timeout=5)
+
+    assert endpoint.level == 0.75
+    # One read for the whole burst; everything else is a set
+    assert endpoint.calls == len(endpoint.history) + 1
+
+def test_burst_takes_fewer_calls_and_keeps_the_step_cap():
+    """
+    Test that a burst of steps arriving during a ramp costs fewer endpoint calls than a read and a set
+    per command, and no step of the ramp moves the level further than the cap.
+    """
+    endpoint = FakeVolumeEndpoint(level=0.2)
+    volume = VolumeController(endpoint, max_step=0.08, step_ms=30)
+
+    for i in range(5):
+        if i:
+            time.sleep(0.01)
+        volume.step(0.1)
+    assert volume.wait(timeout=5)
+
+    assert endpoint.level == pytest.approx(0.7)
+    assert endpoint.calls < 2 * 5
+    levels = [0.2] + endpoint.history
+    assert max(abs(b - a) for a, b in zip(levels, levels[1:])) <= 0.08 + 1e-9
+
+def test_cached_level_is_read_again_when_stale():
+    """
+    Test that the cached level is reused while fresh and read again from the endpoint once stale.
+    """
+    now = [0.0]
+    endpoint = FakeVolumeEndpoint(level=0.5)
+    volume = VolumeController(endpoint, max_step=1.0, cache_seconds=2.0, clock=lambda: now[0])
+
+    volume.step(0.1)
+    volume.wait(timeout=5)
+    endpoint.level = 0.2  # changed elsewhere, e.g. with the keyboard
+    now[0] = 1.0
+    assert volume.level == pytest.approx(0.6)
+
+    now[0] = 5.0
+    assert volume.level == 0.2
+    assert volume.step(0.1) == pytest.approx(0.3)
+
+def test_failed_set_is_logged(caplog):
+    """
+    Test that an endpoint error ends the ramp, is logged and drops the cached level.
+    """
+    endpoint = MagicMock()
+    endpoint.GetMasterVolumeLevelScalar.return_value = 0.5
+    endpoint.SetMasterVolumeLevelScalar.side_effect = OSError("device removed")
+    volume = VolumeController(endpoint, logger=logging.getLogger("test_volume"), max_step=1.0)
+
+    with caplog.at_level(logging.ERROR):
+        volume.set(0.9)
+        assert volume.wait(timeout=5)
+
+    assert "Failed to set the volume: device removed" in caplog.text
+    endpoint.GetMasterVolumeLevelScalar.return_value = 0.4
+    assert volume.level == 0.4
+
+def test_toggle_mute():
+    endpoint = FakeVolumeEndpoint()
+    volume = VolumeController(endpoint)
+    assert volume.toggle_mute() is True
+    assert volume.toggle_mute() is False
+    assert endpoint.muted is False
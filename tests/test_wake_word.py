@@ -0,0 +1,102 @@
+import pytest
+import numpy as np
+from src.audio_features import float_to_pcm, write_wav
+from src.wake_word import WakeWordDetector, WakeWordGate
+
+SAMPLE_RATE = 16000
+CHUNK = 1024
+# (F1, F2) formants of the vowels in the synthetic wake word and in babble
+WAKE_WORD = [(530, 1840), (270, 2290), (270, 2290), (570, 840), (570, 840)]
+BABBLE = [(730, 1090), (300, 870), (660, 1720), (490, 1350), (730, 1090), (300, 870)]
+
+def synth_speech(formants, rng, f0=130.0, stretch=1.0, syllable_ms=110):
+    """Speech-like audio: harmonics shaped by vowel formants, one syllable per vowel."""
+    pieces = []
+    for f1, f2 in formants:
+        t = np.arange(int(SAMPLE_RATE * syllable_ms * stretch / 1000)) / SAMPLE_RATE
+        harmonics = np.arange(1, int(4000 / f0)) * f0
+        gains = np.exp(-((harmonics - f1) / 120.0) ** 2) + 0.6 * np.exp(-((harmonics - f2) / 180.0) ** 2) + 0.02
+        phases = rng.uniform(0, 2 * np.pi, len(harmonics))
+        pieces.append((gains[:, None] * np.sin(2 * np.pi * harmonics[:, None] * t + phases[:, None])).sum(axis=0) * np.hanning(len(t)))
+    speech = np.concatenate(pieces)
+    return 0.3 * speech / np.abs(speech).max()
+
+def silence(seconds, rng):
+    return 0.003 * rng.standard_normal(int(SAMPLE_RATE * seconds))
+
+@pytest.fixture
+def detector(tmp_path):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i, (stretch, f0) in enumerate([(1.0, 130.0), (0.9, 140.0), (1.1, 120.0)]):
+        path = str(tmp_path / f"wake_{i}.wav")
+        write_wav(path, synth_speech(WAKE_WORD, rng, f0=f0, stretch=stretch), SAMPLE_RATE)
+        paths.append(path)
+    return WakeWordDetector.from_wav_files(paths, SAMPLE_RATE)
+
+def feed(detector, signal):
+    """Returns the stream times (seconds) at which the detector fired."""
+    hits = []
+    for start in range(0, len(signal), CHUNK):
+        if detector.process(signal[start:start + CHUNK].astype(np.float32)):
+            hits.append((start + CHUNK) / SAMPLE_RATE)
+    return hits
+
+def test_detects_wake_word_in_stream(detector):
+    """
+    Test that the wake word is spotted shortly after it is spoken, with a different voice.
+    """
+    rng = np.random.default_rng(1)
+    wake_word = synth_speech(WAKE_WORD, rng, f0=125.0, stretch=1.05)
+    signal = np.concatenate([silence(1.0, rng), wake_word, synth_speech(BABBLE, rng), silence(0.5, rng)])
+
+    hits = feed(detector, signal)
+
+    end_of_wake_word = 1.0 + len(wake_word) / SAMPLE_RATE
+    assert len(hits) == 1
+    assert abs(hits[0] - end_of_wake_word) < 0.25
+
+def test_ignores_other_speech(detector):
+    """
+    Test that background conversation does not trigger the wake word.
+    """
+    rng = np.random.default_rng(2)
+    signal = np.concatenate([silence(0.5, rng), synth_speech(BABBLE * 2, rng, f0=140.0), silence(0.5, rng)])
+
+    assert feed(detector, signal) == []
+
+def test_detector_requires_audible_template():
+    with pytest.raises(ValueError):
+        WakeWordDetector([np.zeros(SAMPLE_RATE, dtype=np.float32)], SAMPLE_RATE)
+
+def test_gate_forwards_only_the_command(detector):
+    """
+    Test that the gate returns the audio following the wake word once the speaker stops.
+    """
+    rng = np.random.default_rng(3)
+    command = synth_speech(BABBLE, rng)
+    signal = np.concatenate([
+        silence(1.0, rng), synth_speech(BABBLE, rng), silence(0.3, rng),
+        synth_speech(WAKE_WORD, rng), silence(0.2, rng), command, silence(1.5, rng),
+    ])
+    pcm = float_to_pcm(signal)
+    gate = WakeWordGate(detector)
+
+    results = [gate.process(pcm[i:i + 2 * CHUNK]) for i in range(0, len(pcm), 2 * CHUNK)]
+
+    captured = [audio for audio in results if audio]
+    assert len(captured) == 1
+    # Roughly the pause, the command and the trailing silence that ended it
+    seconds = len(captured[0]) / 2 / SAMPLE_RATE
+    assert len(command) / SAMPLE_RATE < seconds < len(command) / SAMPLE_RATE + 1.5
+
+def test_gate_times_out_without_command(detector):
+    rng = np.random.default_rng(4)
+    signal = np.concatenate([silence(0.5, rng), synth_speech(WAKE_WORD, rng), silence(4.0, rng)])
+    pcm = float_to_pcm(signal)
+    gate = WakeWordGate(detector)
+
+    results = [gate.process(pcm[i:i + 2 * CHUNK]) for i in range(0, len(pcm), 2 * CHUNK)]
+
+    assert not any(results)
+    assert not gate._capturing